@@ -3,6 +3,7 @@ from fastapi import APIRouter
 from app.api.v1.endpoints import (
     auth_endpoint,
     entry_endpoint,
+    job_endpoint,
     me_endpoint,
     share_link_endpoint,
     test_endpoint,
@@ -20,3 +21,4 @@ v1_api_router.include_router(share_link_endpoint.router)
 v1_api_router.include_router(auth_endpoint.router)
 v1_api_router.include_router(test_endpoint.router)
 v1_api_router.include_router(volseg_endpoint.router)
+v1_api_router.include_router(job_endpoint.router)
@@ -1,3 +1,4 @@
+from enum import Enum
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -20,6 +21,19 @@ class EntryUpdateRequest(BaseModel):
     model_config = {"extra": "forbid"}
 
 
+class EntryBundleInclude(str, Enum):
+    views = "views"
+    thumbnail = "thumbnail"
+    share_link = "share_link"
+
+
+class CountStrategy(str, Enum):
+    exact = "exact"
+    estimate = "estimate"
+    capped = "capped"
+    cached = "cached"
+
+
 class SearchQueryParams(BaseModel):
     search_term: str | None = Field(
         default=None,
@@ -27,5 +41,29 @@ class SearchQueryParams(BaseModel):
     )
     page: int = Field(default=1, ge=1)
     per_page: int = Field(default=10, ge=1, le=100)
+    cursor: str | None = Field(
+        default=None,
+        description="Cursor from a previous page's `next_cursor`. Takes precedence over `page`.",
+    )
+    count: CountStrategy | None = Field(
+        default=None,
+        description="How `total_items` is computed, the server default is used when omitted.",
+    )
+
+    model_config = {"extra": "forbid"}
+
+
+class EntrySearchQueryParams(BaseModel):
+    q: str = Field(
+        min_length=1,
+        max_length=255,
+        description="Keywords to search by in entry titles and descriptions.",
+    )
+    page: int = Field(default=1, ge=1)
+    per_page: int = Field(default=10, ge=1, le=100)
+    count: CountStrategy | None = Field(
+        default=None,
+        description="How `total_items` is computed, the server default is used when omitted.",
+    )
 
     model_config = {"extra": "forbid"}
@@ -1,10 +1,16 @@
+from enum import Enum
+
 from fastapi import File, Form, UploadFile
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+FILENAME_PATTERN = r"^[\w\-][\w.\-]*$"
 
 
 class VolsegUploadEntry(BaseModel):
     db_name: str = Form(min_length=1, max_length=255, examples=["emdb"])
-    entry_id: str = Form(min_length=1, max_length=255, examples=["emd-1832"])
+    entry_id: str = Form(
+        min_length=1, max_length=255, pattern=FILENAME_PATTERN, examples=["emd-1832"]
+    )
     is_public: bool | None = Form(default=False)
 
     # data
@@ -13,3 +19,28 @@ class VolsegUploadEntry(BaseModel):
     data: UploadFile = File(description="Entry data (zip)")
 
     model_config = {"extra": "forbid"}
+
+
+class VolsegUploadFile(str, Enum):
+    annotations = "annotations"
+    metadata = "metadata"
+    data = "data"
+
+
+class VolsegUploadCreateRequest(BaseModel):
+    db_name: str = Field(min_length=1, max_length=255, examples=["emdb"])
+    entry_id: str = Field(
+        min_length=1, max_length=255, pattern=FILENAME_PATTERN, examples=["emd-1832"]
+    )
+    is_public: bool | None = Field(default=False)
+
+    # names the files are stored under once the upload is finalized
+    annotations_filename: str = Field(
+        max_length=255, pattern=FILENAME_PATTERN, examples=["annotations.json"]
+    )
+    metadata_filename: str = Field(
+        max_length=255, pattern=FILENAME_PATTERN, examples=["metadata.json"]
+    )
+    data_filename: str = Field(max_length=255, pattern=FILENAME_PATTERN, examples=["data.zip"])
+
+    model_config = {"extra": "forbid"}
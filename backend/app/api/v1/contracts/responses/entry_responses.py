@@ -1,8 +1,11 @@
+from enum import Enum
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, Field
 
 from app.api.v1.contracts.responses.common import DebugModelName, Timestamp, Uuid
+from app.api.v1.contracts.responses.share_link_responses import ShareLinkResponse
+from app.api.v1.contracts.responses.view_responses import ViewResponse
 
 
 class EntryResponse(Timestamp, Uuid, DebugModelName, BaseModel):
@@ -13,3 +16,33 @@ class EntryResponse(Timestamp, Uuid, DebugModelName, BaseModel):
     volseg_entry_id: UUID
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class EntryBundleResponse(DebugModelName, BaseModel):
+    """The entry with the related resources asked for in `include`, the rest are null."""
+
+    entry: EntryResponse
+    views: list[ViewResponse] | None = Field(default=None)
+    thumbnail: ViewResponse | None = Field(
+        default=None, description="Null also when the entry has no thumbnail view"
+    )
+    share_link: ShareLinkResponse | None = Field(
+        default=None, description="Only included for the entry's owner"
+    )
+
+
+class EntrySearchHitResponse(DebugModelName, BaseModel):
+    entry: EntryResponse
+    rank: float = Field(description="Relevance of the entry, higher is better")
+    name_highlight: str = Field(examples=["<mark>Mitochondria</mark> in HeLa cells"])
+    description_highlight: str | None = Field(default=None)
+
+
+class SuggestionKind(str, Enum):
+    entry = "entry"
+    volseg_entry = "volseg_entry"
+
+
+class SuggestionResponse(BaseModel):
+    text: str = Field(examples=["emd-1832"])
+    kind: SuggestionKind
@@ -0,0 +1,15 @@
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.api.v1.contracts.responses.common import DebugModelName, Timestamp, Uuid
+from app.database.models.job_model import JobKind, JobStatus
+
+
+class JobResponse(Timestamp, Uuid, DebugModelName, BaseModel):
+    kind: JobKind
+    status: JobStatus
+    result: dict[str, Any] | None = Field(default=None)
+    error: str | None = Field(default=None)
+
+    model_config = ConfigDict(from_attributes=True)
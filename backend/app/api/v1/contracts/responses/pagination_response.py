@@ -4,10 +4,22 @@ from app.api.v1.contracts.responses.common import DebugModelName
 
 
 class PaginatedResponse[T](DebugModelName, BaseModel):
-    page: int = Field(ge=1)
+    page: int | None = Field(
+        default=None,
+        ge=1,
+        description="`None` when the page was requested by cursor.",
+    )
     per_page: int = Field(ge=1, le=100)
     total_pages: int
     total_items: int
+    total_items_exact: bool = Field(
+        default=True,
+        description="`False` when `total_items` is an estimate, a lower bound or a cached count.",
+    )
     items: list[T]
+    next_cursor: str | None = Field(
+        default=None,
+        description="Cursor for the following page, `None` on the last page.",
+    )
 
     # model_config = ConfigDict(from_attributes=True)
@@ -1,8 +1,9 @@
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, computed_field
 
 from app.api.v1.contracts.responses.common import DebugModelName, Timestamp, Uuid
+from app.core.settings import get_settings
 
 
 class ViewResponse(Timestamp, Uuid, DebugModelName, BaseModel):
@@ -13,5 +14,31 @@ class ViewResponse(Timestamp, Uuid, DebugModelName, BaseModel):
     thumbnail_url: str | None = Field(max_length=2083)
     snapshot_url: str = Field(max_length=2083)
     is_thumbnail: bool = Field()
+    job_ids: list[UUID] = Field(
+        default=[], description="Background jobs started by the request, poll them at /jobs"
+    )
+    # Content hashes, only exposed through the versioned URLs below
+    snapshot_etag: str | None = Field(default=None, exclude=True)
+    thumbnail_etag: str | None = Field(default=None, exclude=True)
 
     model_config = ConfigDict(from_attributes=True)
+
+    @computed_field(
+        description="Snapshot URL pinned to its current content, public ones are cached as immutable"
+    )
+    @property
+    def snapshot_content_url(self) -> str | None:
+        return self._content_url("snapshot", self.snapshot_etag)
+
+    @computed_field(
+        description="Thumbnail URL pinned to its current content, public ones are cached as immutable"
+    )
+    @property
+    def thumbnail_content_url(self) -> str | None:
+        return self._content_url("thumbnail", self.thumbnail_etag)
+
+    def _content_url(self, file: str, etag: str | None) -> str | None:
+        if etag is None:
+            return None
+        prefix = get_settings().API_V1_PREFIX
+        return f"{prefix}/entries/{self.entry_id}/views/{self.id}/{file}?v={etag}"
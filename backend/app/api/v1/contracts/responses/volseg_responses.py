@@ -1,3 +1,5 @@
+from uuid import UUID
+
 from pydantic import BaseModel, ConfigDict, Field
 
 from app.api.v1.contracts.responses.common import DebugModelName, Timestamp, Uuid
@@ -7,5 +9,20 @@ class VolsegEntryResponse(Timestamp, Uuid, DebugModelName, BaseModel):
     db_name: str = Field(min_length=1, max_length=255, examples=["emdb"])
     entry_id: str = Field(min_length=1, max_length=255, examples=["emd-1832"])
     is_public: bool = Field()
+    job_ids: list[UUID] = Field(
+        default=[], description="Background jobs started by the request, poll them at /jobs"
+    )
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class VolsegUploadFileResponse(BaseModel):
+    filename: str = Field(examples=["data.zip"])
+    offset: int = Field(ge=0, description="Number of bytes received so far")
+
+
+class VolsegUploadResponse(Timestamp, Uuid, DebugModelName, BaseModel):
+    db_name: str = Field(min_length=1, max_length=255, examples=["emdb"])
+    entry_id: str = Field(min_length=1, max_length=255, examples=["emd-1832"])
+    is_public: bool = Field()
+    files: dict[str, VolsegUploadFileResponse]
@@ -3,11 +3,19 @@ from typing import Annotated
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_optional_user, get_required_user
+from app.core.security import (
+    Principal,
+    get_optional_principal,
+    get_optional_user,
+    get_required_principal,
+    get_required_user,
+)
 from app.database.models.role_model import RoleEnum
 from app.database.models.user_model import User
 from app.database.session_manager import get_async_session
 from app.services.entry_service import EntryService, get_entry_service
+from app.services.job_service import JobService, get_job_service
+from app.services.response_cache import ResponseCache, get_response_cache
 from app.services.share_link_service import ShareLinkService, get_share_link_service
 from app.services.user_service import UserService, get_user_service
 from app.services.view_service import ViewService, get_view_service
@@ -19,7 +27,15 @@ UserServiceDep = Annotated[UserService, Depends(get_user_service)]
 EntryServiceDep = Annotated[EntryService, Depends(get_entry_service)]
 ViewServiceDep = Annotated[ViewService, Depends(get_view_service)]
 VolsegServiceDep = Annotated[VolsegService, Depends(get_volseg_service)]
+JobServiceDep = Annotated[JobService, Depends(get_job_service)]
 
 ShareLinkServiceDep = Annotated[ShareLinkService, Depends(get_share_link_service)]
+ResponseCacheDep = Annotated[ResponseCache, Depends(get_response_cache)]
 RequireUserDep = Annotated[User, Depends(get_required_user(required_role=RoleEnum.user))]
 OptionalUserDep = Annotated[User | None, Depends(get_optional_user(required_role=RoleEnum.user))]
+OptionalPrincipalDep = Annotated[
+    Principal | None, Depends(get_optional_principal(required_role=RoleEnum.user))
+]
+RequirePrincipalDep = Annotated[
+    Principal, Depends(get_required_principal(required_role=RoleEnum.user))
+]
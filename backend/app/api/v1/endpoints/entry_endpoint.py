@@ -1,25 +1,34 @@
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Body, Path, Query, status
+from fastapi import APIRouter, Body, Header, Path, Query, Request, status
 
 from app.api.v1.contracts.requests.entry_requests import (
+    EntryBundleInclude,
     EntryCreateRequest,
+    EntrySearchQueryParams,
     EntryUpdateRequest,
     SearchQueryParams,
 )
 from app.api.v1.contracts.responses.entry_responses import (
+    EntryBundleResponse,
     EntryResponse,
+    EntrySearchHitResponse,
+    SuggestionResponse,
 )
 from app.api.v1.contracts.responses.pagination_response import PaginatedResponse
 from app.api.v1.contracts.responses.share_link_responses import ShareLinkResponse
 from app.api.v1.contracts.responses.view_responses import ViewResponse
 from app.api.v1.deps import (
     EntryServiceDep,
-    OptionalUserDep,
+    OptionalPrincipalDep,
+    RequirePrincipalDep,
     RequireUserDep,
+    ResponseCacheDep,
 )
 from app.api.v1.tags import Tags
+from app.core.settings import get_settings
+from app.services.response_cache import CacheNamespace
 
 router = APIRouter(prefix="/entries", tags=[Tags.entries])
 
@@ -40,19 +49,75 @@ async def create_entry(
     )
 
 
+@router.get(
+    "/search",
+    status_code=status.HTTP_200_OK,
+    response_model=PaginatedResponse[EntrySearchHitResponse],
+)
+async def search_public_entries(
+    search_query: Annotated[EntrySearchQueryParams, Query()],
+    entry_service: EntryServiceDep,
+):
+    return await entry_service.search_public_entries(
+        search_query=search_query,
+    )
+
+
+@router.get(
+    "/suggest",
+    status_code=status.HTTP_200_OK,
+    response_model=list[SuggestionResponse],
+)
+async def suggest_entry_names(
+    q: Annotated[str, Query(min_length=1, max_length=255, description="Typed prefix")],
+    entry_service: EntryServiceDep,
+    limit: Annotated[int, Query(ge=1, le=get_settings().SUGGEST_MAX_LIMIT)] = 10,
+):
+    return await entry_service.suggest(
+        prefix=q,
+        limit=limit,
+    )
+
+
 @router.get(
     "/{entry_id}",
     status_code=status.HTTP_200_OK,
     response_model=EntryResponse,
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {"description": "Matches If-None-Match"},
+    },
 )
 async def get_entry_by_id(
     entry_id: Annotated[UUID, Path(title="Entry ID")],
-    current_user: OptionalUserDep,
+    current_user: OptionalPrincipalDep,
     entry_service: EntryServiceDep,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     return await entry_service.get_entry(
         entry_id=entry_id,
         user=current_user,
+        if_none_match=if_none_match,
+    )
+
+
+@router.get(
+    "/{entry_id}/bundle",
+    status_code=status.HTTP_200_OK,
+    response_model=EntryBundleResponse,
+)
+async def get_entry_bundle(
+    entry_id: Annotated[UUID, Path(title="Entry ID")],
+    current_user: OptionalPrincipalDep,
+    entry_service: EntryServiceDep,
+    include: Annotated[
+        list[EntryBundleInclude],
+        Query(description="Related resources to return along with the entry"),
+    ] = [],
+):
+    return await entry_service.get_entry_bundle(
+        entry_id=entry_id,
+        user=current_user,
+        include=set(include),
     )
 
 
@@ -62,11 +127,19 @@ async def get_entry_by_id(
     response_model=EntryResponse,
 )
 async def get_entry_by_share_link(
+    request: Request,
     share_link_id: Annotated[UUID, Path(title="Share Link")],
     entry_service: EntryServiceDep,
+    cache: ResponseCacheDep,
 ):
-    return await entry_service.get_entry_by_share_link(
-        share_link_id=share_link_id,
+    return await cache.get_or_compute(
+        request=request,
+        namespaces=[CacheNamespace.entries, CacheNamespace.share_links],
+        ttl=get_settings().RESPONSE_CACHE_TTL_SECONDS["share_link_entry"],
+        response_model=EntryResponse,
+        compute=lambda: entry_service.get_entry_by_share_link(
+            share_link_id=share_link_id,
+        ),
     )
 
 
@@ -77,7 +150,7 @@ async def get_entry_by_share_link(
 )
 async def get_entry_share_link(
     entry_id: Annotated[UUID, Path(title="Entry ID")],
-    current_user: RequireUserDep,
+    current_user: RequirePrincipalDep,
     entry_service: EntryServiceDep,
 ):
     return await entry_service.get_entry_share_link(
@@ -93,7 +166,7 @@ async def get_entry_share_link(
 )
 async def get_entry_thumbnail_view(
     entry_id: Annotated[UUID, Path(title="Entry ID")],
-    current_user: RequireUserDep,
+    current_user: RequirePrincipalDep,
     entry_service: EntryServiceDep,
 ):
     return await entry_service.get_entry_thumbnail_view(
@@ -108,11 +181,19 @@ async def get_entry_thumbnail_view(
     response_model=PaginatedResponse[EntryResponse],
 )
 async def list_public_entries(
+    request: Request,
     search_query: Annotated[SearchQueryParams, Query()],
     entry_service: EntryServiceDep,
+    cache: ResponseCacheDep,
 ):
-    return await entry_service.list_public_entries(
-        search_query=search_query,
+    return await cache.get_or_compute(
+        request=request,
+        namespaces=[CacheNamespace.entries],
+        ttl=get_settings().RESPONSE_CACHE_TTL_SECONDS["public_entries"],
+        response_model=PaginatedResponse[EntryResponse],
+        compute=lambda: entry_service.list_public_entries(
+            search_query=search_query,
+        ),
     )
 
 
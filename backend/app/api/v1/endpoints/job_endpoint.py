@@ -0,0 +1,26 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Path, status
+
+from app.api.v1.contracts.responses.job_responses import JobResponse
+from app.api.v1.deps import JobServiceDep, RequireUserDep
+from app.api.v1.tags import Tags
+
+router = APIRouter(prefix="/jobs", tags=[Tags.jobs])
+
+
+@router.get(
+    "/{job_id}",
+    status_code=status.HTTP_200_OK,
+    response_model=JobResponse,
+)
+async def get_job(
+    job_id: Annotated[UUID, Path(title="Job ID")],
+    current_user: RequireUserDep,
+    service: JobServiceDep,
+):
+    return await service.get_job(
+        job_id=job_id,
+        user=current_user,
+    )
@@ -5,8 +5,7 @@ from fastapi import APIRouter, File, UploadFile
 from pydantic import BaseModel
 
 from app.api.v1.tags import Tags
-from app.core.settings import get_settings
-from app.services.files.minio_storage import MinioStorage
+from app.services.files.minio_storage import get_minio_storage
 
 router = APIRouter(prefix="/test", tags=[Tags.test])
 
@@ -21,14 +20,7 @@ class UploadFileRequest(BaseModel):
 async def upload_file(
     request: Annotated[UploadFileRequest, File()],
 ):
-    settings = get_settings()
-    storage = MinioStorage(
-        endpoint=settings.MINIO_ENDPOINT,
-        bucket=settings.MINIO_BUCKET,
-        access_key=settings.MINIO_ACCESS_KEY,
-        secret_key=settings.MINIO_SECRET_KEY,
-        secure=settings.MINIO_SECURE,
-    )
+    storage = get_minio_storage()
 
     await storage.save(
         f"somewhere/{uuid4()}",
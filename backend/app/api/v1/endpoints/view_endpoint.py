@@ -1,19 +1,23 @@
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Body, File, Path, Response
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Body, File, Header, Path, Query, Request
+from fastapi.responses import StreamingResponse
 from starlette import status
 
 from app.api.v1.contracts.requests.view_requests import ViewCreateRequest, ViewUpdateRequest
 from app.api.v1.contracts.responses.view_responses import ViewResponse
 from app.api.v1.deps import (
     DbSessionDep,
+    OptionalPrincipalDep,
     OptionalUserDep,
     RequireUserDep,
+    ResponseCacheDep,
     ViewServiceDep,
 )
 from app.api.v1.tags import Tags
+from app.core.settings import get_settings
+from app.services.response_cache import CacheNamespace
 
 router = APIRouter(prefix="/entries/{entry_id}/views", tags=[Tags.views])
 
@@ -40,53 +44,91 @@ async def create_view(
     "/{view_id}",
     status_code=status.HTTP_200_OK,
     response_model=ViewResponse,
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {"description": "Matches If-None-Match"},
+    },
 )
 async def get_view_by_id(
     entry_id: Annotated[UUID, Path(title="Entry ID")],
     view_id: Annotated[UUID, Path(title="View ID")],
     view_service: ViewServiceDep,
     session: DbSessionDep,
-    current_user: OptionalUserDep,
+    current_user: OptionalPrincipalDep,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     return await view_service.get_view(
         user=current_user,
         view_id=view_id,
+        if_none_match=if_none_match,
     )
 
 
 @router.get(
     "/{view_id}/snapshot",
     status_code=status.HTTP_200_OK,
-    response_class=JSONResponse,
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {"content": {"application/json": {}}},
+        status.HTTP_304_NOT_MODIFIED: {"description": "Matches If-None-Match"},
+        status.HTTP_307_TEMPORARY_REDIRECT: {"description": "Presigned storage URL"},
+    },
 )
 async def get_view_snapshot(
     entry_id: Annotated[UUID, Path(title="Entry ID")],
     view_id: Annotated[UUID, Path(title="View ID")],
-    current_user: OptionalUserDep,
+    current_user: OptionalPrincipalDep,
     view_service: ViewServiceDep,
+    v: Annotated[
+        str | None,
+        Query(max_length=255, description="Content hash from `snapshot_content_url`"),
+    ] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+    accept_encoding: Annotated[str | None, Header()] = None,
 ):
     return await view_service.get_view_snapshot(
         user=current_user,
         entry_id=entry_id,
         view_id=view_id,
+        if_none_match=if_none_match,
+        accept_encoding=accept_encoding,
+        version=v,
     )
 
 
 @router.get(
     "/{view_id}/thumbnail",
     status_code=status.HTTP_200_OK,
-    response_class=Response,
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {"content": {"image/png": {}, "image/webp": {}}},
+        status.HTTP_304_NOT_MODIFIED: {"description": "Matches If-None-Match"},
+        status.HTTP_307_TEMPORARY_REDIRECT: {"description": "Presigned storage URL"},
+    },
 )
 async def get_view_thumbnail_image(
     entry_id: Annotated[UUID, Path(title="Entry ID")],
     view_id: Annotated[UUID, Path(title="View ID")],
-    current_user: OptionalUserDep,
+    current_user: OptionalPrincipalDep,
     view_service: ViewServiceDep,
+    w: Annotated[
+        int | None,
+        Query(ge=1, le=4096, description="Resize to this width, WebP if the client accepts it"),
+    ] = None,
+    v: Annotated[
+        str | None,
+        Query(max_length=255, description="Content hash from `thumbnail_content_url`"),
+    ] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+    accept: Annotated[str | None, Header()] = None,
 ):
     return await view_service.get_view_thumbnail(
         user=current_user,
         entry_id=entry_id,
         view_id=view_id,
+        if_none_match=if_none_match,
+        width=w,
+        accept=accept,
+        version=v,
     )
 
 
@@ -96,13 +138,22 @@ async def get_view_thumbnail_image(
     response_model=list[ViewResponse],
 )
 async def list_views_for_entry(
+    request: Request,
     entry_id: Annotated[UUID, Path(title="Entry ID")],
     view_service: ViewServiceDep,
-    current_user: OptionalUserDep,
+    current_user: OptionalPrincipalDep,
+    cache: ResponseCacheDep,
 ):
-    return await view_service.list_views_for_entry(
-        user=current_user,
-        entry_id=entry_id,
+    return await cache.get_or_compute(
+        request=request,
+        namespaces=[CacheNamespace.entries, CacheNamespace.views],
+        ttl=get_settings().RESPONSE_CACHE_TTL_SECONDS["entry_views"],
+        response_model=list[ViewResponse],
+        compute=lambda: view_service.list_views_for_entry(
+            user=current_user,
+            entry_id=entry_id,
+        ),
+        user_id=current_user.id if current_user else None,
     )
 
 
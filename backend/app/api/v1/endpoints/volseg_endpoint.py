@@ -1,12 +1,23 @@
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, File, Path, status
+from fastapi import APIRouter, Body, File, Header, HTTPException, Path, Query, Request, status
+from fastapi.responses import FileResponse
 
-from app.api.v1.contracts.requests.volseg_requests import VolsegUploadEntry
-from app.api.v1.contracts.responses.volseg_responses import VolsegEntryResponse
-from app.api.v1.deps import OptionalUserDep, RequireUserDep, VolsegServiceDep
+from app.api.v1.contracts.requests.volseg_requests import (
+    FILENAME_PATTERN,
+    VolsegUploadCreateRequest,
+    VolsegUploadEntry,
+    VolsegUploadFile,
+)
+from app.api.v1.contracts.responses.volseg_responses import (
+    VolsegEntryResponse,
+    VolsegUploadResponse,
+)
+from app.api.v1.deps import OptionalUserDep, RequireUserDep, ResponseCacheDep, VolsegServiceDep
 from app.api.v1.tags import Tags
+from app.core.settings import get_settings
+from app.services.response_cache import CacheNamespace
 
 router = APIRouter(prefix="/volseg", tags=[Tags.volseg])
 
@@ -27,19 +38,122 @@ async def upload_entry(
     )
 
 
+@router.post(
+    "/uploads",
+    status_code=status.HTTP_201_CREATED,
+    response_model=VolsegUploadResponse,
+)
+async def create_upload(
+    request: Annotated[VolsegUploadCreateRequest, Body()],
+    current_user: RequireUserDep,
+    volseg_service: VolsegServiceDep,
+):
+    return await volseg_service.create_upload(
+        user=current_user,
+        request=request,
+    )
+
+
+@router.get(
+    "/uploads/{upload_id}",
+    status_code=status.HTTP_200_OK,
+    response_model=VolsegUploadResponse,
+)
+async def get_upload(
+    upload_id: Annotated[UUID, Path(title="Upload ID")],
+    current_user: RequireUserDep,
+    volseg_service: VolsegServiceDep,
+):
+    return await volseg_service.get_upload(
+        user=current_user,
+        upload_id=upload_id,
+    )
+
+
+@router.put(
+    "/uploads/{upload_id}/{file}",
+    status_code=status.HTTP_200_OK,
+    response_model=VolsegUploadResponse,
+    responses={
+        status.HTTP_409_CONFLICT: {"description": "Offset is not the file's current offset"},
+    },
+)
+async def upload_chunk(
+    upload_id: Annotated[UUID, Path(title="Upload ID")],
+    file: Annotated[VolsegUploadFile, Path(title="Uploaded file")],
+    offset: Annotated[
+        int, Query(ge=0, description="Byte offset of the chunk, the bytes received so far")
+    ],
+    checksum: Annotated[str, Header(alias="X-Chunk-SHA256", description="SHA-256 of the chunk")],
+    request: Request,
+    current_user: RequireUserDep,
+    volseg_service: VolsegServiceDep,
+):
+    return await volseg_service.upload_chunk(
+        user=current_user,
+        upload_id=upload_id,
+        file=file,
+        offset=offset,
+        chunk=await _read_chunk(request),
+        checksum=checksum,
+    )
+
+
+@router.post(
+    "/uploads/{upload_id}/finalize",
+    status_code=status.HTTP_201_CREATED,
+    response_model=VolsegEntryResponse,
+)
+async def finalize_upload(
+    upload_id: Annotated[UUID, Path(title="Upload ID")],
+    current_user: RequireUserDep,
+    volseg_service: VolsegServiceDep,
+):
+    return await volseg_service.finalize_upload(
+        user=current_user,
+        upload_id=upload_id,
+    )
+
+
 @router.get(
     "/{volseg_entry_id}",
     status_code=status.HTTP_200_OK,
     response_model=VolsegEntryResponse,
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {"description": "Matches If-None-Match"},
+    },
 )
 async def get_entry_by_id(
     volseg_entry_id: Annotated[UUID, Path(title="Volseg Entry ID")],
     current_user: OptionalUserDep,
     volseg_service: VolsegServiceDep,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     return await volseg_service.get_entry_by_id(
         user=current_user,
         volseg_entry_id=volseg_entry_id,
+        if_none_match=if_none_match,
+    )
+
+
+@router.get(
+    "/{volseg_entry_id}/files/{filename}",
+    status_code=status.HTTP_200_OK,
+    response_class=FileResponse,
+    responses={
+        status.HTTP_206_PARTIAL_CONTENT: {"description": "Byte range requested with Range"},
+    },
+)
+async def get_entry_file(
+    volseg_entry_id: Annotated[UUID, Path(title="Volseg Entry ID")],
+    filename: Annotated[str, Path(max_length=255, pattern=FILENAME_PATTERN)],
+    current_user: OptionalUserDep,
+    volseg_service: VolsegServiceDep,
+):
+    return await volseg_service.get_entry_file(
+        user=current_user,
+        volseg_entry_id=volseg_entry_id,
+        filename=filename,
     )
 
 
@@ -49,9 +163,17 @@ async def get_entry_by_id(
     response_model=list[VolsegEntryResponse],
 )
 async def list_public_entries(
+    request: Request,
     volseg_service: VolsegServiceDep,
+    cache: ResponseCacheDep,
 ):
-    return await volseg_service.list_public_entries()
+    return await cache.get_or_compute(
+        request=request,
+        namespaces=[CacheNamespace.volseg],
+        ttl=get_settings().RESPONSE_CACHE_TTL_SECONDS["public_volseg_entries"],
+        response_model=list[VolsegEntryResponse],
+        compute=volseg_service.list_public_entries,
+    )
 
 
 @router.delete(
@@ -68,3 +190,16 @@ async def delete_view(
         user=current_user,
         volseg_entry_id=volseg_entry_id,
     )
+
+
+async def _read_chunk(request: Request) -> bytes:
+    max_chunk_size = get_settings().VOLSEG_UPLOAD_MAX_CHUNK_SIZE
+    chunk = bytearray()
+    async for data in request.stream():
+        chunk.extend(data)
+        if len(chunk) > max_chunk_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Chunks can be at most {max_chunk_size} bytes",
+            )
+    return bytes(chunk)
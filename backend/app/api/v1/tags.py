@@ -9,6 +9,7 @@ class Tags(Enum):
     test = "Test"
     volseg = "Volseg Entries"
     me = "Me"
+    jobs = "Jobs"
 
     def __str__(self):
         return super().value.lower()
@@ -1,3 +1,5 @@
+import time
+from collections import OrderedDict
 from datetime import timedelta
 from functools import lru_cache
 from typing import Any, Literal
@@ -7,12 +9,16 @@ from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2AuthorizationCodeBearer
 from jwt import DecodeError, ExpiredSignatureError, MissingRequiredClaimError, decode, encode
 from pydantic import BaseModel
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, make_transient_to_detached
 
 from app.core.settings import get_settings
+from app.database.models.base_model import Base
 from app.database.models.mixins.timestamp_mixin import utcnow
-from app.database.models.role_model import RoleEnum
+from app.database.models.role_model import Role, RoleEnum
 from app.database.models.user_model import User
-from app.database.session_manager import get_session_manager
+from app.database.session_manager import get_async_session
 
 
 @lru_cache
@@ -32,9 +38,40 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     sub: UUID
+    role: RoleEnum | None = None
     scopes: list[str] = []
 
 
+class Principal:
+    """Authenticated user as described by the token, without touching the database.
+
+    Exposes the same `id` the permission checks compare against. The full `User`
+    row is loaded on first call to `get_user`.
+    """
+
+    def __init__(self, id: UUID, role: RoleEnum, session: AsyncSession):
+        self.id = id
+        self.role = role
+        self._session = session
+        self._user: User | None = None
+
+    @classmethod
+    def from_user(cls, user: User, session: AsyncSession) -> "Principal":
+        principal = cls(id=user.id, role=RoleEnum(user.role.name), session=session)
+        principal._user = user
+        return principal
+
+    async def get_user(self) -> User:
+        if self._user is None:
+            self._user = await load_user(self._session, str(self.id))
+            if self._user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found",
+                )
+        return self._user
+
+
 oauth2_scheme = OAuth2AuthorizationCodeBearer(
     authorizationUrl=f"{get_settings().API_V1_PREFIX}/token",
     tokenUrl=f"{get_settings().API_V1_PREFIX}/token",
@@ -70,38 +107,99 @@ def decode_token(token: str) -> dict[str, Any]:
 
 @lru_cache
 def get_regular_user_token():
-    return create_access_token({"sub": get_regular_user_id()}, expires_delta=timedelta(hours=10))
+    return create_access_token(
+        {"sub": get_regular_user_id(), "role": RoleEnum.user.value},
+        expires_delta=timedelta(hours=10),
+    )
 
 
 @lru_cache
 def get_admin_user_token():
-    return create_access_token({"sub": get_admin_user_id()}, expires_delta=timedelta(hours=10))
+    return create_access_token(
+        {"sub": get_admin_user_id(), "role": RoleEnum.admin.value},
+        expires_delta=timedelta(hours=10),
+    )
 
 
 def get_token_from_request(request: Request) -> str | None:
     return request.cookies.get(get_settings().ACCESS_TOKEN_COOKIE)
 
 
+USER_CACHE_SIZE = 10_000
+
+# user id -> (user's column values, role's column values, expiry), least recently used first
+_user_cache: OrderedDict[str, tuple[dict[str, Any], dict[str, Any], float]] = OrderedDict()
+
+
+async def load_user(session: AsyncSession, user_id: str) -> User | None:
+    """Load the user and their role with the request's session.
+
+    With AUTH_USER_CACHE_TTL_SECONDS set, the user's and role's column values are
+    cached per worker for that long. Each session gets its own instances built
+    from them, without querying the database.
+    """
+    ttl = get_settings().AUTH_USER_CACHE_TTL_SECONDS
+    now = time.monotonic()
+
+    cached = _user_cache.get(user_id)
+    if cached is not None and cached[2] > now:
+        _user_cache.move_to_end(user_id)
+        role = Role(**cached[1])
+        user = User(**cached[0], role=role)
+        # Look loaded from the database, so they merge without a query
+        make_transient_to_detached(role)
+        make_transient_to_detached(user)
+        return await session.merge(user, load=False)
+
+    result = await session.execute(
+        select(User).where(User.id == user_id).options(joinedload(User.role)),
+    )
+    user: User | None = result.scalar_one_or_none()
+
+    if ttl > 0 and user is not None:
+        _user_cache[user_id] = (_column_values(user), _column_values(user.role), now + ttl)
+        _user_cache.move_to_end(user_id)
+        while len(_user_cache) > USER_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+    else:
+        _user_cache.pop(user_id, None)
+
+    return user
+
+
+def forget_user(user_id: str) -> None:
+    """Drop the cached user, call after changing the user or their role."""
+    _user_cache.pop(user_id, None)
+
+
+def _column_values(instance: Base) -> dict[str, Any]:
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(instance).mapper.column_attrs}
+
+
+def has_role(role: RoleEnum, required_role: RoleEnum) -> bool:
+    """Whether a user with the role may act as the required one, admins may act as anyone."""
+    return role == required_role or role == RoleEnum.admin
+
+
 def get_required_user(
     required_role: RoleEnum | None = None,
 ) -> User:
     async def _get_current_user(
         user_id: str | None = Depends(get_current_user_id(required_role)),
+        session: AsyncSession = Depends(get_async_session),
     ) -> User:
         if not user_id:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Not authenticated",
             )
-        async with get_session_manager().session() as session:
-            user: User | None = await session.get(User, user_id)
-            await session.refresh(user, ["role"])
-            if user is None:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="User not found",
-                )
-            return user
+        user: User | None = await load_user(session, user_id)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found",
+            )
+        return user
 
     return _get_current_user
 
@@ -109,45 +207,93 @@ def get_required_user(
 def get_optional_user(required_role: RoleEnum | None = None) -> User | None:
     async def _get_optional_user(
         user_id: str | None = Depends(get_current_user_id(required_role)),
+        session: AsyncSession = Depends(get_async_session),
     ) -> User:
         if not user_id:
             return None
-        async with get_session_manager().session() as session:
-            user: User | None = await session.get(User, user_id)
-            await session.refresh(user, ["role"])
-            return user
+        return await load_user(session, user_id)
 
     return _get_optional_user
 
 
 def get_current_user_id(required_role: RoleEnum | None = None) -> str | None:
-    async def _get_user(request: Request):
-        token = get_token_from_request(request)
+    async def _get_user(
+        payload: dict[str, Any] | None = Depends(get_token_payload),
+    ):
+        if payload is None:
+            return None
 
-        if token is None:
+        user_id = payload["sub"]
+        return user_id
+
+    return _get_user
+
+
+def get_optional_principal(required_role: RoleEnum | None = None) -> Principal | None:
+    async def _get_optional_principal(
+        payload: dict[str, Any] | None = Depends(get_token_payload),
+        session: AsyncSession = Depends(get_async_session),
+    ) -> Principal | None:
+        if payload is None:
             return None
-        try:
-            payload = decode_token(token)
-        except ExpiredSignatureError:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Your token has expired. Please log in again.",
+
+        # Trust the role claim, the user row is only loaded if a handler asks for it
+        if get_settings().JWT_TRUST_ROLE_CLAIM and "role" in payload:
+            return Principal(
+                id=UUID(payload["sub"]),
+                role=RoleEnum(payload["role"]),
+                session=session,
             )
-        except DecodeError:
+
+        user: User | None = await load_user(session, payload["sub"])
+        if user is None:
+            return None
+        return Principal.from_user(user, session)
+
+    return _get_optional_principal
+
+
+def get_required_principal(required_role: RoleEnum | None = None) -> Principal:
+    async def _get_required_principal(
+        principal: Principal | None = Depends(get_optional_principal(required_role)),
+    ) -> Principal:
+        if principal is None:
             raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Error when decoding the token. Please check your request.",
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
             )
-        except MissingRequiredClaimError:
+        if required_role is not None and not has_role(principal.role, required_role):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail="There is no required field in your token. Please contact the administrator.",
+                detail="Insufficient permissions",
             )
-
-        user_id = payload["sub"]
-        return user_id
-
-    return _get_user
+        return principal
+
+    return _get_required_principal
+
+
+async def get_token_payload(request: Request) -> dict[str, Any] | None:
+    token = get_token_from_request(request)
+
+    if token is None:
+        return None
+    try:
+        return decode_token(token)
+    except ExpiredSignatureError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Your token has expired. Please log in again.",
+        )
+    except DecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Error when decoding the token. Please check your request.",
+        )
+    except MissingRequiredClaimError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="There is no required field in your token. Please contact the administrator.",
+        )
 
 
 def check_user_roles(allowed_roles: list[RoleEnum]):
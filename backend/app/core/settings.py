@@ -51,6 +51,11 @@ class Settings(BaseSettings):
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY")
     ACCESS_TOKEN_COOKIE: str = "access_token"
+    # Build the principal from the token's role claim instead of loading the user. Off by
+    # default: a claim outlives role changes until the token expires, the database doesn't
+    JWT_TRUST_ROLE_CLAIM: bool = False
+    # Cache authenticated users in-process for this long, 0 disables the cache
+    AUTH_USER_CACHE_TTL_SECONDS: int = 0
 
     # MINIO
     MINIO_HOST: str = os.getenv("MINIO_HOST")
@@ -60,6 +65,20 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str = os.getenv("MINIO_SECRET_KEY")
     MINIO_BUCKET: str = os.getenv("MINIO_BUCKET")
     MINIO_SECURE: bool = os.getenv("MINIO_SECURE")
+    MINIO_MAX_WORKERS: int = 16
+    MINIO_STREAM_CHUNK_SIZE: int = 1024 * 1024
+    # Objects saved to MinIO, volseg entry files are written to the local volume instead
+    MINIO_MULTIPART_PART_SIZE: int = 16 * 1024 * 1024
+    MINIO_MULTIPART_CONCURRENCY: int = 4
+    # Multi-object delete requests of 1000 keys in flight at once
+    MINIO_DELETE_CONCURRENCY: int = 4
+    MINIO_REGION: str = "us-east-1"
+    # Host the browser uses to reach MinIO; presigned URLs are signed for it
+    MINIO_PUBLIC_ENDPOINT: str | None = os.getenv("MINIO_PUBLIC_ENDPOINT")
+    MINIO_PUBLIC_SECURE: bool = os.getenv("MINIO_PUBLIC_SECURE", False)
+    MINIO_PRESIGNED_URL_EXPIRE_SECONDS: int = 15 * 60
+    # Answer view snapshot/thumbnail requests with a redirect to a presigned URL
+    MINIO_PRESIGNED_REDIRECTS: bool = False
 
     # POSTGRES
     POSTGRES_DIALECT: str = "postgresql"
@@ -70,9 +89,80 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = os.getenv("POSTGRES_DB")
     POSTGRES_URL: str = f"{POSTGRES_DIALECT}+{POSTGRES_DBAPI}://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}/{POSTGRES_DB}"
 
+    # PAGINATION
+    # one of: exact, estimate (query planner), capped, cached
+    PAGINATION_COUNT_STRATEGY: str = "capped"
+    PAGINATION_COUNT_CAP: int = 1000
+    PAGINATION_COUNT_CACHE_TTL_SECONDS: int = 60
+
+    # RESPONSE CACHE
+    # Without a Redis URL responses are cached in-process
+    REDIS_URL: str | None = os.getenv("REDIS_URL")
+    # Per-route TTLs of cached anonymous responses, 0 disables caching for the route
+    RESPONSE_CACHE_TTL_SECONDS: dict[str, int] = {
+        "public_entries": 30,
+        "share_link_entry": 60,
+        "public_volseg_entries": 60,
+        "entry_views": 30,
+    }
+    # Caps the TTLs without Redis. Invalidations only reach the process that made the
+    # write, so other workers may serve a stale response for up to this long
+    RESPONSE_CACHE_LOCAL_TTL_SECONDS: int = 5
+
+    # BACKGROUND TASKS
+    # Defaults to REDIS_URL, without either tasks run eagerly in the request
+    CELERY_BROKER_URL: str | None = os.getenv("CELERY_BROKER_URL")
+    CELERY_TASK_ALWAYS_EAGER: bool = False
+
+    # STORAGE GARBAGE COLLECTION
+    STORAGE_GC_BATCH_SIZE: int = 1000
+    STORAGE_GC_SWEEP_INTERVAL_SECONDS: int = 5 * 60
+    STORAGE_GC_RECONCILE_INTERVAL_SECONDS: int = 24 * 60 * 60
+    # Objects younger than this are never reconciled, their database rows may not be committed yet
+    STORAGE_GC_GRACE_PERIOD_SECONDS: int = 60 * 60
+
+    # HTTP CACHING
+    # How long browsers and proxies may reuse responses of public entries without revalidating
+    HTTP_CACHE_PUBLIC_MAX_AGE_SECONDS: int = 60
+
+    # SUGGESTIONS
+    SUGGEST_INDEX_REFRESH_SECONDS: int = 5 * 60
+    SUGGEST_MAX_LIMIT: int = 20
+
+    # SNAPSHOTS
+    # Encoding snapshots are stored with, one of: gzip, none
+    SNAPSHOT_COMPRESSION: str = "gzip"
+    SNAPSHOT_COMPRESSION_LEVEL: int = 6
+    # Snapshots still raw this long after upload are compressed by the periodic retry
+    SNAPSHOT_COMPRESSION_RETRY_AFTER_SECONDS: int = 60 * 60
+    SNAPSHOT_COMPRESSION_RETRY_INTERVAL_SECONDS: int = 60 * 60
+    SNAPSHOT_COMPRESSION_RETRY_BATCH_SIZE: int = 100
+
+    # THUMBNAILS
+    # Widths resized thumbnails are rendered at, requested widths are rounded up to one of them
+    THUMBNAIL_WIDTHS: list[int] = [128, 256, 512]
+    THUMBNAIL_WEBP_QUALITY: int = 80
+
+    # STORAGE CACHE
+    # Local directory, ideally on an SSD, that objects read from MinIO are cached in, unset disables
+    STORAGE_CACHE_PATH: str | None = os.getenv("STORAGE_CACHE_PATH")
+    STORAGE_CACHE_MAX_BYTES: int = 10 * 1024 * 1024 * 1024
+
+    # OBJECT CACHE
+    # Per-process memory cache of small stored objects, like snapshots and thumbnails
+    OBJECT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    OBJECT_CACHE_MAX_ITEM_BYTES: int = 4 * 1024 * 1024
+    OBJECT_CACHE_TTL_SECONDS: int = 10 * 60
+
     # LOCAL STORAGE
     FILE_STORAGE_BASE_PATH: str = "./temp"
 
+    # VOLSEG UPLOADS
+    VOLSEG_UPLOAD_MAX_CHUNK_SIZE: int = 64 * 1024 * 1024
+    # Uploads that receive no chunk for this long are deleted with their files
+    VOLSEG_UPLOAD_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    VOLSEG_UPLOAD_EXPIRE_INTERVAL_SECONDS: int = 60 * 60
+
     model_config = SettingsConfigDict(
         env_file=".env.example",
         env_file_encoding="utf-8",
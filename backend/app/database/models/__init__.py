@@ -1,4 +1,9 @@
+from .blob_model import Blob
 from .entry_model import Entry
+from .job_model import Job
 from .share_link_model import ShareLink
+from .storage_deletion_model import StorageDeletion
 from .user_model import User
 from .view_model import View
+from .volseg_entry_model import VolsegEntry
+from .volseg_upload_model import VolsegUpload
@@ -0,0 +1,17 @@
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.models.base_model import Base
+from app.database.models.mixins import TimestampMixin
+
+
+class Blob(Base, TimestampMixin):
+    """Content-addressed object in storage, shared by every view that uploaded the same bytes."""
+
+    __tablename__ = "blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    size: Mapped[int] = mapped_column(BigInteger)
+    ref_count: Mapped[int] = mapped_column(default=0)
+    # Encoding of the stored object, the hash is always of the decoded content
+    content_encoding: Mapped[str | None] = mapped_column(String(32), default=None)
@@ -1,19 +1,40 @@
 from uuid import UUID
 
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import Computed, ForeignKey, Index, String
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database.models.base_model import Base
 from app.database.models.mixins import TimestampMixin, UuidMixin
 
+# Text search configuration of the entries' search vector
+SEARCH_CONFIG = "english"
+
 
 class Entry(Base, UuidMixin, TimestampMixin):
     __tablename__ = "entries"
+    __table_args__ = (
+        # keyset pagination over (created_at, id) for public and per-user listings
+        Index("ix_entries_is_public_created_at_id", "is_public", "created_at", "id"),
+        Index("ix_entries_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_entries_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     name: Mapped[str] = mapped_column(String(255))
     description: Mapped[str | None] = mapped_column(default=None)
     is_public: Mapped[bool] = mapped_column(default=False)
 
+    # Maintained by Postgres on every write, names rank above descriptions
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
     user_id: Mapped[UUID] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
 
     user: Mapped["User"] = relationship(  # type: ignore
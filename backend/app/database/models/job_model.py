@@ -0,0 +1,38 @@
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import JSON, ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.models.base_model import Base
+from app.database.models.mixins import TimestampMixin, UuidMixin
+
+
+class JobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class JobKind(str, Enum):
+    thumbnail_variants = "thumbnail_variants"
+    snapshot_compression = "snapshot_compression"
+    volseg_validation = "volseg_validation"
+    storage_cleanup = "storage_cleanup"
+
+
+class Job(Base, UuidMixin, TimestampMixin):
+    """Background work started by a request, polled by the client until it finishes."""
+
+    __tablename__ = "jobs"
+
+    kind: Mapped[JobKind] = mapped_column(String(64))
+    status: Mapped[JobStatus] = mapped_column(String(32), default=JobStatus.pending)
+    result: Mapped[dict[str, Any] | None] = mapped_column(JSON, default=None)
+    error: Mapped[str | None] = mapped_column(default=None)
+
+    user_id: Mapped[UUID | None] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), default=None
+    )
@@ -0,0 +1,21 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.models.base_model import Base
+from app.database.models.mixins import TimestampMixin, UuidMixin
+
+
+class StorageDeletion(Base, UuidMixin, TimestampMixin):
+    """Stored object waiting to be deleted, written in the transaction that drops its last user.
+
+    The sweeper removes the object and then the row, so a failed delete is retried on the
+    next sweep rather than leaking the object.
+    """
+
+    __tablename__ = "storage_deletions"
+
+    file_path: Mapped[str] = mapped_column(String(2083))
+    # Delete everything under `file_path` instead of a single object
+    is_prefix: Mapped[bool] = mapped_column(default=False)
+    # On the local volume of the volseg files instead of in the bucket
+    is_local: Mapped[bool] = mapped_column(default=False)
@@ -14,6 +14,11 @@ class View(Base, UuidMixin, TimestampMixin):
     description: Mapped[str | None] = mapped_column(default=None)
     snapshot_url: Mapped[str | None] = mapped_column(String(2083), default=None)
     thumbnail_url: Mapped[str | None] = mapped_column(String(2083), default=None)
+    # ETags reported by the storage, used as validators without touching the storage
+    snapshot_etag: Mapped[str | None] = mapped_column(String(255), default=None)
+    thumbnail_etag: Mapped[str | None] = mapped_column(String(255), default=None)
+    # Encoding the snapshot is stored with, served as-is to clients that accept it
+    snapshot_content_encoding: Mapped[str | None] = mapped_column(String(32), default=None)
     is_thumbnail: Mapped[bool] = mapped_column(default=False)
 
     entry_id: Mapped[UUID] = mapped_column(ForeignKey("entries.id", ondelete="CASCADE"))
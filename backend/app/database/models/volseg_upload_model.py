@@ -0,0 +1,25 @@
+from uuid import UUID
+
+from sqlalchemy import ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.database.models.base_model import Base
+from app.database.models.mixins import TimestampMixin, UuidMixin
+
+
+class VolsegUpload(Base, UuidMixin, TimestampMixin):
+    """In-progress resumable upload of a volseg entry."""
+
+    __tablename__ = "volseg_uploads"
+
+    db_name: Mapped[str] = mapped_column(String(255))
+    entry_id: Mapped[str] = mapped_column(String(255))
+    is_public: Mapped[bool] = mapped_column(default=False)
+
+    annotations_filename: Mapped[str] = mapped_column(String(255))
+    metadata_filename: Mapped[str] = mapped_column(String(255))
+    data_filename: Mapped[str] = mapped_column(String(255))
+
+    user_id: Mapped[UUID] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+
+    user: Mapped["User"] = relationship()  # type: ignore
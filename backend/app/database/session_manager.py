@@ -18,10 +18,12 @@ class DatabaseSessionManager:
     def __init__(self, host: str, engine_kwargs: dict[str, Any] = {}):
         self.engine: AsyncEngine | None = create_async_engine(
             host,
-            poolclass=NullPool
-            if get_settings().MODE == ModeEnum.testing
-            else AsyncAdaptedQueuePool,
-            **engine_kwargs,
+            **{
+                "poolclass": NullPool
+                if get_settings().MODE == ModeEnum.testing
+                else AsyncAdaptedQueuePool,
+                **engine_kwargs,
+            },
         )
         self._session_factory = async_sessionmaker(
             bind=self.engine,
@@ -68,6 +70,14 @@ def get_session_manager():
     )
 
 
+@lru_cache
+def get_worker_session_manager():
+    # Every task runs in its own event loop, pooled connections can't be shared between them
+    return DatabaseSessionManager(
+        get_settings().POSTGRES_URL, {"echo": False, "poolclass": NullPool}
+    )
+
+
 async def get_async_session():
     async with get_session_manager().session() as session:
         yield session
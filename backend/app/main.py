@@ -8,6 +8,7 @@ from app.api.v1.api import v1_api_router
 from app.api.v1.tags import v1_api_tags_metadata
 from app.core.settings import get_settings
 from app.database.session_manager import get_session_manager
+from app.services.response_cache import get_response_cache
 
 
 # for SDK
@@ -22,6 +23,7 @@ async def lifespan(app: FastAPI):
     # shutdown
     if get_session_manager().engine is not None:
         await get_session_manager().close()
+    await get_response_cache().close()
 
 
 app = FastAPI(
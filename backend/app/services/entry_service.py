@@ -1,32 +1,65 @@
 from uuid import UUID
 
-from fastapi import Depends, HTTPException, status
-from sqlalchemy import func, or_, select
+from fastapi import Depends, HTTPException, Response, status
+from sqlalchemy import Select, func, or_, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.interfaces import ORMOption
 
 from app.api.v1.contracts.requests.entry_requests import (
+    EntryBundleInclude,
     EntryCreateRequest,
+    EntrySearchQueryParams,
     EntryUpdateRequest,
     SearchQueryParams,
 )
-from app.api.v1.contracts.responses.entry_responses import EntryResponse
+from app.api.v1.contracts.responses.entry_responses import (
+    EntryBundleResponse,
+    EntryResponse,
+    EntrySearchHitResponse,
+    SuggestionKind,
+    SuggestionResponse,
+)
 from app.api.v1.contracts.responses.pagination_response import PaginatedResponse
 from app.api.v1.contracts.responses.share_link_responses import ShareLinkResponse
 from app.api.v1.contracts.responses.view_responses import ViewResponse
+from app.core.security import Principal
 from app.database.models.entry_model import Entry
 from app.database.models.share_link_model import ShareLink
 from app.database.models.user_model import User
 from app.database.models.view_model import View
 from app.database.models.volseg_entry_model import VolsegEntry
 from app.database.session_manager import get_async_session
+from app.services.files.blob_store import BlobStore, blob_sha256s, get_blob_store
+from app.services.files.storage_gc import StorageGarbageCollector, get_storage_gc
+from app.services.http_cache import conditional_json_response, resource_etag
+from app.services.job_service import JobService, get_job_service
+from app.services.pagination import count_rows, decode_cursor, encode_cursor
+from app.services.response_cache import CacheNamespace, ResponseCache, get_response_cache
+from app.services.search import build_prefix_tsquery, highlight
 from app.services.share_link_service import ShareLinkService, get_share_link_service
+from app.services.suggestion_index import SuggestionIndex, get_suggestion_index
+from app.tasks.storage_tasks import sweep_storage
 
 
 class EntryService:
-    def __init__(self, session: AsyncSession, share_link_service: ShareLinkService):
+    def __init__(
+        self,
+        session: AsyncSession,
+        share_link_service: ShareLinkService,
+        suggestion_index: SuggestionIndex,
+        cache: ResponseCache,
+        blob_store: BlobStore,
+        storage_gc: StorageGarbageCollector,
+        job_service: JobService,
+    ):
         self.session = session
         self.share_link_service = share_link_service
+        self.suggestion_index = suggestion_index
+        self.cache = cache
+        self.blob_store = blob_store
+        self.storage_gc = storage_gc
+        self.job_service = job_service
 
     async def create(
         self,
@@ -55,19 +88,25 @@ class EntryService:
 
         self.session.add(new_entry)
         await self.session.commit()
+        await self.cache.invalidate(CacheNamespace.entries)
+
+        if new_entry.is_public:
+            self.suggestion_index.add(new_entry.name, SuggestionKind.entry)
 
         return new_entry
 
     async def get_entry(
         self,
         *,
-        user: User,
+        user: Principal | None,
         entry_id: UUID,
-    ) -> EntryResponse:
-        entry: Entry = await self._get_entry_by_id(entry_id)
-
-        # Load in relationships
-        await self.session.refresh(entry, ["views", "link"])
+        if_none_match: str | None = None,
+    ) -> Response:
+        entry: Entry = await self._get_entry_by_id(
+            entry_id,
+            joinedload(Entry.views),
+            joinedload(Entry.link),
+        )
 
         # Check permissions
         self._check_permissions(
@@ -75,23 +114,29 @@ class EntryService:
             user=user,
         )
 
-        return EntryResponse.model_validate(entry)
+        return conditional_json_response(
+            EntryResponse.model_validate(entry),
+            etag=resource_etag(entry.id, entry.updated_at),
+            is_public=entry.is_public,
+            if_none_match=if_none_match,
+        )
 
     async def get_entry_share_link(
         self,
         *,
-        user: User,
+        user: Principal,
         entry_id: UUID,
     ) -> ShareLinkResponse:
-        entry: Entry = await self._get_entry_by_id(entry_id)
-
-        # Load in relationships
-        await self.session.refresh(entry, ["link"])
+        entry: Entry = await self._get_entry_by_id(
+            entry_id,
+            joinedload(Entry.link),
+        )
 
         # Check permissions
         self._check_permissions(
             entry=entry,
             user=user,
+            require_owner=True,
         )
 
         return ShareLinkResponse.model_validate(entry.link)
@@ -100,9 +145,13 @@ class EntryService:
         self,
         *,
         entry_id: UUID,
-        user: User,
+        user: Principal,
     ) -> ViewResponse:
-        entry: Entry = await self._get_entry_by_id(entry_id)
+        # Only the thumbnail views are loaded alongside the entry
+        entry: Entry = await self._get_entry_by_id(
+            entry_id,
+            joinedload(Entry.views.and_(View.is_thumbnail == True)),
+        )
 
         # Check permissions
         self._check_permissions(
@@ -110,12 +159,7 @@ class EntryService:
             user=user,
         )
 
-        result = await self.session.execute(
-            select(View)
-            .where(View.entry_id == entry_id, View.is_thumbnail == True)
-            .options(selectinload(View.entry)),
-        )
-        views: list[View] = result.scalars().all()
+        views: list[View] = entry.views
 
         if not views:
             raise HTTPException(
@@ -125,12 +169,56 @@ class EntryService:
 
         return ViewResponse.model_validate(views[0])
 
+    async def get_entry_bundle(
+        self,
+        *,
+        user: Principal | None,
+        entry_id: UUID,
+        include: set[EntryBundleInclude],
+    ) -> EntryBundleResponse:
+        """The entry and the related resources in `include`, loaded in a single query."""
+        options: list[ORMOption] = []
+        if include & {EntryBundleInclude.views, EntryBundleInclude.thumbnail}:
+            options.append(joinedload(Entry.views))
+        if EntryBundleInclude.share_link in include:
+            options.append(joinedload(Entry.link))
+        entry: Entry = await self._get_entry_by_id(entry_id, *options)
+
+        # Check permissions
+        self._check_permissions(
+            entry=entry,
+            user=user,
+        )
+
+        bundle = EntryBundleResponse(entry=EntryResponse.model_validate(entry))
+        if EntryBundleInclude.views in include:
+            bundle.views = [ViewResponse.model_validate(view) for view in entry.views]
+        if EntryBundleInclude.thumbnail in include:
+            thumbnail = next((view for view in entry.views if view.is_thumbnail), None)
+            if thumbnail is not None:
+                bundle.thumbnail = ViewResponse.model_validate(thumbnail)
+        # Share links are only handed out to the owner, public viewers get the rest
+        if (
+            EntryBundleInclude.share_link in include
+            and user is not None
+            and entry.has_owner(user.id)
+            and entry.link is not None
+        ):
+            bundle.share_link = ShareLinkResponse.model_validate(entry.link)
+
+        return bundle
+
     async def get_entry_by_share_link(
         self,
         *,
         share_link_id: UUID,
     ):
-        share_link: ShareLink | None = await self.session.get(ShareLink, share_link_id)
+        result = await self.session.execute(
+            select(ShareLink)
+            .where(ShareLink.id == share_link_id)
+            .options(joinedload(ShareLink.entry)),
+        )
+        share_link: ShareLink | None = result.scalar_one_or_none()
 
         if share_link is None:
             raise HTTPException(
@@ -144,10 +232,7 @@ class EntryService:
                 detail="Link is not active",
             )
 
-        # Get the shared entry
-        entry: Entry = await self._get_entry_by_id(share_link.entry_id)
-
-        return EntryResponse.model_validate(entry)
+        return EntryResponse.model_validate(share_link.entry)
 
     async def list_public_entries(
         self,
@@ -157,61 +242,89 @@ class EntryService:
         query = select(Entry).where(Entry.is_public == True)
 
         if search_query.search_term:
-            search_term = f"%{search_query.search_term}%"
-            query = query.filter(
-                or_(Entry.name.ilike(search_term), Entry.description.ilike(search_term))
-            )
+            query = self._filter_by_search_term(query, search_query.search_term)
 
-        count_query = select(func.count()).select_from(query.subquery())
-        total_items = await self.session.scalar(count_query)
-        query = query.order_by(Entry.created_at.desc())
-        query = query.offset((search_query.page - 1) * search_query.per_page).limit(
-            search_query.per_page
-        )
-        result = await self.session.execute(query)
-        entries = result.scalars().all()
-        total_pages = (total_items + search_query.per_page - 1) // search_query.per_page
-
-        return PaginatedResponse(
-            items=entries,
-            total_items=total_items,
-            page=search_query.page,
-            per_page=search_query.per_page,
-            total_pages=total_pages,
-        )
+        return await self._paginate(query, search_query)
 
     async def list_user_entries(self, user_id: int, search_query: SearchQueryParams):
         query = select(Entry).where(Entry.user_id == user_id)
 
         if search_query.search_term:
-            search_conditions = []
-            for term in search_query.search_term:
-                search_term = f"%{term}%"
-                search_conditions.append(
-                    or_(Entry.name.ilike(search_term), Entry.description.ilike(search_term))
-                )
-            if search_conditions:
-                query = query.filter(*search_conditions)
-
-        count_query = select(func.count()).select_from(query.subquery())
-        total_items = await self.session.scalar(count_query)
-        query = query.order_by(Entry.created_at.desc())
-        query = query.offset((search_query.page - 1) * search_query.per_page).limit(
-            search_query.per_page
+            query = self._filter_by_search_term(query, search_query.search_term)
+
+        return await self._paginate(
+            query,
+            search_query,
+            selectinload(Entry.views),
+            joinedload(Entry.link),
         )
-        query = query.options(selectinload(Entry.views), selectinload(Entry.link))
-        result = await self.session.execute(query)
-        entries = result.scalars().all()
+
+    async def search_public_entries(
+        self,
+        *,
+        search_query: EntrySearchQueryParams,
+    ) -> PaginatedResponse[EntrySearchHitResponse]:
+        tsquery = build_prefix_tsquery(search_query.q)
+        if tsquery is None:
+            return PaginatedResponse(
+                items=[],
+                total_items=0,
+                page=search_query.page,
+                per_page=search_query.per_page,
+                total_pages=0,
+            )
+
+        matches = Entry.search_vector.op("@@")(tsquery)
+        total_items, total_items_exact = await count_rows(
+            self.session,
+            select(Entry.id).where(Entry.is_public == True, matches),
+            search_query.count,
+        )
+
+        # Rank and cut the page first, highlighting is only done for the page's rows
+        rank = func.ts_rank_cd(Entry.search_vector, tsquery).label("rank")
+        ranked = (
+            select(Entry.id, rank)
+            .where(Entry.is_public == True, matches)
+            .order_by(rank.desc(), Entry.created_at.desc())
+            .offset((search_query.page - 1) * search_query.per_page)
+            .limit(search_query.per_page)
+            .subquery()
+        )
+        result = await self.session.execute(
+            select(
+                Entry,
+                ranked.c.rank,
+                highlight(Entry.name, tsquery),
+                highlight(Entry.description, tsquery),
+            )
+            .join(ranked, ranked.c.id == Entry.id)
+            .order_by(ranked.c.rank.desc(), Entry.created_at.desc())
+        )
+        hits = [
+            EntrySearchHitResponse(
+                entry=EntryResponse.model_validate(entry),
+                rank=entry_rank,
+                name_highlight=name_highlight,
+                description_highlight=description_highlight,
+            )
+            for entry, entry_rank, name_highlight, description_highlight in result.all()
+        ]
         total_pages = (total_items + search_query.per_page - 1) // search_query.per_page
 
         return PaginatedResponse(
-            items=entries,
+            items=hits,
             total_items=total_items,
+            total_items_exact=total_items_exact,
             page=search_query.page,
             per_page=search_query.per_page,
             total_pages=total_pages,
         )
 
+    async def suggest(self, *, prefix: str, limit: int) -> list[SuggestionResponse]:
+        suggestions = await self.suggestion_index.suggest(self.session, prefix, limit)
+        return [SuggestionResponse(text=text, kind=kind) for text, kind in suggestions]
+
     async def update(
         self,
         *,
@@ -225,12 +338,21 @@ class EntryService:
         self._check_permissions(
             entry=entry,
             user=user,
+            require_owner=True,
         )
 
+        was_public, old_name = entry.is_public, entry.name
+
         # Update model
         for key, value in request.model_dump(exclude_unset=True).items():
             setattr(entry, key, value)
         await self.session.commit()
+        await self.cache.invalidate(CacheNamespace.entries)
+
+        if was_public:
+            self.suggestion_index.remove(old_name, SuggestionKind.entry)
+        if entry.is_public:
+            self.suggestion_index.add(entry.name, SuggestionKind.entry)
 
         return EntryResponse.model_validate(entry)
 
@@ -240,21 +362,91 @@ class EntryService:
         entry_id: UUID,
         user: User,
     ) -> UUID:
-        entry: Entry = await self._get_entry_by_id(entry_id)
+        entry: Entry = await self._get_entry_by_id(entry_id, selectinload(Entry.views))
 
         # Check permissions
         self._check_permissions(
             entry=entry,
             user=user,
+            require_owner=True,
         )
 
+        # The views go with the entry, drop their references to the stored files
+        file_paths = [(view.snapshot_url, view.thumbnail_url) for view in entry.views]
+        blobs = blob_sha256s(*(file_path for paths in file_paths for file_path in paths))
+        await self.blob_store.release(*blobs)
+        # Files of views stored before blobs live under the entry
+        self.storage_gc.schedule(f"/entries/{entry.id}/", prefix=True)
+
         await self.session.delete(entry)
         await self.session.commit()
+        await self.cache.invalidate(CacheNamespace.entries, CacheNamespace.views)
+
+        await self.job_service.enqueue(sweep_storage, None)
+
+        if entry.is_public:
+            self.suggestion_index.remove(entry.name, SuggestionKind.entry)
 
         return entry.id
 
-    async def _get_entry_by_id(self, id: UUID) -> Entry:
-        entry: Entry | None = await self.session.get(Entry, id)
+    def _filter_by_search_term(self, query: Select, search_term: str) -> Select:
+        # Substring match, full-text search is only done by `search_public_entries`
+        search_term = f"%{search_term}%"
+        return query.where(or_(Entry.name.ilike(search_term), Entry.description.ilike(search_term)))
+
+    async def _paginate(
+        self,
+        query: Select,
+        search_query: SearchQueryParams,
+        *options: ORMOption,
+    ) -> PaginatedResponse:
+        """Page through entries newest first.
+
+        With a cursor the page starts right after the `(created_at, id)` it encodes,
+        which the composite indexes serve without scanning the skipped rows.
+        Otherwise the page number is translated to an offset.
+        """
+        total_items, total_items_exact = await count_rows(self.session, query, search_query.count)
+
+        query = query.order_by(Entry.created_at.desc(), Entry.id.desc())
+        if search_query.cursor:
+            created_at, id = decode_cursor(search_query.cursor)
+            query = query.where(tuple_(Entry.created_at, Entry.id) < tuple_(created_at, id))
+        else:
+            query = query.offset((search_query.page - 1) * search_query.per_page)
+
+        # Fetch one extra row to know whether there is a next page
+        query = query.limit(search_query.per_page + 1).options(*options)
+        result = await self.session.execute(query)
+        entries = result.scalars().all()
+
+        next_cursor: str | None = None
+        if len(entries) > search_query.per_page:
+            entries = entries[: search_query.per_page]
+            next_cursor = encode_cursor(entries[-1].created_at, entries[-1].id)
+
+        total_pages = (total_items + search_query.per_page - 1) // search_query.per_page
+
+        return PaginatedResponse(
+            items=entries,
+            total_items=total_items,
+            total_items_exact=total_items_exact,
+            # A cursor page has no number, it can start anywhere
+            page=None if search_query.cursor else search_query.page,
+            per_page=search_query.per_page,
+            total_pages=total_pages,
+            next_cursor=next_cursor,
+        )
+
+    async def _get_entry_by_id(self, id: UUID, *options: ORMOption) -> Entry:
+        """Load the entry together with the relationships given as loader options."""
+        if not options:
+            entry: Entry | None = await self.session.get(Entry, id)
+        else:
+            result = await self.session.execute(
+                select(Entry).where(Entry.id == id).options(*options),
+            )
+            entry = result.unique().scalar_one_or_none()
         if entry is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -262,18 +454,22 @@ class EntryService:
             )
         return entry
 
-    async def _check_permissions(
+    def _check_permissions(
         self,
         *,
         entry: Entry,
-        user: User | None,
-    ) -> bool:
-        if not entry.is_public and not user:
+        user: User | Principal | None,
+        require_owner: bool = False,
+    ) -> None:
+        """Public entries can be read by anyone, everything else only by the owner."""
+        if entry.is_public and not require_owner:
+            return
+        if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Entry is not public",
             )
-        if entry.user_id != user.id:
+        if not entry.has_owner(user.id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Don't have access to entry",
@@ -283,8 +479,18 @@ class EntryService:
 async def get_entry_service(
     session: AsyncSession = Depends(get_async_session),
     share_link_service: AsyncSession = Depends(get_share_link_service),
+    suggestion_index: SuggestionIndex = Depends(get_suggestion_index),
+    cache: ResponseCache = Depends(get_response_cache),
+    blob_store: BlobStore = Depends(get_blob_store),
+    storage_gc: StorageGarbageCollector = Depends(get_storage_gc),
+    job_service: JobService = Depends(get_job_service),
 ) -> EntryService:
     return EntryService(
         session=session,
         share_link_service=share_link_service,
+        suggestion_index=suggestion_index,
+        cache=cache,
+        blob_store=blob_store,
+        storage_gc=storage_gc,
+        job_service=job_service,
     )
@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import io
+import os
+from typing import BinaryIO
+
+from fastapi import Depends
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import get_settings
+from app.database.models.blob_model import Blob
+from app.database.session_manager import get_async_session
+from app.services.files.compression import FILE_EXTENSIONS, compress
+from app.services.files.minio_storage import MinioStorage, get_minio_storage
+from app.services.files.storage import Storage
+from app.services.thumbnails import variants_prefix
+
+BLOB_PREFIX = "/blobs/sha256"
+
+
+class BlobStore:
+    """Content-addressed storage with reference counts kept in Postgres.
+
+    Objects are keyed by the SHA-256 of their content, so storing bytes that are
+    already present only bumps the reference count. The object is uploaded when
+    the count goes from 0 to 1; the row stays locked until the caller commits, so
+    concurrent uploads of the same content wait for that upload instead of
+    skipping it.
+
+    Releasing a blob only decrements the count, `collect` removes unreferenced
+    blobs from storage.
+    """
+
+    def __init__(self, session: AsyncSession, storage: Storage, compression_level: int = 6):
+        self.session = session
+        self.storage = storage
+        self.compression_level = compression_level
+
+    async def put(self, file_data: BinaryIO) -> Blob:
+        """Store the content and return its blob. The caller commits.
+
+        Content that is already stored keeps the encoding it was stored with.
+        """
+        sha256, size = await asyncio.to_thread(_digest, file_data)
+
+        blob: Blob = await self.session.scalar(
+            insert(Blob)
+            .values(sha256=sha256, size=size, ref_count=1)
+            .on_conflict_do_update(
+                index_elements=[Blob.sha256],
+                set_={"ref_count": Blob.ref_count + 1},
+            )
+            .returning(Blob),
+            execution_options={"populate_existing": True},
+        )
+        if blob.ref_count == 1:
+            await self._upload(blob, file_data)
+
+        return blob
+
+    async def release(self, *sha256s: str) -> None:
+        """Drop one reference to each blob. The caller commits."""
+        for sha256 in sha256s:
+            await self.session.execute(
+                update(Blob).where(Blob.sha256 == sha256).values(ref_count=Blob.ref_count - 1)
+            )
+
+    async def collect(self, *sha256s: str) -> int:
+        """Delete unreferenced blobs, all of them if no hashes are given.
+
+        Rows are locked while their objects are removed, so a concurrent `put`
+        of the same content waits and then uploads it again.
+        """
+        query = select(Blob).where(Blob.ref_count <= 0).with_for_update(skip_locked=True)
+        if sha256s:
+            query = query.where(Blob.sha256.in_(sha256s))
+
+        unreferenced: list[Blob] = list(await self.session.scalars(query))
+        file_paths: dict[str, list[str]] = {}
+        for blob in unreferenced:
+            # The raw object may be left behind by an `encode` that didn't finish cleaning up
+            file_paths[blob.sha256] = [
+                *{blob_path(blob.sha256), blob_path(blob.sha256, blob.content_encoding)},
+                *await self.storage.list_directory(variants_prefix(blob.sha256)),
+            ]
+
+        # One batched delete for all of them, blobs with a failed object keep their row
+        # and are collected again on the next run
+        errors = await self.storage.delete_many(
+            [file_path for paths in file_paths.values() for file_path in paths]
+        )
+        failed = {"/" + file_path.lstrip("/") for file_path in errors}
+        collected = [
+            sha256
+            for sha256, paths in file_paths.items()
+            if not failed.intersection("/" + file_path.lstrip("/") for file_path in paths)
+        ]
+
+        await self.session.execute(delete(Blob).where(Blob.sha256.in_(collected)))
+        await self.session.commit()
+
+        return len(collected)
+
+    async def encode(self, sha256: str, content_encoding: str) -> tuple[str, str] | None:
+        """Replace a stored blob with a compressed copy. The caller commits.
+
+        The row stays locked until the commit, so concurrent `put`s of the same content
+        see the new encoding. Returns the old and new paths, or None if there was nothing
+        to do. The caller repoints references to the new path and deletes the old object
+        after committing.
+        """
+        blob: Blob | None = await self.session.scalar(
+            select(Blob).where(Blob.sha256 == sha256).with_for_update()
+        )
+        if blob is None or blob.ref_count <= 0 or blob.content_encoding is not None:
+            return None
+
+        raw_path = blob_path(sha256)
+        raw_data = io.BytesIO(await self.storage.get(raw_path))
+
+        blob.content_encoding = content_encoding
+        await self._upload(blob, raw_data)
+
+        return raw_path, blob_path(sha256, content_encoding)
+
+    async def _upload(self, blob: Blob, file_data: BinaryIO) -> None:
+        if blob.content_encoding is not None:
+            file_data = await asyncio.to_thread(
+                compress, file_data, blob.content_encoding, self.compression_level
+            )
+        await self.storage.save(
+            file_path=blob_path(blob.sha256, blob.content_encoding),
+            file_data=file_data,
+            content_encoding=blob.content_encoding,
+        )
+
+
+def blob_path(sha256: str, content_encoding: str | None = None) -> str:
+    extension = FILE_EXTENSIONS[content_encoding] if content_encoding else ""
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}{extension}"
+
+
+def blob_sha256s(*file_paths: str | None) -> list[str]:
+    """Hashes of the given paths that point into the blob store."""
+    return [
+        file_path.rsplit("/", 1)[-1].split(".", 1)[0]
+        for file_path in file_paths
+        if file_path is not None and file_path.startswith(f"{BLOB_PREFIX}/")
+    ]
+
+
+def _digest(file_data: BinaryIO) -> tuple[str, int]:
+    file_data.seek(0)
+    digest = hashlib.file_digest(file_data, "sha256")
+    # file_digest hashes in-memory buffers without moving the position
+    size = file_data.seek(0, os.SEEK_END)
+    file_data.seek(0)
+    return digest.hexdigest(), size
+
+
+async def get_blob_store(
+    session: AsyncSession = Depends(get_async_session),
+    storage: MinioStorage = Depends(get_minio_storage),
+) -> BlobStore:
+    return BlobStore(
+        session=session,
+        storage=storage,
+        compression_level=get_settings().SNAPSHOT_COMPRESSION_LEVEL,
+    )
@@ -0,0 +1,42 @@
+import gzip
+import shutil
+import zlib
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, BinaryIO
+
+GZIP = "gzip"
+
+# Suffix of stored objects per content encoding
+FILE_EXTENSIONS = {GZIP: ".gz"}
+
+# Matches the spool size Starlette uses for uploads
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+def compress(file_data: BinaryIO, content_encoding: str, level: int) -> BinaryIO:
+    """Compress the file into a new temporary file. Blocking, run it in a thread."""
+    if content_encoding != GZIP:
+        raise ValueError(f"Unsupported content encoding: {content_encoding}")
+
+    compressed = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    file_data.seek(0)
+    # mtime is fixed so identical content compresses to identical bytes
+    with gzip.GzipFile(fileobj=compressed, mode="wb", compresslevel=level, mtime=0) as gz:
+        shutil.copyfileobj(file_data, gz)
+    compressed.seek(0)
+    return compressed
+
+
+async def decompress_stream(
+    chunks: AsyncIterator[bytes],
+    content_encoding: str,
+) -> AsyncIterator[bytes]:
+    if content_encoding != GZIP:
+        raise ValueError(f"Unsupported content encoding: {content_encoding}")
+
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        if data := decompressor.decompress(chunk):
+            yield data
+    if data := decompressor.flush():
+        yield data
@@ -1,53 +1,220 @@
+import asyncio
+import errno
+import os
 import shutil
+import tempfile
 from functools import lru_cache
 from pathlib import Path
-from typing import BinaryIO, Union
+from typing import AsyncIterator, BinaryIO, Mapping, Sequence, Union
+
+from fastapi.responses import FileResponse
 
 from app.core.settings import get_settings
 
 
 class LocalStorage:
-    def __init__(self, root_path: str = "./storage"):
+    """Files on a local or shared volume.
+
+    Filesystem calls block, so they run in threads to keep the event loop free.
+    Files are written to a temporary file next to the target and renamed into
+    place, so readers never see a partially written file.
+    """
+
+    def __init__(self, root_path: str = "./storage", stream_chunk_size: int = 1024 * 1024):
         self.root_path = Path(root_path)
+        self.stream_chunk_size = stream_chunk_size
         # Ensure root directory exists
         self.root_path.mkdir(parents=True, exist_ok=True)
 
-    async def save(self, file_path: str, file_data: Union[bytes, BinaryIO]) -> None:
-        """Save file to local storage."""
+    async def save(
+        self,
+        file_path: str,
+        file_data: Union[bytes, BinaryIO],
+        content_encoding: str | None = None,
+    ) -> str:
+        """Save file to local storage.
+
+        Files carry no metadata here, `content_encoding` is accepted so callers can
+        treat every storage alike.
+        """
         full_path = self.root_path / file_path.lstrip("/")
-        full_path.parent.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(self._write_file, full_path, file_data)
+        return file_path
+
+    async def append(self, file_path: str, data: bytes) -> int:
+        """Append data to the file, creating it if needed. Returns the new size."""
+        full_path = self.root_path / file_path.lstrip("/")
+        return await asyncio.to_thread(self._append_file, full_path, data)
+
+    async def size(self, file_path: str) -> int:
+        """Size of the file in bytes, 0 if it doesn't exist."""
+        full_path = self.root_path / file_path.lstrip("/")
+        try:
+            return (await asyncio.to_thread(full_path.stat)).st_size
+        except FileNotFoundError:
+            return 0
 
-        if isinstance(file_data, bytes):
-            with open(full_path, "wb") as f:
-                f.write(file_data)
-        else:
-            with open(full_path, "wb") as f:
-                shutil.copyfileobj(file_data, f)
+    async def move(self, source_path: str, target_path: str) -> None:
+        """Move file within local storage, replacing the target if it exists."""
+        full_source_path = self.root_path / source_path.lstrip("/")
+        full_target_path = self.root_path / target_path.lstrip("/")
+        try:
+            await asyncio.to_thread(self._move_file, full_source_path, full_target_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {source_path}")
 
-    async def load(self, file_path: str) -> bytes:
+    async def move_directory(self, source_path: str, target_path: str) -> None:
+        """Move directory within local storage. Raises FileExistsError if the target has files."""
+        full_source_path = self.root_path / source_path.lstrip("/")
+        full_target_path = self.root_path / target_path.lstrip("/")
+        try:
+            await asyncio.to_thread(self._move_directory, full_source_path, full_target_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Directory not found: {source_path}")
+
+    def path(self, file_path: str) -> Path:
+        """Location of the file on disk, for readers that need a real file."""
+        return self.root_path / file_path.lstrip("/")
+
+    async def get(self, file_path: str) -> bytes:
         """Load file from local storage."""
         full_path = self.root_path / file_path.lstrip("/")
-        if not full_path.exists():
+        try:
+            return await asyncio.to_thread(full_path.read_bytes)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+    async def file_response(
+        self,
+        file_path: str,
+        headers: Mapping[str, str] | None = None,
+    ) -> FileResponse:
+        """Response streaming the file from disk.
+
+        Starlette answers `Range` and `If-Range` requests itself and hands the file
+        to servers that support the ASGI pathsend extension, which can send it
+        without copying it through Python.
+        """
+        full_path = self.root_path / file_path.lstrip("/")
+        try:
+            stat_result = await asyncio.to_thread(full_path.stat)
+        except FileNotFoundError:
             raise FileNotFoundError(f"File not found: {file_path}")
-        with open(full_path, "rb") as f:
-            return f.read()
 
-    async def delete(self, file_path: str) -> None:
-        """Delete file from local storage."""
+        return FileResponse(
+            full_path,
+            headers=headers,
+            filename=full_path.name,
+            content_disposition_type="inline",
+            stat_result=stat_result,
+        )
+
+    async def open_stream(self, file_path: str) -> AsyncIterator[bytes]:
+        """Open the file and return an iterator over its chunks."""
         full_path = self.root_path / file_path.lstrip("/")
-        if full_path.exists():
-            full_path.unlink()
+        try:
+            file = await asyncio.to_thread(full_path.open, "rb")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}")
+        return self._iter_chunks(file)
 
-    async def delete_directory(self, dir_path: str) -> None:
-        """Delete directory and all its contents from local storage."""
+    async def delete(self, file_path: str) -> bool:
+        """Delete file from local storage, return whether it existed."""
+        full_path = self.root_path / file_path.lstrip("/")
+        try:
+            await asyncio.to_thread(full_path.unlink)
+            return True
+        except FileNotFoundError:
+            return False
+
+    async def delete_directory(self, dir_path: str) -> int:
+        """Delete directory and all its contents, return how many files were deleted."""
+        full_path = self.root_path / dir_path.lstrip("/")
+        return await asyncio.to_thread(self._remove_tree, full_path)
+
+    async def delete_many(self, file_paths: Sequence[str]) -> dict[str, str]:
+        """Delete the files, return the error message of each path that failed."""
+        return await asyncio.to_thread(self._unlink_all, file_paths)
+
+    async def list_directory(self, dir_path: str) -> list[str]:
+        """Paths of every file in the directory and its subdirectories."""
         full_path = self.root_path / dir_path.lstrip("/")
-        if full_path.exists():
-            shutil.rmtree(full_path)
+        return await asyncio.to_thread(self._list_tree, full_path)
 
     async def exists(self, file_path: str) -> bool:
         """Check if file exists in local storage."""
         full_path = self.root_path / file_path.lstrip("/")
-        return full_path.exists()
+        return await asyncio.to_thread(full_path.exists)
+
+    def _write_file(self, full_path: Path, file_data: Union[bytes, BinaryIO]) -> None:
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Written next to the target so the rename stays on one filesystem and is atomic
+        fd, temp_path = tempfile.mkstemp(dir=full_path.parent, prefix=f".{full_path.name}.")
+        try:
+            # mkstemp makes the file private, the volseg server reads it from the shared volume
+            os.fchmod(fd, 0o644)
+            with os.fdopen(fd, "wb") as f:
+                if isinstance(file_data, bytes):
+                    f.write(file_data)
+                else:
+                    shutil.copyfileobj(file_data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, full_path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+
+    async def _iter_chunks(self, file: BinaryIO) -> AsyncIterator[bytes]:
+        try:
+            while chunk := await asyncio.to_thread(file.read, self.stream_chunk_size):
+                yield chunk
+        finally:
+            file.close()
+
+    def _unlink_all(self, file_paths: Sequence[str]) -> dict[str, str]:
+        errors = {}
+        for file_path in file_paths:
+            try:
+                (self.root_path / file_path.lstrip("/")).unlink(missing_ok=True)
+            except OSError as e:
+                errors[file_path] = str(e)
+        return errors
+
+    def _remove_tree(self, full_path: Path) -> int:
+        deleted_count = len(self._list_tree(full_path))
+        shutil.rmtree(full_path, ignore_errors=True)
+        return deleted_count
+
+    def _list_tree(self, full_path: Path) -> list[str]:
+        if not full_path.is_dir():
+            return []
+        return [
+            f"/{path.relative_to(self.root_path).as_posix()}"
+            for path in full_path.rglob("*")
+            if path.is_file()
+        ]
+
+    def _move_file(self, full_source_path: Path, full_target_path: Path) -> None:
+        full_target_path.parent.mkdir(parents=True, exist_ok=True)
+        full_source_path.replace(full_target_path)
+
+    def _move_directory(self, full_source_path: Path, full_target_path: Path) -> None:
+        full_target_path.parent.mkdir(parents=True, exist_ok=True)
+        # The rename is atomic and only replaces an empty directory
+        try:
+            full_source_path.rename(full_target_path)
+        except OSError as e:
+            if e.errno in (errno.EEXIST, errno.ENOTEMPTY):
+                raise FileExistsError(f"Directory already exists: {full_target_path}")
+            raise
+
+    def _append_file(self, full_path: Path, data: bytes) -> int:
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(full_path, "ab") as f:
+            f.write(data)
+            return f.tell()
 
 
 @lru_cache
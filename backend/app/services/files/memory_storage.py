@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+from typing import AsyncIterator, BinaryIO, Sequence, Union
+
+
+class InMemoryStorage:
+    """Storage kept in a dict, for tests and benchmarks. Nothing is shared between processes."""
+
+    def __init__(self, stream_chunk_size: int = 1024 * 1024):
+        self.stream_chunk_size = stream_chunk_size
+        self._files: dict[str, bytes] = {}
+        self._modified: dict[str, datetime] = {}
+
+    async def save(
+        self,
+        file_path: str,
+        file_data: Union[bytes, BinaryIO],
+        content_encoding: str | None = None,
+    ) -> str:
+        if not isinstance(file_data, bytes):
+            file_data.seek(0)
+            file_data = file_data.read()
+        self._files[_key(file_path)] = file_data
+        self._modified[_key(file_path)] = datetime.now(timezone.utc)
+        return file_path
+
+    async def get(self, file_path: str) -> bytes:
+        try:
+            return self._files[_key(file_path)]
+        except KeyError:
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+    async def open_stream(self, file_path: str) -> AsyncIterator[bytes]:
+        return self._iter_chunks(await self.get(file_path))
+
+    async def exists(self, file_path: str) -> bool:
+        return _key(file_path) in self._files
+
+    async def delete(self, file_path: str) -> bool:
+        self._modified.pop(_key(file_path), None)
+        return self._files.pop(_key(file_path), None) is not None
+
+    async def delete_directory(self, prefix: str) -> int:
+        file_paths = await self.list_directory(prefix)
+        await self.delete_many(file_paths)
+        return len(file_paths)
+
+    async def delete_many(self, file_paths: Sequence[str]) -> dict[str, str]:
+        """Delete the objects, missing ones count as deleted like on S3."""
+        for file_path in file_paths:
+            await self.delete(file_path)
+        return {}
+
+    async def list_directory(self, prefix: str) -> list[str]:
+        prefix = _key(prefix)
+        return [file_path for file_path in self._files if file_path.startswith(prefix)]
+
+    async def list_modified(self, prefix: str) -> dict[str, datetime]:
+        """Last modification time of every object under the prefix."""
+        file_paths = await self.list_directory(prefix)
+        return {file_path: self._modified[file_path] for file_path in file_paths}
+
+    def get_presigned_url(self, file_path: str) -> str:
+        # Nothing serves these, but callers that redirect get a URL naming the object
+        return f"memory://{_key(file_path)}"
+
+    async def _iter_chunks(self, data: bytes) -> AsyncIterator[bytes]:
+        for start in range(0, len(data), self.stream_chunk_size):
+            yield data[start : start + self.stream_chunk_size]
+
+
+def _key(file_path: str) -> str:
+    return "/" + file_path.lstrip("/")
@@ -1,11 +1,27 @@
-from functools import lru_cache
-from typing import BinaryIO
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache, partial
+from typing import Any, AsyncIterator, BinaryIO, Callable, Sequence, TypeVar
 
 from minio import Minio
+from minio.deleteobjects import DeleteObject
 from minio.error import S3Error
 
 from app.core.settings import get_settings
 
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+PRESIGNED_URL_CACHE_SIZE = 10_000
+
+# Most keys a single S3 multi-object delete request accepts
+DELETE_BATCH_SIZE = 1000
+
 
 class MinioStorage:
     def __init__(
@@ -15,74 +31,269 @@ class MinioStorage:
         secret_key: str,
         bucket: str,
         secure: bool = False,
+        max_workers: int = 16,
+        stream_chunk_size: int = 1024 * 1024,
+        part_size: int = 16 * 1024 * 1024,
+        parallel_uploads: int = 4,
+        region: str = "us-east-1",
+        public_endpoint: str | None = None,
+        public_secure: bool = False,
+        presigned_url_expiry: timedelta = timedelta(minutes=15),
+        parallel_deletes: int = 4,
     ):
         self.client = Minio(endpoint, access_key=access_key, secret_key=secret_key, secure=secure)
         self.bucket = bucket
+        self.stream_chunk_size = stream_chunk_size
+        self.part_size = part_size
+        self.parallel_uploads = parallel_uploads
+        self.parallel_deletes = parallel_deletes
+
+        # Presigned URLs are signed locally for the host the browser talks to.
+        # Passing the region up front avoids a bucket-location round trip.
+        self.signing_client = Minio(
+            public_endpoint or endpoint,
+            access_key=access_key,
+            secret_key=secret_key,
+            secure=public_secure if public_endpoint else secure,
+            region=region,
+        )
+        self.presigned_url_expiry = presigned_url_expiry
+        # object path -> (URL, reuse until), least recently used first
+        self._presigned_urls: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+        # The MinIO client is blocking, so every call runs on a bounded pool
+        # to keep the event loop free while objects are being transferred.
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="minio-storage",
+        )
 
         # Create bucket if it doesn't exist
         if not self.client.bucket_exists(bucket):
             self.client.make_bucket(bucket)
 
-    async def save(self, file_path: str, file_data: BinaryIO) -> str:
-        try:
-            # Get file size
-            file_data.seek(0, 2)  # Seek to the end
-            file_size = file_data.tell()  # Get current position (file size)
-            file_data.seek(0)  # Reset to beginning
-
-            # Upload file
-            self.client.put_object(
-                self.bucket,
-                file_path,
-                file_data,
-                file_size,
-                content_type="application/octet-stream",  # Default content type
-            )
+    async def save(
+        self,
+        file_path: str,
+        file_data: BinaryIO,
+        content_encoding: str | None = None,
+    ) -> str:
+        await self.upload(file_path, file_data, content_encoding)
+        return file_path
 
-            return file_path
+    async def upload(
+        self,
+        file_path: str,
+        file_data: BinaryIO,
+        content_encoding: str | None = None,
+    ) -> str:
+        """Save the object and return the ETag MinIO assigned to it."""
+        try:
+            return await self._run(self._put_object, file_path, file_data, content_encoding)
         except S3Error as e:
             raise Exception(f"Error saving file to MinIO: {str(e)}")
 
     async def get(self, file_path: str) -> bytes:
         try:
-            response = self.client.get_object(self.bucket, file_path)
-            data = response.read()
-            response.close()
-            response.release_conn()
-            return data
+            return await self._run(self._get_object, file_path)
         except S3Error as e:
-            if "NoSuchKey" in str(e):
+            if e.code == "NoSuchKey":
                 raise FileNotFoundError(f"File not found: {file_path}")
             raise Exception(f"Error getting file from MinIO: {str(e)}")
 
+    async def open_stream(self, file_path: str) -> AsyncIterator[bytes]:
+        """Open an object for reading and return an iterator over its chunks.
+
+        The object is opened eagerly so that a missing file raises
+        `FileNotFoundError` here rather than in the middle of a response.
+        """
+        try:
+            response = await self._run(self.client.get_object, self.bucket, file_path)
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                raise FileNotFoundError(f"File not found: {file_path}")
+            raise Exception(f"Error getting file from MinIO: {str(e)}")
+
+        return self._iter_chunks(response)
+
+    def get_presigned_url(self, file_path: str) -> str:
+        """Return a short-lived GET URL for the object.
+
+        URLs are cached per object path and reused while more than half of
+        their lifetime remains, so repeated requests don't re-sign the object.
+        The least recently used URLs are dropped once the cache is full.
+        """
+        now = time.monotonic()
+        cached = self._presigned_urls.get(file_path)
+        if cached is not None and cached[1] > now:
+            self._presigned_urls.move_to_end(file_path)
+            return cached[0]
+
+        url = self.signing_client.presigned_get_object(
+            self.bucket,
+            file_path,
+            expires=self.presigned_url_expiry,
+        )
+
+        reuse_for = self.presigned_url_expiry.total_seconds() / 2
+        self._presigned_urls[file_path] = (url, now + reuse_for)
+        self._presigned_urls.move_to_end(file_path)
+        while len(self._presigned_urls) > PRESIGNED_URL_CACHE_SIZE:
+            self._presigned_urls.popitem(last=False)
+
+        return url
+
     async def delete(self, file_path: str) -> bool:
+        self._presigned_urls.pop(file_path, None)
         try:
-            self.client.remove_object(self.bucket, file_path)
+            await self._run(self.client.remove_object, self.bucket, file_path)
             return True
         except S3Error as e:
-            if "NoSuchKey" in str(e):
+            if e.code == "NoSuchKey":
                 return False
             raise Exception(f"Error deleting file from MinIO: {str(e)}")
 
-    async def delete_directory(self, prefix: str) -> int:
+    async def delete_directory(
+        self,
+        prefix: str,
+        on_progress: Callable[[int, int], None] | None = None,
+    ) -> int:
+        """Delete every object under the prefix and return how many were deleted.
+
+        `on_progress` is called with the number of processed and total keys after
+        each batch. Keys that fail are logged, and an exception listing them is
+        raised once every batch has been tried.
+        """
         try:
-            objects_to_delete = self.client.list_objects(self.bucket, prefix=prefix, recursive=True)
-            deleted_count = 0
-            for obj in objects_to_delete:
-                self.client.remove_object(self.bucket, obj.object_name)
-                deleted_count += 1
-            return deleted_count
+            file_paths = await self._run(self._list_prefix, prefix)
         except S3Error as e:
             raise Exception(f"Error deleting directory from MinIO: {str(e)}")
 
+        errors = await self.delete_many(file_paths, on_progress)
+        for file_path, message in errors.items():
+            logger.warning("Failed to delete %s: %s", file_path, message)
+        if errors:
+            raise Exception(
+                f"Error deleting directory from MinIO: {len(errors)} of {len(file_paths)} "
+                f"files failed, e.g. {next(iter(errors))}"
+            )
+
+        return len(file_paths)
+
+    async def delete_many(
+        self,
+        file_paths: Sequence[str],
+        on_progress: Callable[[int, int], None] | None = None,
+    ) -> dict[str, str]:
+        """Delete the objects and return the error message of each path that failed.
+
+        Paths are sent in multi-object delete requests of up to 1000 keys, with
+        `parallel_deletes` requests in flight at once.
+        """
+        for file_path in file_paths:
+            self._presigned_urls.pop(file_path, None)
+
+        semaphore = asyncio.Semaphore(self.parallel_deletes)
+        errors: dict[str, str] = {}
+        processed = 0
+
+        async def delete_batch(batch: Sequence[str]) -> None:
+            nonlocal processed
+            async with semaphore:
+                try:
+                    errors.update(await self._run(self._remove_objects, batch))
+                except S3Error as e:
+                    errors.update((file_path, str(e)) for file_path in batch)
+            processed += len(batch)
+            if on_progress is not None:
+                on_progress(processed, len(file_paths))
+
+        await asyncio.gather(
+            *(
+                delete_batch(file_paths[start : start + DELETE_BATCH_SIZE])
+                for start in range(0, len(file_paths), DELETE_BATCH_SIZE)
+            )
+        )
+        return errors
+
     async def list_directory(self, prefix: str) -> list[str]:
-        return [
-            obj.object_name
-            for obj in self.client.list_objects(self.bucket, prefix=prefix, recursive=True)
-        ]
+        return await self._run(self._list_prefix, prefix)
+
+    async def list_modified(self, prefix: str) -> dict[str, datetime]:
+        """Last modification time of every object under the prefix."""
+        return await self._run(self._list_prefix_modified, prefix)
 
     async def exists(self, file_path: str) -> bool:
-        pass
+        try:
+            await self._run(self.client.stat_object, self.bucket, file_path)
+            return True
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return False
+            raise Exception(f"Error checking file in MinIO: {str(e)}")
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args))
+
+    async def _iter_chunks(self, response) -> AsyncIterator[bytes]:
+        try:
+            while chunk := await self._run(response.read, self.stream_chunk_size):
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+
+    def _put_object(
+        self,
+        file_path: str,
+        file_data: BinaryIO,
+        content_encoding: str | None = None,
+    ) -> str:
+        # Get file size
+        file_data.seek(0, 2)  # Seek to the end
+        file_size = file_data.tell()  # Get current position (file size)
+        file_data.seek(0)  # Reset to beginning
+
+        # Objects larger than one part go up as a multipart upload
+        # with several parts in flight at once
+        result = self.client.put_object(
+            self.bucket,
+            file_path,
+            file_data,
+            file_size,
+            content_type="application/octet-stream",  # Default content type
+            # Stored with the object so presigned downloads are decoded by the browser
+            metadata={"Content-Encoding": content_encoding} if content_encoding else None,
+            part_size=self.part_size,
+            num_parallel_uploads=self.parallel_uploads,
+        )
+        return result.etag
+
+    def _get_object(self, file_path: str) -> bytes:
+        response = self.client.get_object(self.bucket, file_path)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def _remove_objects(self, file_paths: Sequence[str]) -> dict[str, str]:
+        # One request for up to 1000 keys, the response lists only the failures
+        errors = self.client.remove_objects(
+            self.bucket, [DeleteObject(file_path) for file_path in file_paths]
+        )
+        return {error.name: error.message or error.code for error in errors}
+
+    def _list_prefix_modified(self, prefix: str) -> dict[str, datetime]:
+        return {obj.object_name: obj.last_modified for obj in self._list_objects(prefix)}
+
+    def _list_prefix(self, prefix: str) -> list[str]:
+        return [obj.object_name for obj in self._list_objects(prefix)]
+
+    def _list_objects(self, prefix: str):
+        # Keys are stored without the leading slash the services use in their paths
+        return self.client.list_objects(self.bucket, prefix=prefix.lstrip("/"), recursive=True)
 
 
 @lru_cache
@@ -94,5 +305,14 @@ def get_minio_storage():
         access_key=settings.MINIO_ACCESS_KEY,
         secret_key=settings.MINIO_SECRET_KEY,
         secure=settings.MINIO_SECURE,
+        max_workers=settings.MINIO_MAX_WORKERS,
+        stream_chunk_size=settings.MINIO_STREAM_CHUNK_SIZE,
+        part_size=settings.MINIO_MULTIPART_PART_SIZE,
+        parallel_uploads=settings.MINIO_MULTIPART_CONCURRENCY,
+        region=settings.MINIO_REGION,
+        public_endpoint=settings.MINIO_PUBLIC_ENDPOINT,
+        public_secure=settings.MINIO_PUBLIC_SECURE,
+        presigned_url_expiry=timedelta(seconds=settings.MINIO_PRESIGNED_URL_EXPIRE_SECONDS),
+        parallel_deletes=settings.MINIO_DELETE_CONCURRENCY,
     )
     return storage
@@ -0,0 +1,58 @@
+from typing import AsyncIterator, BinaryIO, Protocol, Sequence
+
+
+class Storage(Protocol):
+    """Operations every storage backend supports.
+
+    Paths are `/`-separated and absolute. Reading a path that doesn't exist raises
+    `FileNotFoundError`.
+    """
+
+    async def save(
+        self,
+        file_path: str,
+        file_data: BinaryIO,
+        content_encoding: str | None = None,
+    ) -> str:
+        """Store the file, replacing an existing one, and return its path."""
+        ...
+
+    async def get(self, file_path: str) -> bytes: ...
+
+    async def open_stream(self, file_path: str) -> AsyncIterator[bytes]:
+        """Open the file and return an iterator over its chunks.
+
+        A missing file raises here, not while iterating.
+        """
+        ...
+
+    async def exists(self, file_path: str) -> bool: ...
+
+    async def delete(self, file_path: str) -> bool:
+        """Delete the file if it exists.
+
+        Returns False for a missing file where the backend can tell, S3 deletes
+        succeed either way.
+        """
+        ...
+
+    async def delete_directory(self, prefix: str) -> int:
+        """Delete every file under the prefix, return how many were deleted."""
+        ...
+
+    async def delete_many(self, file_paths: Sequence[str]) -> dict[str, str]:
+        """Delete the files, return the error message of each path that failed.
+
+        Missing files count as deleted.
+        """
+        ...
+
+    async def list_directory(self, prefix: str) -> list[str]:
+        """Paths of every file under the prefix, recursively."""
+        ...
+
+
+class PresignedStorage(Storage, Protocol):
+    """Storage that can hand out URLs for clients to download from directly."""
+
+    def get_presigned_url(self, file_path: str) -> str: ...
@@ -0,0 +1,186 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from fastapi import Depends
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import get_settings
+from app.database.models.blob_model import Blob
+from app.database.models.storage_deletion_model import StorageDeletion
+from app.database.models.view_model import View
+from app.database.session_manager import get_async_session
+from app.services.files.blob_store import BlobStore, blob_path, get_blob_store
+from app.services.files.local_storage import LocalStorage, get_local_storage
+from app.services.files.minio_storage import MinioStorage, get_minio_storage
+from app.services.thumbnails import THUMBNAIL_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# Key of the Postgres advisory lock held by the running reconciler
+RECONCILE_LOCK_ID = 0x5354_4743
+
+
+class StorageGarbageCollector:
+    """Removes stored objects the database no longer references.
+
+    Deletions are written to an outbox in the same transaction that removes their
+    last reference and are applied by `sweep` later. Sweepers lock the rows they
+    work on and skip locked ones, so any number of them can run side by side.
+
+    `reconcile` catches objects the outbox never heard of, like uploads whose
+    transaction rolled back. It diffs the bucket listing against the database and
+    schedules the strays; an advisory lock keeps it to one node at a time.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        storage: MinioStorage,
+        blob_store: BlobStore,
+        local_storage: LocalStorage | None = None,
+        batch_size: int = 1000,
+        grace_period: timedelta = timedelta(hours=1),
+    ):
+        self.session = session
+        self.storage = storage
+        self.local_storage = local_storage
+        self.blob_store = blob_store
+        self.batch_size = batch_size
+        self.grace_period = grace_period
+
+    def schedule(self, *file_paths: str | None, prefix: bool = False, local: bool = False) -> bool:
+        """Queue the paths for deletion. The caller commits, returns whether any were queued.
+
+        With `local` the paths are on the local storage rather than in the bucket.
+        """
+        file_paths = [file_path for file_path in file_paths if file_path]
+        self.session.add_all(
+            StorageDeletion(file_path=file_path, is_prefix=prefix, is_local=local)
+            for file_path in file_paths
+        )
+        return bool(file_paths)
+
+    async def sweep(self) -> int:
+        """Apply queued deletions and collect unreferenced blobs, return how many were removed."""
+        deleted = 0
+        while True:
+            pending: list[StorageDeletion] = list(
+                await self.session.scalars(
+                    select(StorageDeletion)
+                    .order_by(StorageDeletion.created_at)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+            )
+            if not pending:
+                break
+
+            errors = await self.storage.delete_many(
+                [
+                    deletion.file_path
+                    for deletion in pending
+                    if not deletion.is_prefix and not deletion.is_local
+                ]
+            )
+            failed = {_normalize(file_path) for file_path in errors}
+            for deletion in pending:
+                if not deletion.is_prefix and not deletion.is_local:
+                    continue
+                try:
+                    await self._delete_one(deletion)
+                except Exception as e:
+                    logger.warning("Failed to delete %s: %s", deletion.file_path, e)
+                    failed.add(_normalize(deletion.file_path))
+
+            # Failed deletions stay queued for the next sweep
+            done = [
+                deletion.id for deletion in pending if _normalize(deletion.file_path) not in failed
+            ]
+            await self.session.execute(delete(StorageDeletion).where(StorageDeletion.id.in_(done)))
+            await self.session.commit()
+            deleted += len(done)
+
+            if failed or len(pending) < self.batch_size:
+                break
+
+        return deleted + await self.blob_store.collect()
+
+    async def _delete_one(self, deletion: StorageDeletion) -> None:
+        storage: MinioStorage | LocalStorage = self.storage
+        if deletion.is_local:
+            if self.local_storage is None:
+                raise Exception("No local storage to delete from")
+            storage = self.local_storage
+
+        if deletion.is_prefix:
+            await storage.delete_directory(deletion.file_path)
+        else:
+            await storage.delete(deletion.file_path)
+
+    async def reconcile(self) -> int:
+        """Queue deletion of stored objects nothing in the database points to."""
+        locked = await self.session.scalar(
+            select(func.pg_try_advisory_xact_lock(RECONCILE_LOCK_ID))
+        )
+        if not locked:
+            return 0
+
+        # The bucket is listed before the database is read, so an object that is in use
+        # and older than the grace period always has its committed row in the snapshot
+        cutoff = datetime.now(timezone.utc) - self.grace_period
+        stored = await self.storage.list_modified("/")
+
+        blobs = (await self.session.execute(select(Blob.sha256, Blob.content_encoding))).all()
+        blob_sha256s = {sha256 for sha256, _ in blobs}
+        referenced = {_normalize(blob_path(*blob)) for blob in blobs}
+
+        view_paths = await self.session.execute(select(View.snapshot_url, View.thumbnail_url))
+        referenced.update(_normalize(path) for paths in view_paths for path in paths if path)
+        # Already queued, no need to queue them twice
+        queued = await self.session.scalars(
+            select(StorageDeletion.file_path).where(StorageDeletion.is_local.is_(False))
+        )
+        referenced.update(_normalize(path) for path in queued)
+
+        orphans = []
+        for name, modified in stored.items():
+            file_path = _normalize(name)
+            if modified >= cutoff or file_path in referenced:
+                continue
+            if _is_variant_of(file_path, blob_sha256s):
+                continue
+            orphans.append(file_path)
+        self.schedule(*orphans)
+        await self.session.commit()
+
+        return len(orphans)
+
+
+def _normalize(file_path: str) -> str:
+    # MinIO lists keys without the leading slash the services store them with
+    return "/" + file_path.lstrip("/")
+
+
+def _is_variant_of(file_path: str, sha256s: set[str]) -> bool:
+    """Whether the object is a derived thumbnail of an existing blob."""
+    if not file_path.startswith(f"{THUMBNAIL_PREFIX}/"):
+        return False
+    return file_path.removeprefix(f"{THUMBNAIL_PREFIX}/").split("/", 1)[0] in sha256s
+
+
+async def get_storage_gc(
+    session: AsyncSession = Depends(get_async_session),
+    storage: MinioStorage = Depends(get_minio_storage),
+    blob_store: BlobStore = Depends(get_blob_store),
+    local_storage: LocalStorage = Depends(get_local_storage),
+) -> StorageGarbageCollector:
+    settings = get_settings()
+    return StorageGarbageCollector(
+        session=session,
+        storage=storage,
+        blob_store=blob_store,
+        local_storage=local_storage,
+        batch_size=settings.STORAGE_GC_BATCH_SIZE,
+        grace_period=timedelta(seconds=settings.STORAGE_GC_GRACE_PERIOD_SECONDS),
+    )
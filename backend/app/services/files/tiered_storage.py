@@ -0,0 +1,202 @@
+import asyncio
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, BinaryIO, Sequence
+
+from app.core.settings import get_settings
+from app.services.files.compression import SPOOL_MAX_SIZE
+from app.services.files.local_storage import LocalStorage
+from app.services.files.minio_storage import get_minio_storage
+from app.services.files.storage import PresignedStorage
+
+
+class TieredStorage:
+    """Storage behind a read-through cache on local disk.
+
+    The backing storage stays the source of truth. Reads are served from the
+    cache directory when the file is there and copied into it when it isn't;
+    the least recently read files are evicted once the cache grows past
+    `max_bytes`. Writes and deletes go to the backing storage and drop the
+    cached copy.
+
+    Cached files are not revalidated, so only read immutable objects through it,
+    like the content-addressed blobs and their thumbnail variants. The index of
+    cached files is per process; processes sharing a cache directory each keep
+    to the budget on their own and treat files evicted by another as misses.
+    """
+
+    def __init__(self, backing: PresignedStorage, cache: LocalStorage, max_bytes: int):
+        self.backing = backing
+        self.cache = cache
+        self.max_bytes = max_bytes
+
+        # Least recently read first, the files already on disk are added by the
+        # first request that needs the index
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        self._scanned = False
+
+    async def save(
+        self,
+        file_path: str,
+        file_data: BinaryIO,
+        content_encoding: str | None = None,
+    ) -> str:
+        await self.backing.save(file_path, file_data, content_encoding)
+        await self._drop(file_path)
+        return file_path
+
+    async def get(self, file_path: str) -> bytes:
+        await self._load_index()
+        if _key(file_path) in self._entries:
+            try:
+                data = await self.cache.get(file_path)
+                self._touch(file_path)
+                return data
+            except FileNotFoundError:
+                self._forget(file_path)
+
+        data = await self.backing.get(file_path)
+        await self._store(file_path, data)
+        return data
+
+    async def open_stream(self, file_path: str) -> AsyncIterator[bytes]:
+        await self._load_index()
+        if _key(file_path) in self._entries:
+            try:
+                stream = await self.cache.open_stream(file_path)
+                self._touch(file_path)
+                return stream
+            except FileNotFoundError:
+                self._forget(file_path)
+
+        return self._tee(file_path, await self.backing.open_stream(file_path))
+
+    async def exists(self, file_path: str) -> bool:
+        await self._load_index()
+        return _key(file_path) in self._entries or await self.backing.exists(file_path)
+
+    async def delete(self, file_path: str) -> bool:
+        await self._drop(file_path)
+        return await self.backing.delete(file_path)
+
+    async def delete_directory(self, prefix: str) -> int:
+        await self._load_index()
+        for file_path in [path for path in self._entries if path.startswith(_key(prefix))]:
+            await self._drop(file_path)
+        return await self.backing.delete_directory(prefix)
+
+    async def delete_many(self, file_paths: Sequence[str]) -> dict[str, str]:
+        for file_path in file_paths:
+            await self._drop(file_path)
+        return await self.backing.delete_many(file_paths)
+
+    async def list_directory(self, prefix: str) -> list[str]:
+        return await self.backing.list_directory(prefix)
+
+    def get_presigned_url(self, file_path: str) -> str:
+        # Clients download from the backing storage, the cache is local to this host
+        return self.backing.get_presigned_url(file_path)
+
+    async def _tee(self, file_path: str, stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Pass the stream through, caching it once it has been read to the end."""
+        with SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as copy:
+            size = 0
+            try:
+                async for chunk in stream:
+                    size += len(chunk)
+                    if size <= self.max_bytes:
+                        # Spills to disk past SPOOL_MAX_SIZE
+                        await asyncio.to_thread(copy.write, chunk)
+                    yield chunk
+            finally:
+                # Releases the backing connection when the client stops reading early
+                await stream.aclose()
+
+            if size <= self.max_bytes:
+                await self._store(file_path, copy)
+
+    async def _store(self, file_path: str, file_data: bytes | BinaryIO) -> None:
+        if isinstance(file_data, bytes):
+            size = len(file_data)
+        else:
+            size = file_data.seek(0, os.SEEK_END)
+            file_data.seek(0)
+        if size > self.max_bytes:
+            return
+
+        await self._load_index()
+        await self.cache.save(file_path, file_data)
+        self._forget(file_path)
+        self._entries[_key(file_path)] = size
+        self._size += size
+
+        while self._size > self.max_bytes:
+            evicted = next(iter(self._entries))
+            await self._drop(evicted)
+
+    async def _drop(self, file_path: str) -> None:
+        self._forget(file_path)
+        await self.cache.delete(file_path)
+
+    def _touch(self, file_path: str) -> None:
+        # Another request may have evicted it while the file was being read
+        if _key(file_path) in self._entries:
+            self._entries.move_to_end(_key(file_path))
+
+    def _forget(self, file_path: str) -> None:
+        self._size -= self._entries.pop(_key(file_path), 0)
+
+    async def _load_index(self) -> None:
+        """Index the files left in the cache directory by earlier processes.
+
+        The directory is walked in a worker thread on first use rather than when
+        the storage is created, which happens on the request path.
+        """
+        if self._scanned:
+            return
+        files = await asyncio.to_thread(self._scan_cache)
+        # Another request finished the scan first
+        if self._scanned:
+            return
+        self._scanned = True
+
+        # Files cached while the scan ran are the most recently read
+        cached_meanwhile = self._entries
+        self._entries = OrderedDict(files)
+        for file_path, size in cached_meanwhile.items():
+            self._entries.pop(file_path, None)
+            self._entries[file_path] = size
+        self._size = sum(self._entries.values())
+
+    def _scan_cache(self) -> list[tuple[str, int]]:
+        files = []
+        for dir_path, _, filenames in os.walk(self.cache.root_path):
+            for filename in filenames:
+                # Temporary files of writes in progress
+                if filename.startswith("."):
+                    continue
+                stat_result = os.stat(os.path.join(dir_path, filename))
+                file_path = os.path.relpath(os.path.join(dir_path, filename), self.cache.root_path)
+                files.append((stat_result.st_atime, _key(file_path), stat_result.st_size))
+        return [(file_path, size) for _, file_path, size in sorted(files)]
+
+
+def _key(file_path: str) -> str:
+    return "/" + file_path.lstrip("/")
+
+
+@lru_cache
+def get_storage() -> PresignedStorage:
+    """MinIO, behind a local disk cache when STORAGE_CACHE_PATH is set."""
+    settings = get_settings()
+    if settings.STORAGE_CACHE_PATH is None:
+        return get_minio_storage()
+
+    return TieredStorage(
+        backing=get_minio_storage(),
+        cache=LocalStorage(root_path=settings.STORAGE_CACHE_PATH),
+        max_bytes=settings.STORAGE_CACHE_MAX_BYTES,
+    )
@@ -0,0 +1,103 @@
+import hashlib
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import Response, status
+from pydantic import BaseModel
+
+from app.core.settings import get_settings
+
+
+def resource_etag(id: UUID, updated_at: datetime) -> str:
+    """Strong ETag of a database row, changes whenever the row is updated."""
+    digest = hashlib.sha256(f"{id}:{updated_at.isoformat()}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def storage_etag(etag: str | None, variant: str | None = None) -> str | None:
+    """Strong ETag of a stored object from the ETag the storage reported on upload.
+
+    Each content encoding or derived variant is a different representation and
+    gets its own ETag.
+    """
+    if etag is None:
+        return None
+    stripped = etag.strip('"')
+    if variant is not None:
+        return f'"{stripped}-{variant}"'
+    return f'"{stripped}"'
+
+
+# A year, the longest max-age caches are expected to honour
+IMMUTABLE_MAX_AGE_SECONDS = 365 * 24 * 60 * 60
+
+
+def cache_control(is_public: bool, immutable: bool = False) -> str:
+    # Private entries are revalidated on every request so that access checks still run,
+    # public entries may be reused by shared caches for a short while, or for good when
+    # the URL is pinned to the content hash
+    if is_public and immutable:
+        return f"public, max-age={IMMUTABLE_MAX_AGE_SECONDS}, immutable"
+    if is_public:
+        return f"public, max-age={get_settings().HTTP_CACHE_PUBLIC_MAX_AGE_SECONDS}"
+    return "private, no-cache"
+
+
+def is_not_modified(if_none_match: str | None, etag: str | None) -> bool:
+    """Weak comparison of `If-None-Match` against the current ETag (RFC 9110, 13.1.2)."""
+    if if_none_match is None or etag is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == current for candidate in if_none_match.split(",")
+    )
+
+
+def header_accepts(header: str | None, value: str, wildcard: str | None = None) -> bool:
+    """Whether an `Accept`-style header lists `value` with a non-zero quality (RFC 9110, 12.4.2)."""
+    if header is None:
+        return False
+
+    for item in header.split(","):
+        token, _, params = item.strip().partition(";")
+        if token.strip().lower() not in (value, wildcard):
+            continue
+        quality = params.strip().removeprefix("q=")
+        try:
+            return not params or float(quality) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def validator_headers(etag: str | None, is_public: bool, immutable: bool = False) -> dict[str, str]:
+    headers = {"Cache-Control": cache_control(is_public, immutable)}
+    if etag is not None:
+        headers["ETag"] = etag
+    return headers
+
+
+def not_modified(etag: str, is_public: bool, immutable: bool = False) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=validator_headers(etag, is_public, immutable),
+    )
+
+
+def conditional_json_response(
+    model: BaseModel,
+    *,
+    etag: str,
+    is_public: bool,
+    if_none_match: str | None,
+) -> Response:
+    if is_not_modified(if_none_match, etag):
+        return not_modified(etag, is_public)
+
+    return Response(
+        content=model.model_dump_json(),
+        media_type="application/json",
+        headers=validator_headers(etag, is_public),
+    )
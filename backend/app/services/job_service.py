@@ -0,0 +1,49 @@
+import asyncio
+from uuid import UUID
+
+from celery import Task
+from fastapi import BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.contracts.responses.job_responses import JobResponse
+from app.database.models.job_model import Job, JobKind
+from app.database.models.user_model import User
+from app.database.session_manager import get_async_session
+
+
+class JobService:
+    def __init__(self, session: AsyncSession, background_tasks: BackgroundTasks | None = None):
+        self.session = session
+        self.background_tasks = background_tasks
+
+    def create(self, kind: JobKind, user: User | None = None) -> Job:
+        """Add a pending job to the session, it is saved with the caller's commit."""
+        job = Job(kind=kind, user_id=user.id if user else None)
+        self.session.add(job)
+        return job
+
+    async def enqueue(self, task: Task, job: Job | None, *args: str) -> None:
+        """Send the task to the workers. Call after committing, so the worker sees the job."""
+        task_args = (str(job.id) if job else None, *args)
+        # Eager tasks do the work right here, so they run once the response has been sent
+        if task.app.conf.task_always_eager and self.background_tasks is not None:
+            self.background_tasks.add_task(task.delay, *task_args)
+            return
+        # Publishing blocks on the broker
+        await asyncio.to_thread(task.delay, *task_args)
+
+    async def get_job(self, *, job_id: UUID, user: User) -> JobResponse:
+        job: Job | None = await self.session.get(Job, job_id)
+        if job is None or job.user_id != user.id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found",
+            )
+        return JobResponse.model_validate(job)
+
+
+async def get_job_service(
+    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(get_async_session),
+) -> JobService:
+    return JobService(session, background_tasks)
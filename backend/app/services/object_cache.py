@@ -0,0 +1,149 @@
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator
+
+from app.core.settings import get_settings
+from app.services.files.storage import Storage
+from app.services.single_flight import SingleFlight
+
+# How many objects found too large to cache are remembered, so they are streamed right away
+TOO_LARGE_KEYS = 1024
+
+
+class ObjectCache:
+    """Per-process LRU of stored objects' bytes, bounded by their total size.
+
+    Entries are keyed by object path and ETag, so a replaced object is never
+    served from a stale entry. Objects above `max_item_bytes` are not cached,
+    entries expire after `ttl` seconds, and the least recently used ones are
+    evicted once the cache holds more than `max_bytes`.
+
+    Concurrent misses for the same object share a single read from storage.
+    """
+
+    def __init__(self, max_bytes: int, max_item_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.ttl = ttl
+
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # (path, etag) -> (data, expires at), least recently used first
+        self._entries: OrderedDict[tuple[str, str], tuple[bytes, float]] = OrderedDict()
+        self._too_large: OrderedDict[tuple[str, str], None] = OrderedDict()
+        self._reads: SingleFlight[tuple[str, str], bytes | None] = SingleFlight()
+
+    def get(self, file_path: str, etag: str) -> bytes | None:
+        key = (file_path, etag)
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, file_path: str, etag: str, data: bytes) -> None:
+        if len(data) > self.max_item_bytes:
+            return
+
+        key = (file_path, etag)
+        self._remove(key)
+        self._entries[key] = (data, time.monotonic() + self.ttl)
+        self.size += len(data)
+
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, *file_paths: str | None) -> None:
+        """Drop every cached version of the objects. Paths ending in `/` drop everything below."""
+        file_paths = [file_path for file_path in file_paths if file_path]
+
+        def matches(cached_path: str) -> bool:
+            return any(
+                cached_path == file_path
+                or (file_path.endswith("/") and cached_path.startswith(file_path))
+                for file_path in file_paths
+            )
+
+        for key in [key for key in self._entries if matches(key[0])]:
+            self._remove(key)
+
+    async def open_stream(
+        self,
+        storage: Storage,
+        file_path: str,
+        etag: str | None,
+    ) -> AsyncIterator[bytes]:
+        """Stream the object from memory if it is cached, else read it from storage and cache it.
+
+        Objects too large to cache are streamed from storage by every caller.
+        """
+        # Without an ETag a cached copy could never be told apart from a newer object
+        key = (file_path, etag)
+        if etag is None or key in self._too_large:
+            return await storage.open_stream(file_path)
+
+        if (data := self.get(file_path, etag)) is None:
+            data = await self._reads.do(key, lambda: self._read(storage, file_path, etag))
+        if data is None:
+            return await storage.open_stream(file_path)
+
+        return _iter_bytes(data)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": self.size,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+    async def _read(self, storage: Storage, file_path: str, etag: str) -> bytes | None:
+        """Read and cache the object, None if it turns out to be too large to cache."""
+        stream = await storage.open_stream(file_path)
+        chunks = []
+        size = 0
+        try:
+            async for chunk in stream:
+                size += len(chunk)
+                if size > self.max_item_bytes:
+                    self._too_large[(file_path, etag)] = None
+                    if len(self._too_large) > TOO_LARGE_KEYS:
+                        self._too_large.popitem(last=False)
+                    return None
+                chunks.append(chunk)
+        finally:
+            await stream.aclose()
+
+        data = b"".join(chunks)
+        self.put(file_path, etag, data)
+        return data
+
+
+async def _iter_bytes(data: bytes) -> AsyncIterator[bytes]:
+    yield data
+
+
+@lru_cache
+def get_object_cache() -> ObjectCache:
+    settings = get_settings()
+    return ObjectCache(
+        max_bytes=settings.OBJECT_CACHE_MAX_BYTES,
+        max_item_bytes=settings.OBJECT_CACHE_MAX_ITEM_BYTES,
+        ttl=settings.OBJECT_CACHE_TTL_SECONDS,
+    )
@@ -0,0 +1,96 @@
+import base64
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.contracts.requests.entry_requests import CountStrategy
+from app.core.settings import get_settings
+
+COUNT_CACHE_SIZE = 10_000
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    """Opaque cursor pointing right after the given row in `(created_at, id)` order."""
+    payload = json.dumps([created_at.isoformat(), str(id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), UUID(id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor",
+        )
+
+
+# compiled count query -> (count, expiry), least recently used first
+_count_cache: OrderedDict[str, tuple[int, float]] = OrderedDict()
+
+
+async def count_rows(
+    session: AsyncSession,
+    query: Select,
+    strategy: CountStrategy | None = None,
+) -> tuple[int, bool]:
+    """Count the rows matched by the query.
+
+    Returns the count and whether it is exact. Only `exact` always scans every
+    matching row, the other strategies trade precision for a cheaper query.
+    `cached` counts are never reported as exact, rows may have changed since
+    the count was taken.
+    """
+    settings = get_settings()
+    strategy = strategy or CountStrategy(settings.PAGINATION_COUNT_STRATEGY)
+
+    match strategy:
+        case CountStrategy.exact:
+            return await _count_exact(session, query), True
+
+        case CountStrategy.capped:
+            cap = settings.PAGINATION_COUNT_CAP
+            count = await _count_exact(session, query.limit(cap + 1))
+            if count > cap:
+                return cap, False
+            return count, True
+
+        case CountStrategy.estimate:
+            sql = _compile(session, query)
+            connection = await session.connection()
+            result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = result.scalar_one()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"]), False
+
+        case CountStrategy.cached:
+            key = _compile(session, query)
+            now = time.monotonic()
+            cached = _count_cache.get(key)
+            if cached is not None and cached[1] > now:
+                _count_cache.move_to_end(key)
+                return cached[0], False
+
+            count = await _count_exact(session, query)
+            _count_cache[key] = (count, now + settings.PAGINATION_COUNT_CACHE_TTL_SECONDS)
+            _count_cache.move_to_end(key)
+            while len(_count_cache) > COUNT_CACHE_SIZE:
+                _count_cache.popitem(last=False)
+            return count, False
+
+
+async def _count_exact(session: AsyncSession, query: Select) -> int:
+    return await session.scalar(select(func.count()).select_from(query.subquery()))
+
+
+def _compile(session: AsyncSession, query: Select) -> str:
+    dialect = session.get_bind().dialect
+    return str(query.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
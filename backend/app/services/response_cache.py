@@ -0,0 +1,195 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Awaitable, Callable
+from uuid import UUID
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from redis import RedisError
+from redis.asyncio import Redis
+
+from app.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheNamespace(str, Enum):
+    """Groups of cached responses that are invalidated together."""
+
+    entries = "entries"
+    share_links = "share_links"
+    views = "views"
+    volseg = "volseg"
+
+
+class ResponseCache(ABC):
+    """Cache of serialized responses for read endpoints.
+
+    Keys are derived from the request path, its query and the auth state, and are
+    prefixed with the current version of every namespace the response depends on.
+    Invalidating a namespace bumps its version, so all dependent keys stop matching
+    at once and simply expire.
+    """
+
+    async def get_or_compute(
+        self,
+        *,
+        request: Request,
+        namespaces: list[CacheNamespace],
+        ttl: int,
+        response_model: Any,
+        compute: Callable[[], Awaitable[Any]],
+        user_id: UUID | None = None,
+    ) -> Response:
+        if ttl <= 0:
+            return self._json_response(response_model, await compute(), cache_status="BYPASS")
+
+        try:
+            key = await self._build_key(request, namespaces, user_id)
+            content = await self.get(key)
+        except RedisError as e:
+            logger.warning("Response cache unavailable: %s", e)
+            key, content = None, None
+
+        if content is not None:
+            return Response(
+                content=content,
+                media_type="application/json",
+                headers={"X-Cache": "HIT"},
+            )
+
+        response = self._json_response(response_model, await compute(), cache_status="MISS")
+
+        if key is not None:
+            try:
+                await self.set(key, response.body, ttl)
+            except RedisError as e:
+                logger.warning("Response cache unavailable: %s", e)
+
+        return response
+
+    async def invalidate(self, *namespaces: CacheNamespace) -> None:
+        try:
+            await self.bump_versions([ns.value for ns in namespaces])
+        except RedisError as e:
+            logger.warning("Failed to invalidate response cache: %s", e)
+
+    def _json_response(self, response_model: Any, result: Any, cache_status: str) -> Response:
+        return Response(
+            content=TypeAdapter(response_model).dump_json(result),
+            media_type="application/json",
+            headers={"X-Cache": cache_status},
+        )
+
+    async def _build_key(
+        self,
+        request: Request,
+        namespaces: list[CacheNamespace],
+        user_id: UUID | None,
+    ) -> str:
+        names = [ns.value for ns in namespaces]
+        versions = await self.get_versions(names)
+        version_tag = ",".join(f"{name}={version}" for name, version in zip(names, versions))
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        auth = f"user:{user_id}" if user_id else "anonymous"
+        return f"response:{version_tag}:{request.url.path}?{query}:{auth}"
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: int) -> None: ...
+
+    @abstractmethod
+    async def get_versions(self, namespaces: list[str]) -> list[int]: ...
+
+    @abstractmethod
+    async def bump_versions(self, namespaces: list[str]) -> None: ...
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisResponseCache(ResponseCache):
+    def __init__(self, url: str):
+        self.client = Redis.from_url(url)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self.client.set(key, value, ex=ttl)
+
+    async def get_versions(self, namespaces: list[str]) -> list[int]:
+        versions = await self.client.mget([f"response-version:{ns}" for ns in namespaces])
+        return [int(version or 0) for version in versions]
+
+    async def bump_versions(self, namespaces: list[str]) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for ns in namespaces:
+                pipe.incr(f"response-version:{ns}")
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class InMemoryResponseCache(ResponseCache):
+    """Per-process fallback used in tests and when no Redis is configured.
+
+    Namespace versions are per process too, so a write only invalidates the
+    responses cached by the worker that handled it. `max_ttl` bounds how long
+    the other workers keep serving what they cached before.
+    """
+
+    def __init__(self, max_entries: int = 10_000, max_ttl: int | None = None):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._values: dict[str, tuple[bytes, float]] = {}
+        self._versions: dict[str, int] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        cached = self._values.get(key)
+        if cached is None or cached[1] <= time.monotonic():
+            return None
+        return cached[0]
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        if self.max_ttl is not None:
+            ttl = min(ttl, self.max_ttl)
+        now = time.monotonic()
+        if len(self._values) >= self.max_entries:
+            self._values = {k: v for k, v in self._values.items() if v[1] > now}
+            if len(self._values) >= self.max_entries:
+                self._values.clear()
+        self._values[key] = (value, now + ttl)
+
+    async def get_versions(self, namespaces: list[str]) -> list[int]:
+        return [self._versions.get(ns, 0) for ns in namespaces]
+
+    async def bump_versions(self, namespaces: list[str]) -> None:
+        for ns in namespaces:
+            self._versions[ns] = self._versions.get(ns, 0) + 1
+
+
+@lru_cache
+def get_response_cache() -> ResponseCache:
+    settings = get_settings()
+    if settings.REDIS_URL:
+        return RedisResponseCache(settings.REDIS_URL)
+    return InMemoryResponseCache(max_ttl=settings.RESPONSE_CACHE_LOCAL_TTL_SECONDS)
+
+
+def get_worker_response_cache() -> ResponseCache:
+    """Cache for a task to invalidate, the caller closes it.
+
+    Every task runs in its own event loop, so Redis connections can't be shared
+    between them. Without Redis, tasks run eagerly in the api process and share its cache.
+    """
+    settings = get_settings()
+    if settings.REDIS_URL:
+        return RedisResponseCache(settings.REDIS_URL)
+    return get_response_cache()
@@ -0,0 +1,27 @@
+import re
+
+from sqlalchemy import ColumnElement, func, literal_column
+
+from app.database.models.entry_model import SEARCH_CONFIG
+
+# Inlined like in the column definition, a bound regconfig can't be rendered as a literal
+# when count_rows compiles the query
+_SEARCH_CONFIG = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+
+HIGHLIGHT_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=30, MinWords=10"
+
+
+def build_prefix_tsquery(search_term: str) -> ColumnElement | None:
+    """Full-text query matching every word of the search term as a prefix.
+
+    Words are reduced to alphanumerics, so user input can't inject tsquery
+    operators. Returns `None` when the term has no searchable words.
+    """
+    words = re.findall(r"\w+", search_term)
+    if not words:
+        return None
+    return func.to_tsquery(_SEARCH_CONFIG, " & ".join(f"{word}:*" for word in words))
+
+
+def highlight(column: ColumnElement, tsquery: ColumnElement) -> ColumnElement:
+    return func.ts_headline(_SEARCH_CONFIG, column, tsquery, HIGHLIGHT_OPTIONS)
@@ -1,18 +1,22 @@
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 from app.api.v1.contracts.requests.share_link_requests import ShareLinkUpdateRequest
 from app.api.v1.contracts.responses.share_link_responses import ShareLinkResponse
 from app.database.models.share_link_model import ShareLink
 from app.database.models.user_model import User
 from app.database.session_manager import get_async_session
+from app.services.response_cache import CacheNamespace, ResponseCache, get_response_cache
 
 
 class ShareLinkService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, cache: ResponseCache):
         self.session = session
+        self.cache = cache
 
     async def get_share_link(
         self,
@@ -22,9 +26,6 @@ class ShareLinkService:
     ) -> ShareLinkResponse:
         share_link: ShareLink = await self.get_share_link_by_id(share_link_id)
 
-        # Load in relationships
-        await self.session.refresh(share_link, ["entry"])
-
         # Check permissions
         if share_link.entry.user_id != user.id:
             raise HTTPException(
@@ -42,9 +43,6 @@ class ShareLinkService:
     ) -> ShareLinkResponse:
         share_link: ShareLink = await self.get_share_link_by_id(share_link_id)
 
-        # Load in relationships
-        await self.session.refresh(share_link, ["entry"])
-
         # Check permissions
         if share_link.entry.user_id != user.id:
             raise HTTPException(
@@ -55,11 +53,18 @@ class ShareLinkService:
         for key, value in request.model_dump(exclude_unset=True).items():
             setattr(share_link, key, value)
         await self.session.commit()
+        await self.cache.invalidate(CacheNamespace.share_links)
 
         return ShareLinkResponse.model_validate(share_link)
 
     async def get_share_link_by_id(self, share_link_id: UUID) -> ShareLink:
-        share_link: ShareLink | None = await self.session.get(ShareLink, share_link_id)
+        # Callers check permissions against the entry, so load it along
+        result = await self.session.execute(
+            select(ShareLink)
+            .where(ShareLink.id == share_link_id)
+            .options(joinedload(ShareLink.entry)),
+        )
+        share_link: ShareLink | None = result.scalar_one_or_none()
         if share_link is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -70,5 +75,6 @@ class ShareLinkService:
 
 async def get_share_link_service(
     session: AsyncSession = Depends(get_async_session),
+    cache: ResponseCache = Depends(get_response_cache),
 ) -> ShareLinkService:
-    return ShareLinkService(session)
+    return ShareLinkService(session, cache)
@@ -0,0 +1,42 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable
+
+
+class _Flight[T]:
+    def __init__(self, task: asyncio.Task[T]):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight[K: Hashable, T]:
+    """Coalesces concurrent calls for the same key into one.
+
+    The first caller starts the call in its own task, callers arriving while it
+    runs wait for the same task and get its result or its exception. A caller
+    that is cancelled only stops waiting; the call itself is cancelled once
+    nobody is waiting for it anymore.
+    """
+
+    def __init__(self):
+        self._flights: dict[K, _Flight[T]] = {}
+
+    async def do(self, key: K, func: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(func()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Later callers start a new call instead of joining a cancelled one
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: K, flight: _Flight[T]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
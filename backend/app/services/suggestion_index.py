@@ -0,0 +1,87 @@
+import asyncio
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from functools import lru_cache
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.contracts.responses.entry_responses import SuggestionKind
+from app.core.settings import get_settings
+from app.database.models.entry_model import Entry
+from app.database.models.volseg_entry_model import VolsegEntry
+
+
+class SuggestionIndex:
+    """Sorted in-memory index for prefix completion of public entry names and volseg entry ids.
+
+    Lookups are a binary search over the sorted keys. Writes in this worker update
+    the index in place, writes in other workers are picked up by the periodic reload.
+    """
+
+    def __init__(self, refresh_interval: float = 300):
+        self.refresh_interval = refresh_interval
+        self._keys: list[tuple[str, str, SuggestionKind]] = []
+        self._counts: Counter[tuple[str, SuggestionKind]] = Counter()
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    async def suggest(
+        self,
+        session: AsyncSession,
+        prefix: str,
+        limit: int,
+    ) -> list[tuple[str, SuggestionKind]]:
+        if self._is_stale():
+            async with self._lock:
+                if self._is_stale():
+                    await self._reload(session)
+
+        key = prefix.casefold()
+        suggestions = []
+        for folded, text, kind in self._keys[bisect_left(self._keys, (key,)) :]:
+            if not folded.startswith(key) or len(suggestions) >= limit:
+                break
+            suggestions.append((text, kind))
+        return suggestions
+
+    def add(self, text: str, kind: SuggestionKind) -> None:
+        # Several entries can share a name, the key is kept until the last one is removed
+        self._counts[(text, kind)] += 1
+        if self._counts[(text, kind)] == 1:
+            insort(self._keys, (text.casefold(), text, kind))
+
+    def remove(self, text: str, kind: SuggestionKind) -> None:
+        count = self._counts[(text, kind)]
+        if count > 1:
+            self._counts[(text, kind)] = count - 1
+        elif count == 1:
+            del self._counts[(text, kind)]
+            key = (text.casefold(), text, kind)
+            index = bisect_left(self._keys, key)
+            if index < len(self._keys) and self._keys[index] == key:
+                del self._keys[index]
+
+    def _is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval
+
+    async def _reload(self, session: AsyncSession) -> None:
+        entry_names = await session.scalars(select(Entry.name).where(Entry.is_public == True))
+        volseg_entry_ids = await session.scalars(
+            select(VolsegEntry.entry_id).where(VolsegEntry.is_public == True)
+        )
+
+        counts = Counter((name, SuggestionKind.entry) for name in entry_names)
+        counts.update((entry_id, SuggestionKind.volseg_entry) for entry_id in volseg_entry_ids)
+
+        self._counts = counts
+        self._keys = sorted((text.casefold(), text, kind) for text, kind in counts)
+        self._loaded_at = time.monotonic()
+
+
+@lru_cache
+def get_suggestion_index():
+    return SuggestionIndex(
+        refresh_interval=get_settings().SUGGEST_INDEX_REFRESH_SECONDS,
+    )
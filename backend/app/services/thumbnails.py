@@ -0,0 +1,65 @@
+import io
+from bisect import bisect_left
+from enum import Enum
+from typing import Sequence
+
+from PIL import Image
+
+from app.services.http_cache import header_accepts
+
+THUMBNAIL_PREFIX = "/thumbnails"
+
+
+class ThumbnailFormat(str, Enum):
+    webp = "webp"
+    png = "png"
+
+    @property
+    def media_type(self) -> str:
+        return f"image/{self.value}"
+
+
+def negotiate_format(accept: str | None) -> ThumbnailFormat:
+    """WebP for clients that list it in `Accept`, PNG for everyone else.
+
+    Wildcards don't count, browsers without WebP support send `*/*` too.
+    """
+    if header_accepts(accept, ThumbnailFormat.webp.media_type):
+        return ThumbnailFormat.webp
+    return ThumbnailFormat.png
+
+
+def snap_width(width: int, widths: Sequence[int]) -> int:
+    """Smallest configured width that is at least `width`, so only a few variants are stored."""
+    widths = sorted(widths)
+    index = bisect_left(widths, width)
+    return widths[min(index, len(widths) - 1)]
+
+
+def variant_name(width: int, format: ThumbnailFormat) -> str:
+    return f"{width}.{format.value}"
+
+
+def variants_prefix(sha256: str) -> str:
+    # Keyed by the hash of the original, so variants are shared like the original blob
+    return f"{THUMBNAIL_PREFIX}/{sha256}/"
+
+
+def variant_path(sha256: str, width: int, format: ThumbnailFormat) -> str:
+    return f"{variants_prefix(sha256)}{variant_name(width, format)}"
+
+
+def render_variant(data: bytes, width: int, format: ThumbnailFormat, quality: int) -> bytes:
+    """Resize the image to `width` keeping its aspect ratio. Blocking, run it in a thread."""
+    with Image.open(io.BytesIO(data)) as image:
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+
+        output = io.BytesIO()
+        match format:
+            case ThumbnailFormat.webp:
+                image.save(output, format="WEBP", quality=quality, method=4)
+            case ThumbnailFormat.png:
+                image.save(output, format="PNG", optimize=True)
+        return output.getvalue()
@@ -1,32 +1,82 @@
-import json
+import asyncio
+import io
+from typing import Sequence
 from uuid import UUID, uuid4
 
 from fastapi import Depends, HTTPException, Response, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload
 
 from app.api.v1.contracts.requests.view_requests import ViewCreateRequest, ViewUpdateRequest
 from app.api.v1.contracts.responses.view_responses import ViewResponse
+from app.core.security import Principal
+from app.core.settings import get_settings
 from app.database.models.entry_model import Entry
+from app.database.models.job_model import JobKind
 from app.database.models.user_model import User
 from app.database.models.view_model import View
 from app.database.session_manager import get_async_session
 from app.services.entry_service import EntryService, get_entry_service
-from app.services.files.minio_storage import MinioStorage, get_minio_storage
+from app.services.files.blob_store import BlobStore, blob_path, blob_sha256s, get_blob_store
+from app.services.files.compression import decompress_stream
+from app.services.files.storage import PresignedStorage
+from app.services.files.storage_gc import StorageGarbageCollector, get_storage_gc
+from app.services.files.tiered_storage import get_storage
+from app.services.http_cache import (
+    conditional_json_response,
+    header_accepts,
+    is_not_modified,
+    not_modified,
+    resource_etag,
+    storage_etag,
+    validator_headers,
+)
+from app.services.job_service import JobService, get_job_service
+from app.services.object_cache import ObjectCache, get_object_cache
+from app.services.response_cache import CacheNamespace, ResponseCache, get_response_cache
+from app.services.thumbnails import (
+    ThumbnailFormat,
+    negotiate_format,
+    render_variant,
+    snap_width,
+    variant_name,
+    variant_path,
+    variants_prefix,
+)
+from app.tasks.storage_tasks import sweep_storage
+from app.tasks.view_tasks import compress_snapshot, render_thumbnail_variants
 
 
 class ViewService:
     def __init__(
         self,
         session: AsyncSession,
-        storage: MinioStorage,
+        storage: PresignedStorage,
+        blob_store: BlobStore,
+        storage_gc: StorageGarbageCollector,
         entry_service: EntryService,
+        cache: ResponseCache,
+        job_service: JobService,
+        object_cache: ObjectCache,
+        presigned_redirects: bool = False,
+        snapshot_compression: str | None = None,
+        thumbnail_widths: Sequence[int] = (128, 256, 512),
+        thumbnail_quality: int = 80,
     ):
         self.session = session
         self.storage = storage
+        self.blob_store = blob_store
+        self.storage_gc = storage_gc
         self.entry_service = entry_service
+        self.cache = cache
+        self.job_service = job_service
+        self.object_cache = object_cache
+        self.presigned_redirects = presigned_redirects
+        self.snapshot_compression = snapshot_compression
+        self.thumbnail_widths = thumbnail_widths
+        self.thumbnail_quality = thumbnail_quality
 
     async def create(
         self,
@@ -37,20 +87,23 @@ class ViewService:
         entry: Entry = await self.entry_service._get_entry_by_id(entry_id)
 
         # Check permissions
-        self._check_permissions(entry, user)
+        self._check_permissions(entry, user, require_owner=True)
 
         view_id = uuid4()
         thumbnail_url: str | None = None
+        thumbnail_etag: str | None = None
         snapshot_url: str | None = None
+        snapshot_etag: str | None = None
+        snapshot_content_encoding: str | None = None
+        jobs = []
 
-        # Save snapshot
+        # Save snapshot by content hash which doubles as its ETag, compression happens later
         if request.snapshot_json:
             try:
-                file_path = f"/entries/{entry_id}/views/{view_id}/snapshot.json"
-                snapshot_url = await self.storage.save(
-                    file_path=file_path,
-                    file_data=request.snapshot_json.file,
-                )
+                snapshot_blob = await self.blob_store.put(request.snapshot_json.file)
+                snapshot_url = blob_path(snapshot_blob.sha256, snapshot_blob.content_encoding)
+                snapshot_etag = snapshot_blob.sha256
+                snapshot_content_encoding = snapshot_blob.content_encoding
             except Exception as e:
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -60,17 +113,23 @@ class ViewService:
         # Save image
         if request.thumbnail_image:
             try:
-                file_path = f"/entries/{entry_id}/views/{view_id}/thumbnail.png"
-                thumbnail_url = await self.storage.save(
-                    file_path=file_path,
-                    file_data=request.thumbnail_image.file,
-                )
+                thumbnail_blob = await self.blob_store.put(request.thumbnail_image.file)
+                thumbnail_url = blob_path(thumbnail_blob.sha256)
+                thumbnail_etag = thumbnail_blob.sha256
             except Exception as e:
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail=f"Error saving image: {str(e)}",
                 )
 
+        # Heavy derived work runs on the workers once the view is committed
+        if snapshot_etag and snapshot_content_encoding is None and self.snapshot_compression:
+            job = self.job_service.create(JobKind.snapshot_compression, user)
+            jobs.append((compress_snapshot, job, snapshot_etag, self.snapshot_compression))
+        if thumbnail_etag:
+            job = self.job_service.create(JobKind.thumbnail_variants, user)
+            jobs.append((render_thumbnail_variants, job, thumbnail_etag))
+
         # Save view
         new_view = View(
             id=view_id,
@@ -78,37 +137,56 @@ class ViewService:
             description=request.description,
             is_thumbnail=request.is_thumbnail,
             snapshot_url=snapshot_url,
+            snapshot_etag=snapshot_etag,
+            snapshot_content_encoding=snapshot_content_encoding,
             thumbnail_url=thumbnail_url,
+            thumbnail_etag=thumbnail_etag,
             entry=entry,
         )
         self.session.add(new_view)
         await self.session.commit()
+        await self.cache.invalidate(CacheNamespace.views)
+
+        for task, job, *args in jobs:
+            await self.job_service.enqueue(task, job, *args)
 
         # Set this view as the entry's default thumbnail
         if request.is_thumbnail:
             await self._set_entry_as_default_thumbnail(new_view)
 
-        return ViewResponse.model_validate(new_view)
+        response = ViewResponse.model_validate(new_view)
+        response.job_ids = [job.id for _, job, *_ in jobs]
+        return response
 
-    async def get_view(self, user: User, view_id: UUID) -> ViewResponse:
+    async def get_view(
+        self,
+        user: Principal | None,
+        view_id: UUID,
+        if_none_match: str | None = None,
+    ) -> Response:
         view: View = await self._get_view_by_id(view_id)
 
-        # Load in relationships
-        await self.session.refresh(view, ["entry"])
-
         # Check permissions
         self._check_permissions(view.entry, user)
 
-        return ViewResponse.model_validate(view)
+        return conditional_json_response(
+            ViewResponse.model_validate(view),
+            etag=resource_etag(view.id, view.updated_at),
+            is_public=view.entry.is_public,
+            if_none_match=if_none_match,
+        )
 
     async def get_view_snapshot(
-        self, user: User | None, entry_id: UUID, view_id: UUID
-    ) -> JSONResponse:
+        self,
+        user: Principal | None,
+        entry_id: UUID,
+        view_id: UUID,
+        if_none_match: str | None = None,
+        accept_encoding: str | None = None,
+        version: str | None = None,
+    ) -> Response:
         view: View = await self._get_view_by_id(view_id)
 
-        # Load in relationships
-        await self.session.refresh(view, ["entry"])
-
         # Check permissions
         self._check_permissions(view.entry, user)
 
@@ -117,15 +195,39 @@ class ViewService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="View doesn't have a snapshot",
             )
+        self._check_version(version, view.snapshot_etag)
+
+        # Compressed snapshots are passed through when the client accepts the encoding
+        stored_encoding = view.snapshot_content_encoding
+        decode = stored_encoding is not None and not header_accepts(
+            accept_encoding, stored_encoding, wildcard="*"
+        )
+        content_encoding = None if decode else stored_encoding
+
+        headers = validator_headers(
+            storage_etag(view.snapshot_etag, content_encoding),
+            view.entry.is_public,
+            immutable=version is not None,
+        )
+        if stored_encoding is not None:
+            headers["Vary"] = "Accept-Encoding"
+
+        # Answered from the database alone, the storage is never touched
+        etag = headers.get("ETag")
+        if is_not_modified(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        if self.presigned_redirects and not decode:
+            return self._redirect_to_storage(view.snapshot_url)
 
         try:
-            snapshot = await self.storage.get(
-                file_path=view.snapshot_url,
+            snapshot_stream = await self.object_cache.open_stream(
+                self.storage, view.snapshot_url, view.snapshot_etag
             )
         except FileNotFoundError:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="Thumbnail not found",
+                detail="Snapshot not found",
             )
         except Exception as e:
             raise HTTPException(
@@ -133,20 +235,31 @@ class ViewService:
                 detail=f"{e}",
             )
 
-        return json.loads(snapshot)
+        if decode:
+            snapshot_stream = decompress_stream(snapshot_stream, stored_encoding)
+        elif content_encoding is not None:
+            headers["Content-Encoding"] = content_encoding
+
+        # The stored snapshot is already JSON, so pass it through without parsing
+        return StreamingResponse(
+            content=snapshot_stream,
+            media_type="application/json",
+            headers=headers,
+        )
 
     async def get_view_thumbnail(
         self,
         *,
-        user: User,
+        user: Principal | None,
         entry_id: UUID,
         view_id: UUID,
-    ) -> UUID:
+        if_none_match: str | None = None,
+        width: int | None = None,
+        accept: str | None = None,
+        version: str | None = None,
+    ) -> Response:
         view: View = await self._get_view_by_id(view_id)
 
-        # Load in relationships
-        await self.session.refresh(view, ["entry"])
-
         # Check permissions
         self._check_permissions(view.entry, user)
 
@@ -155,10 +268,23 @@ class ViewService:
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="View doesn't have a thumbnail",
             )
+        self._check_version(version, view.thumbnail_etag)
+        immutable = version is not None
+
+        # Resized variants are derived from thumbnails stored as blobs
+        if width is not None and view.thumbnail_etag is not None:
+            return await self._get_thumbnail_variant(view, width, accept, if_none_match, immutable)
+
+        etag = storage_etag(view.thumbnail_etag)
+        if is_not_modified(if_none_match, etag):
+            return not_modified(etag, view.entry.is_public, immutable)
+
+        if self.presigned_redirects:
+            return self._redirect_to_storage(view.thumbnail_url)
 
         try:
-            thumbnail_image = await self.storage.get(
-                file_path=view.thumbnail_url,
+            thumbnail_stream = await self.object_cache.open_stream(
+                self.storage, view.thumbnail_url, view.thumbnail_etag
             )
         except FileNotFoundError:
             raise HTTPException(
@@ -171,19 +297,21 @@ class ViewService:
                 detail=f"{e}",
             )
 
-        return Response(
-            content=thumbnail_image,
+        return StreamingResponse(
+            content=thumbnail_stream,
             media_type="image/png",
+            headers=validator_headers(etag, view.entry.is_public, immutable),
         )
 
-    async def list_views_for_entry(self, user: User | None, entry_id: UUID) -> list[ViewResponse]:
-        entry: Entry = await self.entry_service._get_entry_by_id(entry_id)
-
-        # Get entry's views
-        result = await self.session.execute(
-            select(View).where(View.entry_id == entry_id).options(selectinload(View.entry)),
+    async def list_views_for_entry(
+        self, user: Principal | None, entry_id: UUID
+    ) -> list[ViewResponse]:
+        # Get entry with its views
+        entry: Entry = await self.entry_service._get_entry_by_id(
+            entry_id,
+            joinedload(Entry.views),
         )
-        views: list[View] = result.scalars().all()
+        views: list[View] = entry.views
 
         # Check permissions
         self._check_permissions(entry, user)
@@ -207,11 +335,8 @@ class ViewService:
                 detail=f"Entry '{entry_id}' does not have view '{view_id}'",
             )
 
-        # Load in relationships
-        await self.session.refresh(view, ["entry"])
-
         # Check permissions
-        self._check_permissions(view.entry, user)
+        self._check_permissions(view.entry, user, require_owner=True)
 
         # Set this view as the entry's default thumbnail
         if updates.is_thumbnail:
@@ -223,6 +348,8 @@ class ViewService:
 
         self.session.add(view)
         await self.session.commit()
+        await self.cache.invalidate(CacheNamespace.views)
+        self._invalidate_objects(view)
 
         return ViewResponse.model_validate(view)
 
@@ -236,25 +363,27 @@ class ViewService:
         # Get view
         view = await self._get_view_by_id(view_id)
 
-        # Load in relationships
-        await self.session.refresh(view, ["entry"])
-
         # Check permissions
-        self._check_permissions(view.entry, user)
-
-        # Delete associated files
-        if view.snapshot_url:
-            await self.storage.delete(
-                file_path=view.snapshot_url,
-            )
-        if view.thumbnail_url:
-            await self.storage.delete(
-                file_path=view.thumbnail_url,
-            )
+        self._check_permissions(view.entry, user, require_owner=True)
+
+        # Queue associated files for deletion, shared blobs only lose a reference
+        blobs = blob_sha256s(view.snapshot_url, view.thumbnail_url)
+        files = [
+            file_path
+            for file_path in (view.snapshot_url, view.thumbnail_url)
+            if file_path and not blob_sha256s(file_path)
+        ]
+        self.storage_gc.schedule(*files)
+        await self.blob_store.release(*blobs)
 
         # Delete view
         await self.session.delete(view)
         await self.session.commit()
+        await self.cache.invalidate(CacheNamespace.views)
+        self._invalidate_objects(view)
+
+        if blobs or files:
+            await self.job_service.enqueue(sweep_storage, None)
 
         return view_id
 
@@ -266,9 +395,98 @@ class ViewService:
         )
         await self.session.execute(update(View).where(View.id == view.id).values(is_thumbnail=True))
         await self.session.commit()
+        await self.cache.invalidate(CacheNamespace.views)
+
+    async def _get_thumbnail_variant(
+        self,
+        view: View,
+        width: int,
+        accept: str | None,
+        if_none_match: str | None,
+        immutable: bool = False,
+    ) -> Response:
+        width = snap_width(width, self.thumbnail_widths)
+        format = negotiate_format(accept)
+
+        headers = validator_headers(
+            storage_etag(view.thumbnail_etag, variant_name(width, format)),
+            view.entry.is_public,
+            immutable,
+        )
+        headers["Vary"] = "Accept"
+        if is_not_modified(if_none_match, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        file_path = variant_path(view.thumbnail_etag, width, format)
+        try:
+            variant_stream = await self.object_cache.open_stream(
+                self.storage, file_path, headers["ETag"]
+            )
+        except FileNotFoundError:
+            # Rendered on first request and stored for the following ones
+            content = await self._render_thumbnail_variant(view, width, format)
+            await self.storage.save(file_path=file_path, file_data=io.BytesIO(content))
+            self.object_cache.put(file_path, headers["ETag"], content)
+            return Response(content=content, media_type=format.media_type, headers=headers)
+
+        return StreamingResponse(
+            content=variant_stream,
+            media_type=format.media_type,
+            headers=headers,
+        )
+
+    async def _render_thumbnail_variant(
+        self,
+        view: View,
+        width: int,
+        format: ThumbnailFormat,
+    ) -> bytes:
+        try:
+            original = await self.storage.get(file_path=view.thumbnail_url)
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Thumbnail not found",
+            )
+
+        try:
+            return await asyncio.to_thread(
+                render_variant, original, width, format, self.thumbnail_quality
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error rendering thumbnail: {str(e)}",
+            )
+
+    def _invalidate_objects(self, view: View) -> None:
+        # Only this process's cache, the others miss on the changed ETag or expire the entry
+        self.object_cache.invalidate(
+            view.snapshot_url,
+            view.thumbnail_url,
+            variants_prefix(view.thumbnail_etag) if view.thumbnail_etag else None,
+        )
+
+    def _check_version(self, version: str | None, etag: str | None) -> None:
+        """A versioned URL only serves the content it was issued for, it is cached for good."""
+        if version is not None and version != etag:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Content version not found",
+            )
+
+    def _redirect_to_storage(self, file_path: str) -> RedirectResponse:
+        return RedirectResponse(
+            url=self.storage.get_presigned_url(file_path),
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+        )
 
     async def _get_view_by_id(self, id: UUID) -> View:
-        view: View | None = await self.session.get(View, id)
+        # Every caller checks permissions against the entry, so load it along
+        result = await self.session.execute(
+            select(View).where(View.id == id).options(joinedload(View.entry)),
+        )
+        view: View | None = result.scalar_one_or_none()
         if view is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -276,13 +494,21 @@ class ViewService:
             )
         return view
 
-    async def _check_permissions(self, entry: Entry, user: User | None) -> bool:
-        if not entry.is_public and not user:
+    def _check_permissions(
+        self,
+        entry: Entry,
+        user: User | Principal | None,
+        require_owner: bool = False,
+    ) -> None:
+        """Public entries can be read by anyone, everything else only by the owner."""
+        if entry.is_public and not require_owner:
+            return
+        if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Entry is not public",
             )
-        if entry.user_id != user.id:
+        if not entry.has_owner(user.id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Don't have access to entry",
@@ -292,10 +518,25 @@ class ViewService:
 async def get_view_service(
     session: AsyncSession = Depends(get_async_session),
     entry_service: EntryService = Depends(get_entry_service),
-    storage: MinioStorage = Depends(get_minio_storage),
+    storage: PresignedStorage = Depends(get_storage),
+    blob_store: BlobStore = Depends(get_blob_store),
+    storage_gc: StorageGarbageCollector = Depends(get_storage_gc),
+    cache: ResponseCache = Depends(get_response_cache),
+    job_service: JobService = Depends(get_job_service),
+    object_cache: ObjectCache = Depends(get_object_cache),
 ) -> ViewService:
+    compression = get_settings().SNAPSHOT_COMPRESSION
     return ViewService(
         session=session,
         entry_service=entry_service,
         storage=storage,
+        blob_store=blob_store,
+        storage_gc=storage_gc,
+        cache=cache,
+        job_service=job_service,
+        object_cache=object_cache,
+        presigned_redirects=get_settings().MINIO_PRESIGNED_REDIRECTS,
+        snapshot_compression=None if compression == "none" else compression,
+        thumbnail_widths=get_settings().THUMBNAIL_WIDTHS,
+        thumbnail_quality=get_settings().THUMBNAIL_WEBP_QUALITY,
     )
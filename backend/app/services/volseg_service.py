@@ -1,57 +1,78 @@
+import asyncio
+import hashlib
+import re
 from uuid import UUID
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Response, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.contracts.requests.volseg_requests import VolsegUploadEntry
-from app.api.v1.contracts.responses.volseg_responses import VolsegEntryResponse
+from app.api.v1.contracts.requests.volseg_requests import (
+    FILENAME_PATTERN,
+    VolsegUploadCreateRequest,
+    VolsegUploadEntry,
+    VolsegUploadFile,
+)
+from app.api.v1.contracts.responses.entry_responses import SuggestionKind
+from app.api.v1.contracts.responses.volseg_responses import (
+    VolsegEntryResponse,
+    VolsegUploadFileResponse,
+    VolsegUploadResponse,
+)
+from app.database.models.job_model import Job, JobKind
+from app.database.models.mixins.timestamp_mixin import utcnow
 from app.database.models.user_model import User
 from app.database.models.volseg_entry_model import VolsegEntry
+from app.database.models.volseg_upload_model import VolsegUpload
 from app.database.session_manager import get_async_session
 from app.services.files.local_storage import LocalStorage, get_local_storage
-from app.services.files.minio_storage import MinioStorage
+from app.services.files.storage_gc import StorageGarbageCollector, get_storage_gc
+from app.services.http_cache import cache_control, conditional_json_response, resource_etag
+from app.services.job_service import JobService, get_job_service
+from app.services.response_cache import CacheNamespace, ResponseCache, get_response_cache
+from app.services.suggestion_index import SuggestionIndex, get_suggestion_index
+from app.tasks.storage_tasks import delete_local_directory, sweep_storage
+from app.tasks.volseg_tasks import UPLOADS_PATH, validate_volseg_entry
 
 
 class VolsegService:
     def __init__(
         self,
         session: AsyncSession,
-        storage: MinioStorage,
+        storage: LocalStorage,
+        suggestion_index: SuggestionIndex,
+        cache: ResponseCache,
+        job_service: JobService,
+        storage_gc: StorageGarbageCollector,
     ):
         self.session = session
         self.storage = storage
+        self.suggestion_index = suggestion_index
+        self.cache = cache
+        self.job_service = job_service
+        self.storage_gc = storage_gc
 
     async def create(self, user: User, request: VolsegUploadEntry) -> VolsegEntryResponse:
-        result = await self.session.execute(
-            select(VolsegEntry).where(
-                (VolsegEntry.user_id == user.id)
-                & (VolsegEntry.db_name == request.db_name)
-                & (VolsegEntry.entry_id == request.entry_id)
-            )
-        )
-        volseg_entries: list[VolsegEntry] = result.scalars().all()
-
         # Check if it already exists
-        if len(volseg_entries) != 0:
+        await self._check_entry_does_not_exist(user, request.db_name, request.entry_id)
+
+        base_path = self._entry_base_path(request.entry_id)
+        if await self.storage.exists(base_path):
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Volseg entry with dbname '{request.db_name}' and entryId '{request.entry_id}' already exists.",
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Files of volseg entry '{request.entry_id}' already exist",
             )
 
-        # Store all files
-        base_path = f"/volseg_entries/emdb/{request.entry_id}"
-        await self.storage.save(
-            file_path=f"{base_path}/{request.annotations.filename}",
-            file_data=request.annotations.file,
-        )
-        await self.storage.save(
-            file_path=f"{base_path}/{request.metadata.filename}",
-            file_data=request.metadata.file,
-        )
-        await self.storage.save(
-            file_path=f"{base_path}/{request.data.filename}",
-            file_data=request.data.file,
+        # Store all files concurrently. They stay on the local volume the volseg server reads,
+        # so MinIO multipart settings don't apply here, only to objects such as view blobs
+        await asyncio.gather(
+            *(
+                self.storage.save(
+                    file_path=f"{base_path}/{upload.filename}",
+                    file_data=upload.file,
+                )
+                for upload in (request.annotations, request.metadata, request.data)
+            )
         )
 
         volseg_entry = VolsegEntry(
@@ -60,23 +81,205 @@ class VolsegService:
             is_public=request.is_public,
             user=user,
         )
+        validation_job = self.job_service.create(JobKind.volseg_validation, user)
 
         self.session.add(volseg_entry)
         await self.session.commit()
+        await self.cache.invalidate(CacheNamespace.volseg)
+
+        filenames = (request.annotations.filename, request.metadata.filename, request.data.filename)
+        await self._enqueue_validation(validation_job, base_path, *filenames)
+
+        if volseg_entry.is_public:
+            self.suggestion_index.add(volseg_entry.entry_id, SuggestionKind.volseg_entry)
+
+        response = VolsegEntryResponse.model_validate(volseg_entry)
+        response.job_ids = [validation_job.id]
+        return response
+
+    async def create_upload(
+        self,
+        user: User,
+        request: VolsegUploadCreateRequest,
+    ) -> VolsegUploadResponse:
+        # Check if it already exists
+        await self._check_entry_does_not_exist(user, request.db_name, request.entry_id)
+
+        upload = VolsegUpload(
+            user=user,
+            **request.model_dump(),
+        )
+        self.session.add(upload)
+        await self.session.commit()
+
+        return await self._to_upload_response(upload)
+
+    async def get_upload(self, user: User, upload_id: UUID) -> VolsegUploadResponse:
+        upload: VolsegUpload = await self._get_upload_by_id(upload_id, user)
+        return await self._to_upload_response(upload)
+
+    async def upload_chunk(
+        self,
+        *,
+        user: User,
+        upload_id: UUID,
+        file: VolsegUploadFile,
+        offset: int,
+        chunk: bytes,
+        checksum: str,
+    ) -> VolsegUploadResponse:
+        digest = await asyncio.to_thread(hashlib.sha256, chunk)
+        if digest.hexdigest() != checksum.lower():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Chunk checksum mismatch",
+            )
+
+        # The row lock serializes chunks of the upload between the offset check and the write
+        upload: VolsegUpload = await self._get_upload_by_id(upload_id, user, lock=True)
+
+        # Chunks are only appended, a late or repeated chunk can't overwrite received bytes
+        file_path = self._upload_file_path(upload, file)
+        current_offset = await self.storage.size(file_path)
+        if offset != current_offset:
+            await self.session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Chunk offset {offset} does not match the current offset {current_offset}",
+                headers={"Upload-Offset": str(current_offset)},
+            )
+
+        await self.storage.append(file_path, chunk)
+        # Uploads that stop receiving chunks expire, see `expire_volseg_uploads`
+        upload.updated_at = utcnow()
+        await self.session.commit()
+
+        return await self._to_upload_response(upload)
+
+    async def finalize_upload(self, user: User, upload_id: UUID) -> VolsegEntryResponse:
+        upload: VolsegUpload = await self._get_upload_by_id(upload_id, user, lock=True)
+        base_path = self._entry_base_path(upload.entry_id)
+
+        # Check if it already exists
+        await self._check_entry_does_not_exist(user, upload.db_name, upload.entry_id)
+        if await self.storage.exists(base_path):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Files of volseg entry '{upload.entry_id}' already exist",
+            )
+
+        # Check all files were uploaded, a finalize that failed to commit may have staged them
+        staging_path = f"{UPLOADS_PATH}/{upload.id}/entry"
+        moves: list[tuple[str, str]] = []
+        for file in VolsegUploadFile:
+            staged_path = f"{staging_path}/{self._upload_filename(upload, file)}"
+            if await self.storage.exists(staged_path):
+                continue
+            if not await self.storage.exists(self._upload_file_path(upload, file)):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"File '{file.value}' has not been uploaded",
+                )
+            moves.append((self._upload_file_path(upload, file), staged_path))
+
+        # Files are staged under the upload's own directory, then moved into place at once
+        for source_path, staged_path in moves:
+            await self.storage.move(source_path, staged_path)
+
+        # The files are in place before anything is committed, a failed finalize keeps the
+        # upload so the client can retry it
+        try:
+            await self.storage.move_directory(staging_path, base_path)
+        except FileExistsError:
+            # Another user's upload of the same entry id was moved in since the check
+            detail = f"Files of volseg entry '{upload.entry_id}' already exist"
+            await self.session.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+        except OSError as e:
+            await self.session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to move the uploaded files: {e}",
+            )
+
+        volseg_entry = VolsegEntry(
+            db_name=upload.db_name,
+            entry_id=upload.entry_id,
+            is_public=upload.is_public,
+            user=user,
+        )
+        validation_job = self.job_service.create(JobKind.volseg_validation, user)
+        cleanup_job = self.job_service.create(JobKind.storage_cleanup, user)
+        self.session.add(volseg_entry)
+        await self.session.delete(upload)
+        try:
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            # Back to staging, where a retry of the finalize picks the files up again
+            await self.storage.move_directory(base_path, staging_path)
+            raise
+        await self.cache.invalidate(CacheNamespace.volseg)
+
+        filenames = (self._upload_filename(upload, file) for file in VolsegUploadFile)
+        await self._enqueue_validation(validation_job, base_path, *filenames)
+        await self.job_service.enqueue(
+            delete_local_directory, cleanup_job, f"{UPLOADS_PATH}/{upload.id}"
+        )
 
-        return VolsegEntryResponse.model_validate(volseg_entry)
+        if volseg_entry.is_public:
+            self.suggestion_index.add(volseg_entry.entry_id, SuggestionKind.volseg_entry)
+
+        response = VolsegEntryResponse.model_validate(volseg_entry)
+        response.job_ids = [validation_job.id, cleanup_job.id]
+        return response
 
     async def get_entry_by_id(
         self,
         user: User | None,
         volseg_entry_id: UUID,
-    ) -> VolsegEntryResponse:
+        if_none_match: str | None = None,
+    ) -> Response:
+        volseg_entry: VolsegEntry = await self._get_volseg_entry_by_id(volseg_entry_id)
+
+        # Check permissions
+        self._check_permissions(volseg_entry, user)
+
+        return conditional_json_response(
+            VolsegEntryResponse.model_validate(volseg_entry),
+            etag=resource_etag(volseg_entry.id, volseg_entry.updated_at),
+            is_public=volseg_entry.is_public,
+            if_none_match=if_none_match,
+        )
+
+    async def get_entry_file(
+        self,
+        user: User | None,
+        volseg_entry_id: UUID,
+        filename: str,
+    ) -> Response:
         volseg_entry: VolsegEntry = await self._get_volseg_entry_by_id(volseg_entry_id)
 
         # Check permissions
         self._check_permissions(volseg_entry, user)
 
-        return VolsegEntryResponse.model_validate(volseg_entry)
+        # The endpoint validates the filename too, but never serve files outside the entry
+        if "/" in filename or ".." in filename:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid filename '{filename}'",
+            )
+
+        try:
+            return await self.storage.file_response(
+                f"{self._entry_base_path(volseg_entry.entry_id)}/{filename}",
+                headers={"Cache-Control": cache_control(volseg_entry.is_public)},
+            )
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found",
+            )
 
     async def list_public_entries(self) -> list[VolsegEntryResponse]:
         result = await self.session.execute(
@@ -97,18 +300,97 @@ class VolsegService:
         volseg_entry: VolsegEntry = await self._get_volseg_entry_by_id(volseg_entry_id)
 
         # Check permissions
-        self._check_permissions(volseg_entry, user)
-
-        # Delete files
-        file_path = f"/volseg_entries/emdb/{volseg_entry.entry_id}"
-        await self.storage.delete_directory(file_path)
+        self._check_permissions(volseg_entry, user, require_owner=True)
 
-        # Delete view
+        # The files are queued in the same transaction and deleted once the entry is gone
+        self.storage_gc.schedule(
+            self._entry_base_path(volseg_entry.entry_id), prefix=True, local=True
+        )
         await self.session.delete(volseg_entry)
         await self.session.commit()
+        await self.cache.invalidate(CacheNamespace.volseg, CacheNamespace.entries)
+
+        await self.job_service.enqueue(sweep_storage, None)
+
+        if volseg_entry.is_public:
+            self.suggestion_index.remove(volseg_entry.entry_id, SuggestionKind.volseg_entry)
 
         return volseg_entry.id
 
+    async def _check_entry_does_not_exist(self, user: User, db_name: str, entry_id: str) -> None:
+        result = await self.session.execute(
+            select(VolsegEntry).where(
+                (VolsegEntry.user_id == user.id)
+                & (VolsegEntry.db_name == db_name)
+                & (VolsegEntry.entry_id == entry_id)
+            )
+        )
+        volseg_entries: list[VolsegEntry] = result.scalars().all()
+
+        if len(volseg_entries) != 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Volseg entry with dbname '{db_name}' and entryId '{entry_id}' already exists.",
+            )
+
+    async def _get_upload_by_id(self, id: UUID, user: User, lock: bool = False) -> VolsegUpload:
+        """Load the user's upload, with `lock` its row stays locked until the transaction ends."""
+        upload: VolsegUpload | None = await self.session.get(VolsegUpload, id, with_for_update=lock)
+        if upload is None or upload.user_id != user.id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload not found",
+            )
+        return upload
+
+    async def _to_upload_response(self, upload: VolsegUpload) -> VolsegUploadResponse:
+        return VolsegUploadResponse(
+            id=upload.id,
+            created_at=upload.created_at,
+            updated_at=upload.updated_at,
+            db_name=upload.db_name,
+            entry_id=upload.entry_id,
+            is_public=upload.is_public,
+            files={
+                file.value: VolsegUploadFileResponse(
+                    filename=self._upload_filename(upload, file),
+                    offset=await self.storage.size(self._upload_file_path(upload, file)),
+                )
+                for file in VolsegUploadFile
+            },
+        )
+
+    async def _enqueue_validation(
+        self,
+        job: Job,
+        base_path: str,
+        annotations_filename: str,
+        metadata_filename: str,
+        data_filename: str,
+    ) -> None:
+        await self.job_service.enqueue(
+            validate_volseg_entry,
+            job,
+            f"{base_path}/{annotations_filename}",
+            f"{base_path}/{metadata_filename}",
+            f"{base_path}/{data_filename}",
+        )
+
+    def _entry_base_path(self, entry_id: str) -> str:
+        # Uploads created before entry ids were validated could still escape the directory
+        if not re.match(FILENAME_PATTERN, entry_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid entry id '{entry_id}'",
+            )
+        return f"/volseg_entries/emdb/{entry_id}"
+
+    def _upload_file_path(self, upload: VolsegUpload, file: VolsegUploadFile) -> str:
+        return f"{UPLOADS_PATH}/{upload.id}/{file.value}"
+
+    def _upload_filename(self, upload: VolsegUpload, file: VolsegUploadFile) -> str:
+        return getattr(upload, f"{file.value}_filename")
+
     async def _get_volseg_entry_by_id(self, id: UUID) -> VolsegEntry:
         volseg_entry: VolsegEntry | None = await self.session.get(VolsegEntry, id)
         if volseg_entry is None:
@@ -118,8 +400,16 @@ class VolsegService:
             )
         return volseg_entry
 
-    async def _check_permissions(self, volseg_entry: VolsegEntry, user: User | None) -> None:
-        if not volseg_entry.is_public and not user:
+    def _check_permissions(
+        self,
+        volseg_entry: VolsegEntry,
+        user: User | None,
+        require_owner: bool = False,
+    ) -> None:
+        """Public entries can be read by anyone, everything else only by the owner."""
+        if volseg_entry.is_public and not require_owner:
+            return
+        if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Entry is not public",
@@ -134,8 +424,16 @@ class VolsegService:
 async def get_volseg_service(
     session: AsyncSession = Depends(get_async_session),
     storage: LocalStorage = Depends(get_local_storage),
+    suggestion_index: SuggestionIndex = Depends(get_suggestion_index),
+    cache: ResponseCache = Depends(get_response_cache),
+    job_service: JobService = Depends(get_job_service),
+    storage_gc: StorageGarbageCollector = Depends(get_storage_gc),
 ) -> VolsegService:
     return VolsegService(
         session=session,
         storage=storage,
+        suggestion_index=suggestion_index,
+        cache=cache,
+        job_service=job_service,
+        storage_gc=storage_gc,
     )
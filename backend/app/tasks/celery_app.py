@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+from uuid import UUID
+
+from celery import Celery
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import get_settings
+from app.database.models.job_model import Job, JobStatus
+from app.database.session_manager import get_worker_session_manager
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+broker_url = settings.CELERY_BROKER_URL or settings.REDIS_URL
+
+celery_app = Celery(
+    "cellim_viewer",
+    broker=broker_url or "memory://",
+    include=[
+        "app.tasks.storage_tasks",
+        "app.tasks.view_tasks",
+        "app.tasks.volseg_tasks",
+    ],
+)
+celery_app.conf.update(
+    # Job status lives in the jobs table, task results are not kept
+    task_ignore_result=True,
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    # Without a broker there is no worker to pick the tasks up
+    task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER or broker_url is None,
+    # Run by `celery beat`; all are safe to run on several nodes at once
+    beat_schedule={
+        "sweep-storage": {
+            "task": "app.tasks.storage_tasks.sweep_storage",
+            "schedule": settings.STORAGE_GC_SWEEP_INTERVAL_SECONDS,
+            "args": (None,),
+        },
+        "reconcile-storage": {
+            "task": "app.tasks.storage_tasks.reconcile_storage",
+            "schedule": settings.STORAGE_GC_RECONCILE_INTERVAL_SECONDS,
+            "args": (None,),
+        },
+        "compress-pending-snapshots": {
+            "task": "app.tasks.view_tasks.compress_pending_snapshots",
+            "schedule": settings.SNAPSHOT_COMPRESSION_RETRY_INTERVAL_SECONDS,
+            "args": (None,),
+        },
+        "expire-volseg-uploads": {
+            "task": "app.tasks.volseg_tasks.expire_volseg_uploads",
+            "schedule": settings.VOLSEG_UPLOAD_EXPIRE_INTERVAL_SECONDS,
+            "args": (None,),
+        },
+    },
+)
+
+
+def run_job(
+    job_id: str | None,
+    func: Callable[[AsyncSession], Awaitable[dict[str, Any] | None]],
+) -> None:
+    """Run the task body in a fresh event loop, recording its outcome on the job."""
+    asyncio.run(_run_job(UUID(job_id) if job_id else None, func))
+
+
+async def _run_job(
+    job_id: UUID | None,
+    func: Callable[[AsyncSession], Awaitable[dict[str, Any] | None]],
+) -> None:
+    async with get_worker_session_manager().session() as session:
+        await _set_status(session, job_id, status=JobStatus.running)
+        try:
+            result = await func(session)
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            await session.rollback()
+            await _set_status(session, job_id, status=JobStatus.failed, error=str(e))
+            return
+        await _set_status(session, job_id, status=JobStatus.succeeded, result=result)
+
+
+async def _set_status(session: AsyncSession, job_id: UUID | None, **values: Any) -> None:
+    if job_id is None:
+        return
+    await session.execute(update(Job).where(Job.id == job_id).values(**values))
+    await session.commit()
@@ -0,0 +1,45 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.files.blob_store import get_blob_store
+from app.services.files.local_storage import get_local_storage
+from app.services.files.minio_storage import get_minio_storage
+from app.services.files.storage_gc import StorageGarbageCollector, get_storage_gc
+from app.tasks.celery_app import celery_app, run_job
+
+
+@celery_app.task
+def sweep_storage(job_id: str | None) -> None:
+    """Delete queued objects and unreferenced blobs."""
+
+    async def sweep(session: AsyncSession) -> dict:
+        storage_gc = await create_storage_gc(session)
+        return {"deleted": await storage_gc.sweep()}
+
+    run_job(job_id, sweep)
+
+
+@celery_app.task
+def reconcile_storage(job_id: str | None) -> None:
+    """Queue stored objects the database doesn't know about, then sweep them."""
+
+    async def reconcile(session: AsyncSession) -> dict:
+        storage_gc = await create_storage_gc(session)
+        return {"orphaned": await storage_gc.reconcile(), "deleted": await storage_gc.sweep()}
+
+    run_job(job_id, reconcile)
+
+
+@celery_app.task
+def delete_local_directory(job_id: str | None, dir_path: str) -> None:
+    """Remove a directory of volseg files that is no longer referenced."""
+
+    async def delete(session: AsyncSession) -> None:
+        await get_local_storage().delete_directory(dir_path)
+
+    run_job(job_id, delete)
+
+
+async def create_storage_gc(session: AsyncSession) -> StorageGarbageCollector:
+    storage = get_minio_storage()
+    blob_store = await get_blob_store(session, storage)
+    return await get_storage_gc(session, storage, blob_store, get_local_storage())
@@ -0,0 +1,129 @@
+import asyncio
+import io
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import get_settings
+from app.database.models.view_model import View
+from app.services.files.blob_store import BLOB_PREFIX, blob_path, blob_sha256s, get_blob_store
+from app.services.files.minio_storage import get_minio_storage
+from app.services.response_cache import CacheNamespace, get_worker_response_cache
+from app.services.thumbnails import ThumbnailFormat, render_variant, variant_path
+from app.tasks.celery_app import celery_app, run_job
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task
+def render_thumbnail_variants(job_id: str | None, sha256: str) -> None:
+    """Render every configured thumbnail width and format ahead of the first request."""
+
+    async def render(session: AsyncSession) -> dict:
+        settings = get_settings()
+        storage = get_minio_storage()
+        original = await storage.get(blob_path(sha256))
+
+        rendered = []
+        for width in settings.THUMBNAIL_WIDTHS:
+            for format in ThumbnailFormat:
+                file_path = variant_path(sha256, width, format)
+                if await storage.exists(file_path):
+                    continue
+                content = await asyncio.to_thread(
+                    render_variant, original, width, format, settings.THUMBNAIL_WEBP_QUALITY
+                )
+                await storage.save(file_path=file_path, file_data=io.BytesIO(content))
+                rendered.append(file_path)
+
+        return {"rendered": rendered}
+
+    run_job(job_id, render)
+
+
+@celery_app.task
+def compress_snapshot(job_id: str | None, sha256: str, content_encoding: str) -> None:
+    """Replace a raw snapshot blob with a compressed copy and point its views at it."""
+
+    async def compress(session: AsyncSession) -> dict | None:
+        encoded_path = await _compress_snapshot(session, sha256, content_encoding)
+        if encoded_path is None:
+            return None
+        return {"snapshot_url": encoded_path}
+
+    run_job(job_id, compress)
+
+
+@celery_app.task
+def compress_pending_snapshots(job_id: str | None) -> None:
+    """Compress snapshots still stored raw, like those whose compression job was lost."""
+
+    async def compress(session: AsyncSession) -> dict | None:
+        settings = get_settings()
+        if settings.SNAPSHOT_COMPRESSION == "none":
+            return None
+
+        # Younger snapshots likely have their job still queued
+        cutoff = datetime.now(timezone.utc) - timedelta(
+            seconds=settings.SNAPSHOT_COMPRESSION_RETRY_AFTER_SECONDS
+        )
+        raw_paths = await session.scalars(
+            select(View.snapshot_url)
+            .where(
+                View.snapshot_content_encoding.is_(None),
+                View.snapshot_url.startswith(f"{BLOB_PREFIX}/"),
+                View.updated_at < cutoff,
+            )
+            .distinct()
+            .limit(settings.SNAPSHOT_COMPRESSION_RETRY_BATCH_SIZE)
+        )
+
+        compressed, failed = [], []
+        for sha256 in blob_sha256s(*raw_paths):
+            try:
+                if await _compress_snapshot(session, sha256, settings.SNAPSHOT_COMPRESSION):
+                    compressed.append(sha256)
+            except Exception:
+                # Left raw for the next run, the others are still worth compressing
+                logger.exception("Failed to compress snapshot %s", sha256)
+                await session.rollback()
+                failed.append(sha256)
+
+        return {"compressed": compressed, "failed": failed}
+
+    run_job(job_id, compress)
+
+
+async def _compress_snapshot(
+    session: AsyncSession, sha256: str, content_encoding: str
+) -> str | None:
+    """Compress the blob and repoint its views, return the new path or None if already done."""
+    storage = get_minio_storage()
+    blob_store = await get_blob_store(session, storage)
+
+    paths = await blob_store.encode(sha256, content_encoding)
+    if paths is None:
+        return None
+    raw_path, encoded_path = paths
+
+    await session.execute(
+        update(View)
+        .where(View.snapshot_url == raw_path)
+        .values(snapshot_url=encoded_path, snapshot_content_encoding=content_encoding)
+    )
+    await session.commit()
+
+    # Cached view responses still point at the raw snapshot
+    cache = get_worker_response_cache()
+    try:
+        await cache.invalidate(CacheNamespace.views)
+    finally:
+        await cache.close()
+
+    # Readers that loaded the view before the commit may still stream the raw object,
+    # it is only removed once the new path is visible
+    await storage.delete(raw_path)
+
+    return encoded_path
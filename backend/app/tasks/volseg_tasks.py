@@ -0,0 +1,102 @@
+import asyncio
+import json
+import zipfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import get_settings
+from app.database.models.volseg_upload_model import VolsegUpload
+from app.services.files.local_storage import get_local_storage
+from app.tasks.celery_app import celery_app, run_job
+
+# Uploads live on the same volume as the entries, so finalizing one is a rename
+UPLOADS_PATH = "/volseg_entries/.uploads"
+
+
+@celery_app.task
+def validate_volseg_entry(
+    job_id: str | None,
+    annotations_path: str,
+    metadata_path: str,
+    data_path: str,
+) -> None:
+    """Check the uploaded volseg files are readable and index the archive contents."""
+
+    async def validate(session: AsyncSession) -> dict:
+        storage = get_local_storage()
+        for file_path in (annotations_path, metadata_path):
+            _check_json(storage.path(file_path))
+        return _index_archive(storage.path(data_path))
+
+    run_job(job_id, validate)
+
+
+@celery_app.task
+def expire_volseg_uploads(job_id: str | None) -> None:
+    """Delete uploads that stopped receiving chunks, and upload files no upload owns."""
+
+    async def expire(session: AsyncSession) -> dict:
+        ttl = timedelta(seconds=get_settings().VOLSEG_UPLOAD_TTL_SECONDS)
+        cutoff = datetime.now(timezone.utc) - ttl
+        storage = get_local_storage()
+
+        # A finalize holds the row lock, so an upload being finalized is never expired
+        expired = list(
+            await session.scalars(
+                delete(VolsegUpload)
+                .where(VolsegUpload.updated_at < cutoff)
+                .returning(VolsegUpload.id)
+            )
+        )
+        await session.commit()
+
+        # Left behind by finalized uploads whose cleanup never ran
+        live = {str(upload_id) for upload_id in await session.scalars(select(VolsegUpload.id))}
+        directories = await asyncio.to_thread(
+            _directories_modified_before, storage.path(UPLOADS_PATH), cutoff
+        )
+        orphaned = [name for name in directories if name not in live]
+
+        for name in [*map(str, expired), *orphaned]:
+            await storage.delete_directory(f"{UPLOADS_PATH}/{name}")
+
+        return {"expired": [str(upload_id) for upload_id in expired], "orphaned": orphaned}
+
+    run_job(job_id, expire)
+
+
+def _directories_modified_before(path: Path, cutoff: datetime) -> list[str]:
+    if not path.is_dir():
+        return []
+    return [
+        child.name
+        for child in path.iterdir()
+        if child.is_dir() and datetime.fromtimestamp(child.stat().st_mtime, timezone.utc) < cutoff
+    ]
+
+
+def _check_json(path: Path) -> None:
+    with path.open("rb") as file:
+        try:
+            json.load(file)
+        except ValueError as e:
+            raise ValueError(f"'{path.name}' is not valid JSON: {e}")
+
+
+def _index_archive(path: Path) -> dict:
+    try:
+        with zipfile.ZipFile(path) as archive:
+            # Reads every member and checks its CRC
+            if (corrupt := archive.testzip()) is not None:
+                raise ValueError(f"'{path.name}' has a corrupt member '{corrupt}'")
+            members = [info for info in archive.infolist() if not info.is_dir()]
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"'{path.name}' is not a zip archive: {e}")
+
+    return {
+        "archive_files": [info.filename for info in members],
+        "archive_size": sum(info.file_size for info in members),
+    }
@@ -0,0 +1,93 @@
+import pytest
+
+from app.database.models import Entry, ShareLink
+from tests.utils import as_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def entries(session_factory, seed):
+    async with session_factory() as session:
+        session.add(seed.owner)
+        session.add(seed.public_volseg_entry)
+
+        def entry(name: str, description: str | None, is_public: bool = True) -> Entry:
+            return Entry(
+                name=name,
+                description=description,
+                is_public=is_public,
+                user=seed.owner,
+                volseg_entry=seed.public_volseg_entry,
+                link=ShareLink(),
+            )
+
+        session.add_all(
+            [
+                entry("Mitochondria in HeLa cells", "Cristae imaged at high resolution"),
+                entry("Ribosome", "Bound to the outer membrane of mitochondria"),
+                entry("Actin filaments", None),
+                entry("Mitochondria draft", None, is_public=False),
+            ]
+        )
+        await session.commit()
+
+
+async def search(client, q: str, **params) -> dict:
+    response = await client.get("/api/v1/entries/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_name_matches_rank_above_description_matches(client, entries):
+    page = await search(client, "mitochondria")
+
+    assert page["total_items"] == 2
+    assert [hit["entry"]["name"] for hit in page["items"]] == [
+        "Mitochondria in HeLa cells",
+        "Ribosome",
+    ]
+    ranks = [hit["rank"] for hit in page["items"]]
+    assert ranks == sorted(ranks, reverse=True)
+    assert ranks[0] > ranks[1]
+
+
+async def test_words_match_as_prefixes(client, entries):
+    page = await search(client, "mito hela")
+
+    assert [hit["entry"]["name"] for hit in page["items"]] == ["Mitochondria in HeLa cells"]
+
+
+async def test_matches_are_highlighted(client, entries):
+    name_hit, description_hit = (await search(client, "mitochondria"))["items"]
+
+    assert name_hit["name_highlight"] == "<mark>Mitochondria</mark> in HeLa cells"
+    assert "<mark>" not in name_hit["description_highlight"]
+    assert description_hit["name_highlight"] == "Ribosome"
+    assert "<mark>mitochondria</mark>" in description_hit["description_highlight"]
+
+
+async def test_search_ignores_private_entries_and_operators(client, entries):
+    assert (await search(client, "draft"))["items"] == []
+    # Only the words are searched for, not tsquery operators
+    assert (await search(client, "!&|"))["total_items"] == 0
+
+
+async def test_listings_match_substrings(client, seed, entries):
+    # Not a prefix of any word, so full-text search doesn't find it
+    assert (await search(client, "ochond"))["items"] == []
+
+    response = await client.get("/api/v1/entries", params={"search_term": "ochond"})
+    assert {entry["name"] for entry in response.json()["items"]} == {
+        "Ribosome",
+        "Mitochondria in HeLa cells",
+    }
+
+    response = await client.get(
+        "/api/v1/me/entries", params={"search_term": "ochond"}, headers=as_user(seed.owner)
+    )
+    assert {entry["name"] for entry in response.json()["items"]} == {
+        "Ribosome",
+        "Mitochondria in HeLa cells",
+        "Mitochondria draft",
+    }
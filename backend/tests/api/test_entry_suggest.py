@@ -0,0 +1,70 @@
+import pytest
+
+from app.database.models import Entry, ShareLink
+from tests.utils import as_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_entries(session_factory, seed, *names: str, is_public: bool = True) -> None:
+    async with session_factory() as session:
+        session.add_all([seed.owner, seed.public_volseg_entry])
+        session.add_all(
+            Entry(
+                name=name,
+                is_public=is_public,
+                user=seed.owner,
+                volseg_entry=seed.public_volseg_entry,
+                link=ShareLink(),
+            )
+            for name in names
+        )
+        await session.commit()
+
+
+async def suggest(client, q: str, headers: dict = {}, **params) -> list[tuple[str, str]]:
+    response = await client.get(
+        "/api/v1/entries/suggest", params={"q": q, **params}, headers=headers
+    )
+    assert response.status_code == 200
+    return [(suggestion["text"], suggestion["kind"]) for suggestion in response.json()]
+
+
+async def test_suggestions_match_the_prefix(client, seed):
+    assert await suggest(client, "pub") == [("public", "entry")]
+    # Case-insensitive, and volseg entries are suggested by their entry id
+    assert await suggest(client, "PUB") == [("public", "entry")]
+    assert await suggest(client, "emd") == [("emd-1", "volseg_entry")]
+    assert await suggest(client, "ublic") == []
+
+
+async def test_suggestions_are_sorted_and_limited(client, seed, session_factory):
+    await add_entries(session_factory, seed, "Cell c", "Cell a", "Cell b", "cell d")
+
+    assert await suggest(client, "cell", limit=3) == [
+        ("Cell a", "entry"),
+        ("Cell b", "entry"),
+        ("Cell c", "entry"),
+    ]
+    assert len(await suggest(client, "cell")) == 4
+
+    response = await client.get("/api/v1/entries/suggest", params={"q": "cell", "limit": 0})
+    assert response.status_code == 422
+
+
+async def test_private_entries_are_not_suggested_to_their_owner(client, seed):
+    headers = as_user(seed.owner)
+
+    assert await suggest(client, "private", headers) == []
+    assert await suggest(client, "emd-2", headers) == []
+
+
+async def test_stale_index_is_rebuilt(client, seed, session_factory, suggestion_index):
+    assert await suggest(client, "new") == []
+
+    # Written by another worker, this worker's index doesn't know about it yet
+    await add_entries(session_factory, seed, "New entry")
+    assert await suggest(client, "new") == []
+
+    suggestion_index._loaded_at -= suggestion_index.refresh_interval + 1
+    assert await suggest(client, "new") == [("New entry", "entry")]
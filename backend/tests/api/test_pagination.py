@@ -0,0 +1,115 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.settings import get_settings
+from app.database.models import Entry, ShareLink
+from app.services import pagination
+from tests.utils import as_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def count_cache(monkeypatch):
+    monkeypatch.setattr(pagination, "_count_cache", type(pagination._count_cache)())
+    return pagination._count_cache
+
+
+def count_statements(statements: list[str]) -> list[str]:
+    return [sql for sql in statements if "count(" in sql or sql.startswith("EXPLAIN")]
+
+
+async def list_entries(client, user, **params) -> dict:
+    response = await client.get("/api/v1/me/entries", params=params, headers=as_user(user))
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_exact_count(client, seed, sql_statements):
+    sql_statements.clear()
+
+    page = await list_entries(client, seed.owner, count="exact")
+
+    assert (page["total_items"], page["total_items_exact"]) == (2, True)
+    assert len(count_statements(sql_statements)) == 1
+
+
+async def test_estimated_count_comes_from_the_plan(client, seed, sql_statements):
+    sql_statements.clear()
+
+    page = await list_entries(client, seed.owner, count="estimate")
+
+    assert page["total_items_exact"] is False
+    assert page["total_items"] >= 0
+    [statement] = count_statements(sql_statements)
+    assert statement.startswith("EXPLAIN")
+
+
+@pytest.mark.parametrize(("cap", "total_items", "exact"), [(1, 1, False), (2, 2, True)])
+async def test_capped_count(client, seed, sql_statements, monkeypatch, cap, total_items, exact):
+    monkeypatch.setattr(get_settings(), "PAGINATION_COUNT_CAP", cap)
+    sql_statements.clear()
+
+    page = await list_entries(client, seed.owner, count="capped")
+
+    assert (page["total_items"], page["total_items_exact"]) == (total_items, exact)
+    [statement] = count_statements(sql_statements)
+    # Stops scanning one row past the cap
+    assert "LIMIT" in statement
+
+
+async def test_cached_count_is_reused_and_inexact(client, seed, sql_statements):
+    sql_statements.clear()
+
+    first = await list_entries(client, seed.owner, count="cached")
+    second = await list_entries(client, seed.owner, count="cached", per_page=1)
+
+    assert (first["total_items"], first["total_items_exact"]) == (2, False)
+    assert (second["total_items"], second["total_items_exact"]) == (2, False)
+    # Only the first request counted
+    assert len(count_statements(sql_statements)) == 1
+
+
+async def test_count_cache_is_bounded(client, seed, count_cache, monkeypatch):
+    monkeypatch.setattr(pagination, "COUNT_CACHE_SIZE", 2)
+
+    await list_entries(client, seed.owner, count="cached", search_term="a")
+    [first_key] = count_cache
+    for search_term in ("b", "c"):
+        await list_entries(client, seed.owner, count="cached", search_term=search_term)
+
+    # The least recently used count was dropped
+    assert len(count_cache) == 2
+    assert first_key not in count_cache
+
+
+async def test_cursors_walk_ties_on_created_at(client, seed, session_factory):
+    created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    async with session_factory() as session:
+        session.add_all([seed.owner, seed.public_volseg_entry])
+        session.add_all(
+            Entry(
+                name=f"Tied {i}",
+                user=seed.owner,
+                volseg_entry=seed.public_volseg_entry,
+                link=ShareLink(),
+                created_at=created_at,
+            )
+            for i in range(5)
+        )
+        await session.commit()
+
+    page = await list_entries(client, seed.owner, per_page=2)
+    assert page["page"] == 1
+    names = [entry["name"] for entry in page["items"]]
+    while page["next_cursor"]:
+        page = await list_entries(client, seed.owner, per_page=2, cursor=page["next_cursor"])
+        # A cursor page has no number
+        assert page["page"] is None
+        names.extend(entry["name"] for entry in page["items"])
+
+    # The two seeded entries are newer than the tied ones
+    assert len(names) == len(set(names)) == 7
+    assert set(names[2:]) == {f"Tied {i}" for i in range(5)}
+    assert len(page["items"]) == 1
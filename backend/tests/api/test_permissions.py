@@ -0,0 +1,224 @@
+import pytest
+
+from app.core.settings import get_settings
+from tests.utils import as_user
+
+pytestmark = pytest.mark.anyio
+
+ANONYMOUS = "anonymous"
+OWNER = "owner"
+OTHER_USER = "other_user"
+
+
+def headers_for(seed, requester: str) -> dict[str, str]:
+    if requester == ANONYMOUS:
+        return {}
+    return as_user(getattr(seed, requester))
+
+
+def entry_paths(entry) -> list[str]:
+    view = entry.views[0]
+    return [
+        f"/api/v1/entries/{entry.id}",
+        f"/api/v1/entries/{entry.id}/thumbnail",
+        f"/api/v1/entries/{entry.id}/views",
+        f"/api/v1/entries/{entry.id}/views/{view.id}",
+    ]
+
+
+@pytest.mark.parametrize(
+    ("requester", "status_code"),
+    [(ANONYMOUS, 401), (OTHER_USER, 403), (OWNER, 200)],
+)
+async def test_private_entry_is_only_readable_by_owner(client, seed, requester, status_code):
+    for path in entry_paths(seed.private_entry):
+        response = await client.get(path, headers=headers_for(seed, requester))
+        assert response.status_code == status_code, path
+
+
+@pytest.mark.parametrize("requester", [ANONYMOUS, OTHER_USER, OWNER])
+async def test_public_entry_is_readable_by_anyone(client, seed, requester):
+    for path in entry_paths(seed.public_entry):
+        if requester == ANONYMOUS and path.endswith("/thumbnail"):
+            # The entry thumbnail endpoint always requires a signed-in user.
+            continue
+        response = await client.get(path, headers=headers_for(seed, requester))
+        assert response.status_code == 200, path
+
+
+@pytest.mark.parametrize(
+    ("requester", "status_code"),
+    [(ANONYMOUS, 401), (OTHER_USER, 403)],
+)
+async def test_share_link_is_only_readable_by_owner(client, seed, requester, status_code):
+    response = await client.get(
+        f"/api/v1/entries/{seed.public_entry.id}/share_link",
+        headers=headers_for(seed, requester),
+    )
+    assert response.status_code == status_code
+
+
+async def test_public_entry_is_only_writable_by_owner(client, seed):
+    entry = seed.public_entry
+    view = entry.views[1]
+    headers = as_user(seed.other_user)
+
+    response = await client.put(
+        f"/api/v1/entries/{entry.id}", json={"name": "Renamed"}, headers=headers
+    )
+    assert response.status_code == 403
+    response = await client.put(
+        f"/api/v1/entries/{entry.id}/views/{view.id}", json={"name": "Renamed"}, headers=headers
+    )
+    assert response.status_code == 403
+    response = await client.delete(f"/api/v1/entries/{entry.id}/views/{view.id}", headers=headers)
+    assert response.status_code == 403
+    response = await client.delete(f"/api/v1/entries/{entry.id}", headers=headers)
+    assert response.status_code == 403
+
+    response = await client.get(f"/api/v1/entries/{entry.id}/views")
+    assert len(response.json()) == 2
+
+
+@pytest.mark.parametrize(
+    ("requester", "status_code"),
+    [(ANONYMOUS, 401), (OTHER_USER, 403), (OWNER, 200)],
+)
+async def test_private_volseg_entry_is_only_readable_by_owner(client, seed, requester, status_code):
+    response = await client.get(
+        f"/api/v1/volseg/{seed.private_volseg_entry.id}", headers=headers_for(seed, requester)
+    )
+    assert response.status_code == status_code
+
+
+async def test_public_volseg_entry_is_only_deletable_by_owner(client, seed):
+    volseg_entry = seed.public_volseg_entry
+
+    response = await client.get(f"/api/v1/volseg/{volseg_entry.id}")
+    assert response.status_code == 200
+
+    response = await client.delete(
+        f"/api/v1/volseg/{volseg_entry.id}", headers=as_user(seed.other_user)
+    )
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize(
+    ("requester", "status_code"),
+    [(ANONYMOUS, 401), (OTHER_USER, 403), (OWNER, 307)],
+)
+@pytest.mark.parametrize("resource", ["snapshot", "thumbnail"])
+async def test_presigned_redirect_checks_permissions_first(
+    client, seed, storage, monkeypatch, requester, status_code, resource
+):
+    presigned: list[str] = []
+
+    def get_presigned_url(file_path: str) -> str:
+        presigned.append(file_path)
+        return f"http://storage.test{file_path}"
+
+    monkeypatch.setattr(get_settings(), "MINIO_PRESIGNED_REDIRECTS", True)
+    monkeypatch.setattr(storage, "get_presigned_url", get_presigned_url)
+    entry = seed.private_entry
+    view = entry.views[0]
+
+    response = await client.get(
+        f"/api/v1/entries/{entry.id}/views/{view.id}/{resource}",
+        headers=headers_for(seed, requester),
+    )
+
+    assert response.status_code == status_code
+    assert len(presigned) == (1 if requester == OWNER else 0)
+
+
+@pytest.mark.parametrize(
+    ("requester", "status_code"),
+    [(ANONYMOUS, 401), (OTHER_USER, 403), (OWNER, 304)],
+)
+async def test_conditional_requests_check_permissions_first(client, seed, requester, status_code):
+    entry = seed.private_entry
+    view = entry.views[0]
+    paths = [
+        f"/api/v1/entries/{entry.id}",
+        f"/api/v1/entries/{entry.id}/views/{view.id}",
+        f"/api/v1/entries/{entry.id}/views/{view.id}/snapshot",
+        f"/api/v1/entries/{entry.id}/views/{view.id}/thumbnail",
+        f"/api/v1/entries/{entry.id}/views/{view.id}/thumbnail?w=64",
+    ]
+
+    for path in paths:
+        response = await client.get(
+            path, headers={"If-None-Match": "*", **headers_for(seed, requester)}
+        )
+        assert response.status_code == status_code, path
+        assert ("ETag" in response.headers) == (requester == OWNER), path
+
+
+@pytest.mark.parametrize(
+    ("requester", "status_code"),
+    [(ANONYMOUS, 401), (OTHER_USER, 403), (OWNER, 200)],
+)
+async def test_private_volseg_file_is_only_readable_by_owner(
+    client, seed, tmp_path, requester, status_code
+):
+    volseg_entry = seed.private_volseg_entry
+    file_path = tmp_path / "local" / "volseg_entries" / "emdb" / volseg_entry.entry_id / "data.bcif"
+    file_path.parent.mkdir(parents=True)
+    file_path.write_bytes(b"volume data")
+
+    response = await client.get(
+        f"/api/v1/volseg/{volseg_entry.id}/files/data.bcif",
+        headers=headers_for(seed, requester),
+    )
+
+    assert response.status_code == status_code
+    if requester == OWNER:
+        assert response.content == b"volume data"
+    else:
+        assert b"volume data" not in response.content
+
+
+@pytest.mark.parametrize(
+    "filename",
+    ["..%2Fsecret", "..%2F..%2Flocal%2Fsecret", "%2E%2E%2Fsecret", ".%2E", "data..bcif"],
+)
+async def test_volseg_file_cannot_escape_the_entry(client, seed, tmp_path, filename):
+    volseg_entry = seed.public_volseg_entry
+    entry_path = tmp_path / "local" / "volseg_entries" / "emdb" / volseg_entry.entry_id
+    entry_path.mkdir(parents=True)
+    (entry_path.parent / "secret").write_bytes(b"secret")
+    (tmp_path / "local" / "secret").write_bytes(b"secret")
+
+    response = await client.get(
+        f"/api/v1/volseg/{volseg_entry.id}/files/{filename}", headers=as_user(seed.owner)
+    )
+
+    assert response.status_code in (400, 404, 422)
+    assert b"secret" not in response.content
+
+
+@pytest.mark.parametrize(
+    ("requester", "status_code"),
+    [(ANONYMOUS, 401), (OTHER_USER, 403), (OWNER, 200)],
+)
+async def test_private_entry_bundle_is_only_readable_by_owner(client, seed, requester, status_code):
+    response = await client.get(
+        f"/api/v1/entries/{seed.private_entry.id}/bundle",
+        params={"include": ["views", "thumbnail", "share_link"]},
+        headers=headers_for(seed, requester),
+    )
+    assert response.status_code == status_code
+
+
+@pytest.mark.parametrize("requester", [ANONYMOUS, OTHER_USER, OWNER])
+async def test_public_entry_bundle_share_link_is_only_for_owner(client, seed, requester):
+    response = await client.get(
+        f"/api/v1/entries/{seed.public_entry.id}/bundle",
+        params={"include": ["views", "share_link"]},
+        headers=headers_for(seed, requester),
+    )
+
+    assert response.status_code == 200
+    bundle = response.json()
+    assert len(bundle["views"]) == 2
+    assert (bundle["share_link"] is not None) == (requester == OWNER)
@@ -0,0 +1,59 @@
+import pytest
+
+from app.core.settings import get_settings
+from tests.utils import as_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(params=[False, True], ids=["database-role", "trusted-claim"])
+def user_statements(request, monkeypatch) -> int:
+    """Statements spent on the user, none when the token's role claim is trusted."""
+    monkeypatch.setattr(get_settings(), "JWT_TRUST_ROLE_CLAIM", request.param)
+    return 0 if request.param else 1
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/api/v1/entries/{entry_id}",
+        "/api/v1/entries/{entry_id}/share_link",
+        "/api/v1/entries/{entry_id}/thumbnail",
+        "/api/v1/entries/{entry_id}/views",
+        "/api/v1/entries/{entry_id}/bundle?include=views&include=thumbnail&include=share_link",
+    ],
+)
+async def test_entry_endpoints_load_in_one_statement(
+    client, seed, sql_statements, user_statements, path
+):
+    sql_statements.clear()
+
+    response = await client.get(
+        path.format(entry_id=seed.private_entry.id), headers=as_user(seed.owner)
+    )
+
+    assert response.status_code == 200
+    assert len(sql_statements) == 1 + user_statements, sql_statements
+
+
+async def test_view_endpoint_loads_in_one_statement(client, seed, sql_statements, user_statements):
+    view = seed.private_entry.views[0]
+    sql_statements.clear()
+
+    response = await client.get(
+        f"/api/v1/entries/{seed.private_entry.id}/views/{view.id}", headers=as_user(seed.owner)
+    )
+
+    assert response.status_code == 200
+    assert len(sql_statements) == 1 + user_statements, sql_statements
+
+
+async def test_public_listing_statements(client, seed, sql_statements):
+    sql_statements.clear()
+
+    response = await client.get("/api/v1/entries", params={"per_page": 10})
+
+    assert response.status_code == 200
+    assert response.json()["total_items"] == 1
+    # The page and the count of public entries
+    assert len(sql_statements) == 2, sql_statements
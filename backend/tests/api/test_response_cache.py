@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from app.core.settings import get_settings
+from app.services.response_cache import InMemoryResponseCache, get_response_cache
+from tests.utils import as_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def get_views(client, path: str) -> tuple[str, set[str]]:
+    response = await client.get(path)
+    assert response.status_code == 200
+    return response.headers["X-Cache"], {item["name"] for item in response.json()}
+
+
+async def get_public_entries(client) -> tuple[str, list[str]]:
+    response = await client.get("/api/v1/entries")
+    assert response.status_code == 200
+    return response.headers["X-Cache"], [item["name"] for item in response.json()["items"]]
+
+
+async def test_entry_update_invalidates_the_listing(client, seed):
+    assert await get_public_entries(client) == ("MISS", ["public"])
+    assert await get_public_entries(client) == ("HIT", ["public"])
+
+    response = await client.put(
+        f"/api/v1/entries/{seed.public_entry.id}",
+        json={"name": "Renamed"},
+        headers=as_user(seed.owner),
+    )
+    assert response.status_code == 200
+
+    assert await get_public_entries(client) == ("MISS", ["Renamed"])
+
+
+async def test_entry_delete_invalidates_the_listing(client, seed):
+    assert await get_public_entries(client) == ("MISS", ["public"])
+
+    response = await client.delete(
+        f"/api/v1/entries/{seed.public_entry.id}", headers=as_user(seed.owner)
+    )
+    assert response.status_code == 200
+
+    assert await get_public_entries(client) == ("MISS", [])
+
+
+async def test_view_writes_invalidate_the_view_listing(client, seed):
+    entry = seed.public_entry
+    path = f"/api/v1/entries/{entry.id}/views"
+    assert await get_views(client, path) == ("MISS", {"Thumbnail view", "Other view"})
+    assert (await get_views(client, path))[0] == "HIT"
+
+    view = entry.views[1]
+    response = await client.put(
+        f"{path}/{view.id}", json={"name": "Renamed view"}, headers=as_user(seed.owner)
+    )
+    assert response.status_code == 200
+    assert await get_views(client, path) == ("MISS", {"Thumbnail view", "Renamed view"})
+
+    response = await client.delete(f"{path}/{view.id}", headers=as_user(seed.owner))
+    assert response.status_code == 200
+    assert await get_views(client, path) == ("MISS", {"Thumbnail view"})
+
+
+async def test_without_redis_responses_are_cached_briefly(monkeypatch):
+    monkeypatch.setattr(get_settings(), "REDIS_URL", None)
+    cache = get_response_cache.__wrapped__()
+    assert isinstance(cache, InMemoryResponseCache)
+    assert cache.max_ttl == get_settings().RESPONSE_CACHE_LOCAL_TTL_SECONDS
+
+    await cache.set("key", b"cached", ttl=60)
+    assert await cache.get("key") == b"cached"
+
+    # Another worker's invalidation never reaches this one, the entry expires on its own
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + cache.max_ttl + 1)
+    assert await cache.get("key") is None
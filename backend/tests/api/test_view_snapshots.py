@@ -0,0 +1,177 @@
+import asyncio
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+
+import pytest
+from sqlalchemy import select, update
+
+from app.database.models.view_model import View
+from app.services.files.blob_store import blob_path
+from app.tasks import view_tasks
+from tests.utils import as_user, create_view
+
+pytestmark = pytest.mark.anyio
+
+SNAPSHOT = json.dumps({"entries": [{"label": f"structure {i}"} for i in range(100)]}).encode()
+GZIP = {"Accept-Encoding": "gzip"}
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+@pytest.fixture
+async def view(client, seed) -> dict:
+    return await create_view(client, seed.owner, seed.public_entry.id, snapshot=SNAPSHOT)
+
+
+@pytest.fixture
+async def compressed_view(view, task_storage) -> dict:
+    await asyncio.to_thread(
+        view_tasks.compress_snapshot, None, sha256(SNAPSHOT).hexdigest(), "gzip"
+    )
+    return view
+
+
+def snapshot_path(seed, view: dict) -> str:
+    return f"/api/v1/entries/{seed.public_entry.id}/views/{view['id']}/snapshot"
+
+
+async def get_raw(client, path: str, headers: dict[str, str]) -> tuple[dict, bytes]:
+    """Headers and body as sent, without the client decoding the content encoding."""
+    async with client.stream("GET", path, headers=headers) as response:
+        assert response.status_code == 200
+        return response.headers, b"".join([chunk async for chunk in response.aiter_raw()])
+
+
+async def test_compressed_snapshot_is_sent_gzip_encoded(client, seed, compressed_view):
+    headers, body = await get_raw(client, snapshot_path(seed, compressed_view), GZIP)
+
+    assert headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in headers["Vary"]
+    assert gzip.decompress(body) == SNAPSHOT
+
+
+async def test_compressed_snapshot_is_decoded_for_identity_clients(client, seed, compressed_view):
+    headers, body = await get_raw(client, snapshot_path(seed, compressed_view), IDENTITY)
+
+    assert "Content-Encoding" not in headers
+    assert body == SNAPSHOT
+
+
+async def test_encodings_have_their_own_etags(client, seed, compressed_view):
+    gzip_headers, _ = await get_raw(client, snapshot_path(seed, compressed_view), GZIP)
+    identity_headers, _ = await get_raw(client, snapshot_path(seed, compressed_view), IDENTITY)
+
+    assert gzip_headers["ETag"] != identity_headers["ETag"]
+
+
+@pytest.mark.parametrize("accept_encoding", [GZIP, IDENTITY])
+async def test_matching_etag_answers_304_without_body(
+    client, seed, compressed_view, accept_encoding
+):
+    path = snapshot_path(seed, compressed_view)
+    headers, _ = await get_raw(client, path, accept_encoding)
+
+    response = await client.get(path, headers={"If-None-Match": headers["ETag"], **accept_encoding})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == headers["ETag"]
+
+
+async def test_etag_changes_when_the_stored_snapshot_is_replaced(client, seed, view, task_storage):
+    path = snapshot_path(seed, view)
+    raw_headers, body = await get_raw(client, path, GZIP)
+    assert "Content-Encoding" not in raw_headers
+    assert body == SNAPSHOT
+
+    # Compression replaces the raw object with a gzip one
+    await asyncio.to_thread(
+        view_tasks.compress_snapshot, None, sha256(SNAPSHOT).hexdigest(), "gzip"
+    )
+
+    response = await client.get(path, headers={"If-None-Match": raw_headers["ETag"], **GZIP})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] != raw_headers["ETag"]
+    assert response.content == SNAPSHOT
+
+
+async def stored_snapshot(session_factory, view: dict) -> tuple[str, str | None]:
+    async with session_factory() as session:
+        result = await session.execute(
+            select(View.snapshot_url, View.snapshot_content_encoding).where(View.id == view["id"])
+        )
+        return tuple(result.one())
+
+
+async def test_compression_repoints_every_view_of_the_blob(
+    client, seed, session_factory, task_storage
+):
+    digest = sha256(SNAPSHOT).hexdigest()
+    views = [
+        await create_view(client, seed.owner, entry.id, snapshot=SNAPSHOT)
+        for entry in (seed.public_entry, seed.private_entry)
+    ]
+
+    await asyncio.to_thread(view_tasks.compress_snapshot, None, digest, "gzip")
+
+    for view in views:
+        assert await stored_snapshot(session_factory, view) == (blob_path(digest, "gzip"), "gzip")
+    assert gzip.decompress(await task_storage.get(blob_path(digest, "gzip"))) == SNAPSHOT
+    assert not await task_storage.exists(blob_path(digest))
+
+
+async def test_snapshots_left_raw_are_compressed_by_the_retry(
+    client, seed, session_factory, task_storage
+):
+    stale_snapshot, recent_snapshot = SNAPSHOT, b'{"entries": []}'
+    stale = await create_view(client, seed.owner, seed.public_entry.id, snapshot=stale_snapshot)
+    # Its compression job was lost long ago
+    async with session_factory() as session:
+        await session.execute(
+            update(View)
+            .where(View.id == stale["id"])
+            .values(updated_at=datetime.now(timezone.utc) - timedelta(days=1))
+        )
+        await session.commit()
+    # Its compression job may still be queued
+    recent = await create_view(client, seed.owner, seed.private_entry.id, snapshot=recent_snapshot)
+
+    await asyncio.to_thread(view_tasks.compress_pending_snapshots, None)
+
+    assert await stored_snapshot(session_factory, stale) == (
+        blob_path(sha256(stale_snapshot).hexdigest(), "gzip"),
+        "gzip",
+    )
+    assert await stored_snapshot(session_factory, recent) == (
+        blob_path(sha256(recent_snapshot).hexdigest()),
+        None,
+    )
+
+
+async def test_content_url_is_cached_as_immutable(client, seed, view):
+    digest = sha256(SNAPSHOT).hexdigest()
+    assert view["snapshot_content_url"] == f"{snapshot_path(seed, view)}?v={digest}"
+
+    headers, body = await get_raw(client, view["snapshot_content_url"], IDENTITY)
+    assert headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert body == SNAPSHOT
+
+    # The unversioned URL keeps following the current content
+    headers, _ = await get_raw(client, snapshot_path(seed, view), IDENTITY)
+    assert "immutable" not in headers["Cache-Control"]
+
+
+async def test_content_url_of_replaced_content_is_gone(client, seed, view):
+    response = await client.get(f"{snapshot_path(seed, view)}?v={sha256(b'old').hexdigest()}")
+    assert response.status_code == 404
+
+
+async def test_private_content_url_is_still_revalidated(client, seed):
+    view = await create_view(client, seed.owner, seed.private_entry.id, snapshot=SNAPSHOT)
+
+    response = await client.get(view["snapshot_content_url"], headers=as_user(seed.owner))
+    assert response.status_code == 200
+    # Access checks have to run on every request
+    assert response.headers["Cache-Control"] == "private, no-cache"
@@ -0,0 +1,125 @@
+import io
+from hashlib import sha256
+
+import pytest
+from PIL import Image
+
+from app.core.settings import get_settings
+from app.services import view_service
+from app.services.thumbnails import ThumbnailFormat, variant_path
+from tests.utils import as_user, create_view
+
+pytestmark = pytest.mark.anyio
+
+WEBP = {"Accept": "image/avif,image/webp,*/*"}
+
+
+def png(width: int = 1024, height: int = 512) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), "teal").save(output, format="PNG")
+    return output.getvalue()
+
+
+THUMBNAIL = png()
+
+
+@pytest.fixture
+async def view(client, seed) -> dict:
+    return await create_view(
+        client, seed.owner, seed.public_entry.id, snapshot=b"{}", thumbnail=THUMBNAIL
+    )
+
+
+def thumbnail_path(seed, view: dict) -> str:
+    return f"/api/v1/entries/{seed.public_entry.id}/views/{view['id']}/thumbnail"
+
+
+@pytest.fixture
+def renders(monkeypatch) -> list[tuple[int, ThumbnailFormat]]:
+    """Widths and formats of the variants rendered during the test."""
+    calls = []
+    render_variant = view_service.render_variant
+
+    def counting_render_variant(data, width, format, quality):
+        calls.append((width, format))
+        return render_variant(data, width, format, quality)
+
+    monkeypatch.setattr(view_service, "render_variant", counting_render_variant)
+    return calls
+
+
+@pytest.mark.parametrize("width", get_settings().THUMBNAIL_WIDTHS)
+@pytest.mark.parametrize(
+    ("headers", "format"), [(WEBP, ThumbnailFormat.webp), ({}, ThumbnailFormat.png)]
+)
+async def test_variant_is_rendered_at_each_width(
+    client, seed, view, storage, renders, width, headers, format
+):
+    response = await client.get(thumbnail_path(seed, view), params={"w": width}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == format.media_type
+    assert "Accept" in response.headers["Vary"]
+    with Image.open(io.BytesIO(response.content)) as image:
+        assert image.format == format.name.upper()
+        assert image.size == (width, width // 2)
+    assert renders == [(width, format)]
+    assert await storage.exists(variant_path(sha256(THUMBNAIL).hexdigest(), width, format))
+
+
+async def test_requested_width_is_rounded_up_to_a_configured_one(client, seed, view, renders):
+    widths = sorted(get_settings().THUMBNAIL_WIDTHS)
+
+    response = await client.get(thumbnail_path(seed, view), params={"w": widths[0] - 1})
+
+    with Image.open(io.BytesIO(response.content)) as image:
+        assert image.width == widths[0]
+
+
+@pytest.mark.parametrize("width", [0, -1, 4097])
+async def test_out_of_range_width_is_rejected(client, seed, view, width):
+    response = await client.get(thumbnail_path(seed, view), params={"w": width})
+    assert response.status_code == 422
+
+
+async def test_stored_variant_is_not_rendered_again(client, seed, view, renders):
+    first = await client.get(thumbnail_path(seed, view), params={"w": 128}, headers=WEBP)
+    second = await client.get(thumbnail_path(seed, view), params={"w": 128}, headers=WEBP)
+
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert renders == [(128, ThumbnailFormat.webp)]
+
+
+async def test_variant_answers_304_without_rendering(client, seed, view, renders):
+    first = await client.get(thumbnail_path(seed, view), params={"w": 256}, headers=WEBP)
+
+    response = await client.get(
+        thumbnail_path(seed, view),
+        params={"w": 256},
+        headers={"If-None-Match": first.headers["ETag"], **WEBP},
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert renders == [(256, ThumbnailFormat.webp)]
+
+
+async def test_formats_have_their_own_etags(client, seed, view):
+    webp = await client.get(thumbnail_path(seed, view), params={"w": 128}, headers=WEBP)
+    png = await client.get(thumbnail_path(seed, view), params={"w": 128})
+    original = await client.get(thumbnail_path(seed, view), headers=as_user(seed.owner))
+
+    assert len({webp.headers["ETag"], png.headers["ETag"], original.headers["ETag"]}) == 3
+
+
+async def test_content_url_variants_are_cached_as_immutable(client, seed, view):
+    assert view["thumbnail_content_url"] == (
+        f"{thumbnail_path(seed, view)}?v={sha256(THUMBNAIL).hexdigest()}"
+    )
+
+    for query in ("", "&w=128"):
+        response = await client.get(view["thumbnail_content_url"] + query, headers=WEBP)
+        assert response.status_code == 200
+        assert response.headers["Cache-Control"] == "public, max-age=31536000, immutable"
@@ -0,0 +1,269 @@
+import asyncio
+import errno
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+
+from app.database.models.storage_deletion_model import StorageDeletion
+from app.database.models.volseg_upload_model import VolsegUpload
+from app.tasks import storage_tasks, volseg_tasks
+from app.tasks.volseg_tasks import UPLOADS_PATH
+from tests.utils import as_user
+
+pytestmark = pytest.mark.anyio
+
+FILES = {
+    "annotations": json.dumps({"annotations": []}).encode(),
+    "metadata": json.dumps({"metadata": {}}).encode(),
+    "data": b"PK\x05\x06" + bytes(18),
+}
+
+
+async def create_upload(client, user, entry_id: str = "emd-9") -> dict:
+    response = await client.post(
+        "/api/v1/volseg/uploads",
+        json={
+            "db_name": "emdb",
+            "entry_id": entry_id,
+            "is_public": True,
+            "annotations_filename": "annotations.json",
+            "metadata_filename": "metadata.json",
+            "data_filename": "data.zip",
+        },
+        headers=as_user(user),
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+async def put_chunk(client, user, upload_id, file: str, chunk: bytes, offset: int, checksum=None):
+    return await client.put(
+        f"/api/v1/volseg/uploads/{upload_id}/{file}",
+        params={"offset": offset},
+        content=chunk,
+        headers={
+            "X-Chunk-SHA256": checksum or hashlib.sha256(chunk).hexdigest(),
+            **as_user(user),
+        },
+    )
+
+
+async def upload_files(client, user, upload_id) -> None:
+    for file, content in FILES.items():
+        response = await put_chunk(client, user, upload_id, file, content, offset=0)
+        assert response.status_code == 200
+
+
+async def finalize(client, user, upload_id):
+    return await client.post(f"/api/v1/volseg/uploads/{upload_id}/finalize", headers=as_user(user))
+
+
+async def test_chunks_resume_from_the_reported_offset(client, seed):
+    upload = await create_upload(client, seed.owner)
+    content = FILES["data"]
+
+    response = await put_chunk(client, seed.owner, upload["id"], "data", content[:10], offset=0)
+    assert response.json()["files"]["data"]["offset"] == 10
+
+    # The client lost the response and asks where to continue
+    response = await client.get(
+        f"/api/v1/volseg/uploads/{upload['id']}", headers=as_user(seed.owner)
+    )
+    offset = response.json()["files"]["data"]["offset"]
+    assert offset == 10
+
+    response = await put_chunk(client, seed.owner, upload["id"], "data", content[offset:], offset)
+    assert response.status_code == 200
+    assert response.json()["files"]["data"]["offset"] == len(content)
+
+
+async def test_chunk_at_wrong_offset_conflicts(client, seed, local_storage):
+    upload = await create_upload(client, seed.owner)
+    await put_chunk(client, seed.owner, upload["id"], "data", b"0123456789", offset=0)
+
+    # A repeated chunk can't overwrite bytes already received, a skipped one can't leave a gap
+    for offset in (0, 5, 20):
+        response = await put_chunk(client, seed.owner, upload["id"], "data", b"abcde", offset)
+        assert response.status_code == 409
+        assert response.headers["Upload-Offset"] == "10"
+
+    assert await local_storage.get(f"{UPLOADS_PATH}/{upload['id']}/data") == b"0123456789"
+
+
+async def test_chunk_checksum_mismatch_is_rejected(client, seed):
+    upload = await create_upload(client, seed.owner)
+
+    response = await put_chunk(
+        client, seed.owner, upload["id"], "data", b"chunk", 0, checksum=hashlib.sha256().hexdigest()
+    )
+    assert response.status_code == 400
+
+    response = await client.get(
+        f"/api/v1/volseg/uploads/{upload['id']}", headers=as_user(seed.owner)
+    )
+    assert response.json()["files"]["data"]["offset"] == 0
+
+
+async def test_uploads_are_private_to_their_user(client, seed):
+    upload = await create_upload(client, seed.owner)
+
+    response = await client.get(f"/api/v1/volseg/uploads/{upload['id']}")
+    assert response.status_code == 401
+    response = await client.get(
+        f"/api/v1/volseg/uploads/{upload['id']}", headers=as_user(seed.other_user)
+    )
+    assert response.status_code == 404
+    response = await put_chunk(client, seed.other_user, upload["id"], "data", b"chunk", 0)
+    assert response.status_code == 404
+    response = await finalize(client, seed.other_user, upload["id"])
+    assert response.status_code == 404
+
+
+async def test_finalize_moves_files_into_the_entry(client, seed, local_storage, enqueued):
+    upload = await create_upload(client, seed.owner)
+    await upload_files(client, seed.owner, upload["id"])
+
+    response = await finalize(client, seed.owner, upload["id"])
+
+    assert response.status_code == 201
+    assert response.json()["entry_id"] == "emd-9"
+    for filename, content in zip(("annotations.json", "metadata.json", "data.zip"), FILES.values()):
+        assert await local_storage.get(f"/volseg_entries/emdb/emd-9/{filename}") == content
+    assert [name for name, _ in enqueued] == [
+        "app.tasks.volseg_tasks.validate_volseg_entry",
+        "app.tasks.storage_tasks.delete_local_directory",
+    ]
+    response = await client.get(
+        f"/api/v1/volseg/uploads/{upload['id']}", headers=as_user(seed.owner)
+    )
+    assert response.status_code == 404
+
+
+async def test_finalize_requires_every_file(client, seed):
+    upload = await create_upload(client, seed.owner)
+    await put_chunk(client, seed.owner, upload["id"], "data", FILES["data"], offset=0)
+
+    response = await finalize(client, seed.owner, upload["id"])
+    assert response.status_code == 400
+
+
+async def test_finalize_of_an_entry_id_taken_meanwhile_conflicts(client, seed):
+    # Two users upload the same entry id, only the first finalize gets the directory
+    first = await create_upload(client, seed.owner)
+    second = await create_upload(client, seed.other_user)
+    await upload_files(client, seed.owner, first["id"])
+    await upload_files(client, seed.other_user, second["id"])
+
+    assert (await finalize(client, seed.owner, first["id"])).status_code == 201
+    assert (await finalize(client, seed.other_user, second["id"])).status_code == 409
+
+    response = await client.get(
+        f"/api/v1/volseg/uploads/{second['id']}", headers=as_user(seed.other_user)
+    )
+    assert response.status_code == 200
+
+
+async def test_finalize_racing_the_rename_keeps_the_upload(
+    client, seed, local_storage, monkeypatch
+):
+    upload = await create_upload(client, seed.owner)
+    await upload_files(client, seed.owner, upload["id"])
+
+    async def taken(source: str, target: str) -> None:
+        raise FileExistsError(target)
+
+    monkeypatch.setattr(local_storage, "move_directory", taken)
+    response = await finalize(client, seed.owner, upload["id"])
+
+    assert response.status_code == 409
+    response = await client.get("/api/v1/volseg", headers=as_user(seed.owner))
+    assert "emd-9" not in response.text
+    response = await client.get(
+        f"/api/v1/volseg/uploads/{upload['id']}", headers=as_user(seed.owner)
+    )
+    assert response.status_code == 200
+
+
+async def test_failed_move_can_be_retried(client, seed, local_storage, monkeypatch):
+    upload = await create_upload(client, seed.owner)
+    await upload_files(client, seed.owner, upload["id"])
+    move_directory = local_storage.move_directory
+
+    async def cross_device(source: str, target: str) -> None:
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(local_storage, "move_directory", cross_device)
+    assert (await finalize(client, seed.owner, upload["id"])).status_code == 500
+
+    monkeypatch.setattr(local_storage, "move_directory", move_directory)
+    assert (await finalize(client, seed.owner, upload["id"])).status_code == 201
+    assert await local_storage.get("/volseg_entries/emdb/emd-9/data.zip") == FILES["data"]
+
+
+async def test_abandoned_uploads_expire(
+    client, seed, local_storage, session_factory, worker_database, monkeypatch
+):
+    abandoned = await create_upload(client, seed.owner, "emd-10")
+    active = await create_upload(client, seed.owner, "emd-11")
+    for upload in (abandoned, active):
+        await put_chunk(client, seed.owner, upload["id"], "data", b"chunk", offset=0)
+    await local_storage.save(f"{UPLOADS_PATH}/left-behind/data", b"chunk")
+
+    async with session_factory() as session:
+        await session.execute(
+            update(VolsegUpload)
+            .where(VolsegUpload.id == abandoned["id"])
+            .values(updated_at=datetime.now(timezone.utc) - timedelta(days=30))
+        )
+        await session.commit()
+    # Directories are judged by their modification time
+    old = (datetime.now(timezone.utc) - timedelta(days=30)).timestamp()
+    os.utime(local_storage.path(f"{UPLOADS_PATH}/left-behind"), (old, old))
+    monkeypatch.setattr(volseg_tasks, "get_local_storage", lambda: local_storage)
+
+    await asyncio.to_thread(volseg_tasks.expire_volseg_uploads, None)
+
+    response = await client.get(
+        f"/api/v1/volseg/uploads/{abandoned['id']}", headers=as_user(seed.owner)
+    )
+    assert response.status_code == 404
+    response = await client.get(
+        f"/api/v1/volseg/uploads/{active['id']}", headers=as_user(seed.owner)
+    )
+    assert response.status_code == 200
+    assert sorted(await local_storage.list_directory(UPLOADS_PATH)) == [
+        f"{UPLOADS_PATH}/{active['id']}/data"
+    ]
+
+
+async def test_deleted_entry_files_go_through_the_outbox(
+    client, seed, local_storage, session_factory, enqueued, task_storage
+):
+    upload = await create_upload(client, seed.owner)
+    await upload_files(client, seed.owner, upload["id"])
+    volseg_entry = (await finalize(client, seed.owner, upload["id"])).json()
+    enqueued.clear()
+
+    response = await client.delete(
+        f"/api/v1/volseg/{volseg_entry['id']}", headers=as_user(seed.owner)
+    )
+    assert response.status_code == 200
+
+    # Queued in the transaction that deleted the entry, the files stay until the sweep
+    async with session_factory() as session:
+        deletions = list(await session.scalars(select(StorageDeletion)))
+    assert [(d.file_path, d.is_prefix, d.is_local) for d in deletions] == [
+        ("/volseg_entries/emdb/emd-9", True, True)
+    ]
+    assert [name for name, _ in enqueued] == ["app.tasks.storage_tasks.sweep_storage"]
+    assert await local_storage.exists("/volseg_entries/emdb/emd-9/data.zip")
+
+    await asyncio.to_thread(storage_tasks.sweep_storage, None)
+
+    assert await local_storage.list_directory("/volseg_entries/emdb/emd-9") == []
+    async with session_factory() as session:
+        assert list(await session.scalars(select(StorageDeletion))) == []
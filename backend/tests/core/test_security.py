@@ -0,0 +1,95 @@
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.security import (
+    Principal,
+    forget_user,
+    get_optional_principal,
+    get_required_principal,
+    load_user,
+)
+from app.core.settings import get_settings
+from app.database.models import Entry
+from app.database.models.role_model import RoleEnum
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def user_cache(monkeypatch):
+    monkeypatch.setattr(get_settings(), "AUTH_USER_CACHE_TTL_SECONDS", 60)
+    security._user_cache.clear()
+    yield
+    security._user_cache.clear()
+
+
+async def test_cached_user_is_built_per_session(session_factory, seed, sql_statements):
+    user_id = str(seed.owner.id)
+    async with session_factory() as first_session:
+        first = await load_user(first_session, user_id)
+        # Leaves the first session's instance dirty, like creating an entry for the user does
+        Entry(name="Pending", user=first, volseg_entry_id=seed.public_volseg_entry.id)
+
+        sql_statements.clear()
+        async with session_factory() as second_session:
+            second = await load_user(second_session, user_id)
+
+            assert second is not first
+            assert second in second_session
+            assert second.email == "owner@example.com"
+            assert second.role.name == "user"
+        assert sql_statements == []
+
+
+async def test_forgotten_user_is_loaded_again(session_factory, seed, sql_statements):
+    user_id = str(seed.owner.id)
+    async with session_factory() as session:
+        await load_user(session, user_id)
+
+    forget_user(user_id)
+    sql_statements.clear()
+    async with session_factory() as session:
+        await load_user(session, user_id)
+    assert len(sql_statements) == 1
+
+
+async def test_role_comes_from_the_database_by_default(session_factory, seed):
+    # A token minted before the user was demoted, or a forged claim
+    payload = {"sub": str(seed.owner.id), "role": RoleEnum.admin.value}
+    async with session_factory() as session:
+        principal = await get_optional_principal()(payload=payload, session=session)
+
+    assert principal.role == RoleEnum.user
+
+
+async def test_trusted_role_claim_skips_the_database(session_factory, seed, monkeypatch):
+    monkeypatch.setattr(get_settings(), "JWT_TRUST_ROLE_CLAIM", True)
+    payload = {"sub": str(seed.owner.id), "role": RoleEnum.admin.value}
+    async with session_factory() as session:
+        principal = await get_optional_principal()(payload=payload, session=session)
+
+    assert principal.role == RoleEnum.admin
+
+
+@pytest.mark.parametrize(
+    ("role", "required_role", "allowed"),
+    [
+        (RoleEnum.user, RoleEnum.user, True),
+        (RoleEnum.admin, RoleEnum.user, True),
+        (RoleEnum.user, RoleEnum.admin, False),
+        (RoleEnum.user, None, True),
+    ],
+)
+async def test_required_principal_enforces_the_role(role, required_role, allowed):
+    principal = Principal(id=uuid4(), role=role, session=None)
+    dependency = get_required_principal(required_role)
+
+    if allowed:
+        assert await dependency(principal=principal) is principal
+    else:
+        with pytest.raises(HTTPException) as exc_info:
+            await dependency(principal=principal)
+        assert exc_info.value.status_code == 403
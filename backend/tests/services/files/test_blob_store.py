@@ -0,0 +1,117 @@
+import io
+from hashlib import sha256
+
+import pytest
+from sqlalchemy import select
+
+from app.database.models.blob_model import Blob
+from app.services.files.blob_store import BlobStore, blob_path
+from app.services.thumbnails import ThumbnailFormat, variant_path
+
+pytestmark = pytest.mark.anyio
+
+
+async def ref_counts(session_factory) -> dict[str, int]:
+    async with session_factory() as session:
+        return dict((await session.execute(select(Blob.sha256, Blob.ref_count))).all())
+
+
+async def test_put_stores_content_under_its_hash(session_factory, storage):
+    async with session_factory() as session:
+        blob = await BlobStore(session=session, storage=storage).put(io.BytesIO(b"content"))
+        await session.commit()
+
+    assert blob.sha256 == sha256(b"content").hexdigest()
+    assert blob.size == len(b"content")
+    assert await storage.get(blob_path(blob.sha256)) == b"content"
+    assert await ref_counts(session_factory) == {blob.sha256: 1}
+
+
+async def test_identical_content_is_stored_once(session_factory, storage, monkeypatch):
+    uploads = []
+    save = storage.save
+
+    async def recording_save(file_path, file_data, content_encoding=None):
+        uploads.append(file_path)
+        return await save(file_path, file_data, content_encoding)
+
+    monkeypatch.setattr(storage, "save", recording_save)
+
+    async with session_factory() as session:
+        blob_store = BlobStore(session=session, storage=storage)
+        first = await blob_store.put(io.BytesIO(b"same"))
+        second = await blob_store.put(io.BytesIO(b"same"))
+        other = await blob_store.put(io.BytesIO(b"other"))
+        await session.commit()
+
+    assert first.sha256 == second.sha256 != other.sha256
+    assert uploads == [blob_path(first.sha256), blob_path(other.sha256)]
+    assert await ref_counts(session_factory) == {first.sha256: 2, other.sha256: 1}
+
+
+async def test_collect_keeps_referenced_blobs(session_factory, storage):
+    async with session_factory() as session:
+        blob_store = BlobStore(session=session, storage=storage)
+        shared = (await blob_store.put(io.BytesIO(b"shared"))).sha256
+        await blob_store.put(io.BytesIO(b"shared"))
+        single = (await blob_store.put(io.BytesIO(b"single"))).sha256
+        await session.commit()
+
+        # One of the two references to the shared blob goes away
+        await blob_store.release(shared, single)
+        await session.commit()
+        assert await blob_store.collect() == 1
+
+    assert await ref_counts(session_factory) == {shared: 1}
+    assert await storage.exists(blob_path(shared))
+    assert not await storage.exists(blob_path(single))
+
+
+async def test_released_content_put_again_is_uploaded_again(session_factory, storage):
+    async with session_factory() as session:
+        blob_store = BlobStore(session=session, storage=storage)
+        digest = (await blob_store.put(io.BytesIO(b"again"))).sha256
+        await session.commit()
+        await blob_store.release(digest)
+        await session.commit()
+        await blob_store.collect()
+
+        await blob_store.put(io.BytesIO(b"again"))
+        await session.commit()
+
+    assert await storage.get(blob_path(digest)) == b"again"
+    assert await ref_counts(session_factory) == {digest: 1}
+
+
+async def test_collect_deletes_objects_and_variants_in_one_batch(
+    session_factory, storage, monkeypatch
+):
+    async with session_factory() as session:
+        blob_store = BlobStore(session=session, storage=storage)
+        blobs = [await blob_store.put(io.BytesIO(content)) for content in (b"a", b"b")]
+        await session.commit()
+        sha256s = [blob.sha256 for blob in blobs]
+        for sha256 in sha256s:
+            await storage.save(variant_path(sha256, 128, ThumbnailFormat.webp), b"variant")
+
+        batches = []
+        delete_many = storage.delete_many
+
+        async def recording_delete_many(file_paths):
+            batches.append(sorted(file_paths))
+            return await delete_many(file_paths)
+
+        monkeypatch.setattr(storage, "delete_many", recording_delete_many)
+
+        await blob_store.release(*sha256s)
+        await session.commit()
+        assert await blob_store.collect() == 2
+
+    assert batches == [
+        sorted(
+            path
+            for sha256 in sha256s
+            for path in (blob_path(sha256), variant_path(sha256, 128, ThumbnailFormat.webp))
+        )
+    ]
+    assert await storage.list_directory("/") == []
@@ -0,0 +1,45 @@
+import gzip
+import io
+
+import pytest
+
+from app.services.files.compression import GZIP, compress, decompress_stream
+
+pytestmark = pytest.mark.anyio
+
+# Larger than the spool, so the compressed copy goes to disk
+CONTENT = b"".join(f"line {i}\n".encode() for i in range(300_000))
+
+
+async def chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+async def test_gzip_roundtrip():
+    compressed = compress(io.BytesIO(CONTENT), GZIP, level=6).read()
+
+    assert len(compressed) < len(CONTENT)
+    assert gzip.decompress(compressed) == CONTENT
+    streamed = [chunk async for chunk in decompress_stream(chunks(compressed, 4096), GZIP)]
+    assert b"".join(streamed) == CONTENT
+
+
+async def test_compression_is_deterministic():
+    # Identical content has to produce identical objects and ETags
+    first = compress(io.BytesIO(CONTENT), GZIP, level=6).read()
+    second = compress(io.BytesIO(CONTENT), GZIP, level=6).read()
+    assert first == second
+
+
+async def test_compress_reads_from_the_start():
+    file_data = io.BytesIO(CONTENT)
+    file_data.seek(100)
+    assert gzip.decompress(compress(file_data, GZIP, level=1).read()) == CONTENT
+
+
+async def test_unsupported_encoding_is_rejected():
+    with pytest.raises(ValueError):
+        compress(io.BytesIO(CONTENT), "br", level=6)
+    with pytest.raises(ValueError):
+        [chunk async for chunk in decompress_stream(chunks(b"", 1), "br")]
@@ -0,0 +1,38 @@
+import pytest
+
+from app.services.files.local_storage import LocalStorage
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def storage(tmp_path) -> LocalStorage:
+    return LocalStorage(root_path=str(tmp_path))
+
+
+async def test_append_adds_to_the_end(storage):
+    assert await storage.append("/uploads/1/data", b"abc") == 3
+    assert await storage.append("/uploads/1/data", b"de") == 5
+
+    assert await storage.get("/uploads/1/data") == b"abcde"
+    assert await storage.size("/uploads/1/data") == 5
+
+
+async def test_move_directory(storage):
+    await storage.save("/uploads/1/entry/data.zip", b"data")
+
+    await storage.move_directory("/uploads/1/entry", "/entries/emd-1")
+
+    assert await storage.get("/entries/emd-1/data.zip") == b"data"
+    assert not await storage.exists("/uploads/1/entry")
+
+
+async def test_move_directory_does_not_replace_existing_files(storage):
+    await storage.save("/entries/emd-1/data.zip", b"theirs")
+    await storage.save("/uploads/1/entry/data.zip", b"ours")
+
+    with pytest.raises(FileExistsError):
+        await storage.move_directory("/uploads/1/entry", "/entries/emd-1")
+
+    assert await storage.get("/entries/emd-1/data.zip") == b"theirs"
+    assert await storage.get("/uploads/1/entry/data.zip") == b"ours"
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.files.minio_storage import MinioStorage
+
+pytestmark = pytest.mark.anyio
+
+SLOW_TRANSFER_SECONDS = 1.0
+
+
+def make_storage(fake_s3, max_workers: int) -> MinioStorage:
+    return MinioStorage(
+        endpoint=fake_s3.endpoint,
+        access_key="access-key",
+        secret_key="secret-key",
+        bucket="test",
+        max_workers=max_workers,
+    )
+
+
+@pytest.fixture
+def objects(fake_s3):
+    fake_s3.objects["slow.molj"] = b"s" * 1024
+    fake_s3.delays["slow.molj"] = SLOW_TRANSFER_SECONDS
+    fake_s3.objects["fast.png"] = b"f" * 16
+    return fake_s3
+
+
+async def test_requests_keep_moving_during_slow_transfer(objects):
+    storage = make_storage(objects, max_workers=4)
+
+    slow = asyncio.create_task(storage.get("slow.molj"))
+    await asyncio.sleep(0.1)
+
+    # The event loop keeps ticking while a worker thread waits on the transfer
+    start = time.monotonic()
+    await asyncio.sleep(0.01)
+    assert time.monotonic() - start < 0.1
+
+    start = time.monotonic()
+    results = await asyncio.gather(*(storage.get("fast.png") for _ in range(3)))
+    assert results == [b"f" * 16] * 3
+    assert time.monotonic() - start < SLOW_TRANSFER_SECONDS / 2
+    assert not slow.done()
+
+    assert await slow == b"s" * 1024
+
+
+async def test_transfers_beyond_pool_size_wait_for_a_worker(objects):
+    storage = make_storage(objects, max_workers=1)
+
+    slow = asyncio.create_task(storage.get("slow.molj"))
+    await asyncio.sleep(0.1)
+
+    assert await storage.get("fast.png") == b"f" * 16
+    assert slow.done()
+
+
+async def test_missing_object_raises_file_not_found(objects):
+    storage = make_storage(objects, max_workers=4)
+
+    with pytest.raises(FileNotFoundError):
+        await storage.get("missing.png")
+    with pytest.raises(FileNotFoundError):
+        await storage.open_stream("missing.png")
+
+
+async def test_presigned_urls_are_reused_and_bounded(fake_s3, monkeypatch):
+    monkeypatch.setattr("app.services.files.minio_storage.PRESIGNED_URL_CACHE_SIZE", 2)
+    storage = make_storage(fake_s3, max_workers=1)
+
+    first = storage.get_presigned_url("a.png")
+    assert storage.get_presigned_url("a.png") == first
+
+    storage.get_presigned_url("b.png")
+    storage.get_presigned_url("a.png")
+    storage.get_presigned_url("c.png")
+
+    # b.png was the least recently used
+    assert list(storage._presigned_urls) == ["a.png", "c.png"]
+
+
+async def test_listing_matches_keys_stored_without_leading_slash(fake_s3):
+    fake_s3.objects["entries/1/snapshot.molj"] = b"{}"
+    fake_s3.objects["thumbnails/abc/64.webp"] = b"webp"
+    storage = make_storage(fake_s3, max_workers=1)
+
+    assert await storage.list_directory("/entries/1/") == ["entries/1/snapshot.molj"]
+    assert set(await storage.list_modified("/")) == set(fake_s3.objects)
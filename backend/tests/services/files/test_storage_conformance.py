@@ -0,0 +1,140 @@
+import io
+from urllib.parse import urlsplit
+
+import pytest
+
+from app.services.files.local_storage import LocalStorage
+from app.services.files.memory_storage import InMemoryStorage
+from app.services.files.minio_storage import MinioStorage
+from app.services.files.storage import Storage
+from app.services.files.tiered_storage import TieredStorage
+
+pytestmark = pytest.mark.anyio
+
+PREFIX = "/conformance/"
+SMALL = b"conformance"
+# Larger than a stream chunk, so streams have to be reassembled
+LARGE = bytes(range(256)) * (3 * 1024 * 1024 // 256)
+
+
+def make_in_memory(tmp_path) -> InMemoryStorage:
+    return InMemoryStorage()
+
+
+def make_local(tmp_path) -> LocalStorage:
+    return LocalStorage(str(tmp_path / "local"))
+
+
+def make_tiered(tmp_path) -> TieredStorage:
+    return TieredStorage(
+        InMemoryStorage(), LocalStorage(str(tmp_path / "cache")), max_bytes=64 * 1024 * 1024
+    )
+
+
+def make_minio(tmp_path, fake_s3) -> MinioStorage:
+    return MinioStorage(
+        endpoint=fake_s3.endpoint,
+        access_key="access-key",
+        secret_key="secret-key",
+        bucket="test",
+    )
+
+
+def make_backend(request, tmp_path) -> Storage:
+    if request.param is make_minio:
+        # Only the MinIO backend starts a server
+        return make_minio(tmp_path, request.getfixturevalue("fake_s3"))
+    return request.param(tmp_path)
+
+
+@pytest.fixture(
+    params=[make_in_memory, make_local, make_tiered, make_minio],
+    ids=["memory", "local", "tiered", "minio"],
+)
+def backend(request, tmp_path) -> Storage:
+    return make_backend(request, tmp_path)
+
+
+@pytest.fixture(params=[make_in_memory, make_tiered, make_minio], ids=["memory", "tiered", "minio"])
+def presigned_backend(request, tmp_path):
+    return make_backend(request, tmp_path)
+
+
+async def test_save_returns_path(backend):
+    assert await backend.save(f"{PREFIX}a", io.BytesIO(SMALL)) == f"{PREFIX}a"
+
+
+async def test_get_roundtrips(backend):
+    await backend.save(f"{PREFIX}a", io.BytesIO(SMALL))
+    assert await backend.get(f"{PREFIX}a") == SMALL
+
+
+async def test_save_replaces(backend):
+    await backend.save(f"{PREFIX}a", io.BytesIO(SMALL))
+    assert await backend.get(f"{PREFIX}a") == SMALL
+
+    await backend.save(f"{PREFIX}a", io.BytesIO(LARGE))
+    assert await backend.get(f"{PREFIX}a") == LARGE
+
+
+async def test_stream_roundtrips(backend):
+    await backend.save(f"{PREFIX}sub/b", io.BytesIO(LARGE))
+    stream = await backend.open_stream(f"{PREFIX}sub/b")
+    assert b"".join([chunk async for chunk in stream]) == LARGE
+
+
+async def test_exists(backend):
+    await backend.save(f"{PREFIX}a", io.BytesIO(SMALL))
+    assert await backend.exists(f"{PREFIX}a")
+    assert not await backend.exists(f"{PREFIX}missing")
+
+
+async def test_missing_raises(backend):
+    with pytest.raises(FileNotFoundError):
+        await backend.get(f"{PREFIX}missing")
+    with pytest.raises(FileNotFoundError):
+        await backend.open_stream(f"{PREFIX}missing")
+
+
+async def test_list_is_recursive(backend):
+    await backend.save(f"{PREFIX}a", io.BytesIO(SMALL))
+    await backend.save(f"{PREFIX}sub/b", io.BytesIO(SMALL))
+    await backend.save("/elsewhere/c", io.BytesIO(SMALL))
+
+    listed = {path.lstrip("/") for path in await backend.list_directory(PREFIX)}
+    assert listed == {f"{PREFIX}a".lstrip("/"), f"{PREFIX}sub/b".lstrip("/")}
+
+
+async def test_delete(backend):
+    await backend.save(f"{PREFIX}a", io.BytesIO(SMALL))
+
+    assert await backend.delete(f"{PREFIX}a")
+    assert not await backend.exists(f"{PREFIX}a")
+    await backend.delete(f"{PREFIX}missing")
+
+
+async def test_delete_many(backend):
+    await backend.save(f"{PREFIX}a", io.BytesIO(SMALL))
+    await backend.save(f"{PREFIX}sub/b", io.BytesIO(SMALL))
+    await backend.save(f"{PREFIX}c", io.BytesIO(SMALL))
+
+    assert await backend.delete_many([f"{PREFIX}a", f"{PREFIX}sub/b", f"{PREFIX}missing"]) == {}
+    assert not await backend.exists(f"{PREFIX}a")
+    assert not await backend.exists(f"{PREFIX}sub/b")
+    assert await backend.exists(f"{PREFIX}c")
+
+
+async def test_delete_directory(backend):
+    await backend.save(f"{PREFIX}a", io.BytesIO(SMALL))
+    await backend.save(f"{PREFIX}sub/b", io.BytesIO(SMALL))
+    await backend.save("/elsewhere/c", io.BytesIO(SMALL))
+
+    assert await backend.delete_directory(PREFIX) == 2
+    assert await backend.list_directory(PREFIX) == []
+    assert await backend.exists("/elsewhere/c")
+
+
+async def test_presigned_url_names_the_object(presigned_backend):
+    await presigned_backend.save(f"{PREFIX}a", io.BytesIO(SMALL))
+    url = urlsplit(presigned_backend.get_presigned_url(f"{PREFIX}a"))
+    assert url.path.endswith(f"{PREFIX}a")
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.database.models.storage_deletion_model import StorageDeletion
+from app.services.files.blob_store import BlobStore
+from app.services.files.storage_gc import StorageGarbageCollector
+
+pytestmark = pytest.mark.anyio
+
+
+def make_gc(session, storage, local_storage=None) -> StorageGarbageCollector:
+    return StorageGarbageCollector(
+        session=session,
+        storage=storage,
+        blob_store=BlobStore(session=session, storage=storage),
+        local_storage=local_storage,
+        grace_period=timedelta(0),
+    )
+
+
+async def test_reconcile_queues_unreferenced_objects(session_factory, storage, seed):
+    referenced = [
+        path
+        for entry in (seed.public_entry, seed.private_entry)
+        for view in entry.views
+        for path in (view.snapshot_url, view.thumbnail_url)
+        if path
+    ]
+    for file_path in [*referenced, "/stray.molj", "/entries/gone/snapshot.molj"]:
+        await storage.save(file_path, b"data")
+
+    async with session_factory() as session:
+        gc = make_gc(session, storage)
+        assert await gc.reconcile() == 2
+        assert await gc.sweep() == 2
+
+    assert sorted(await storage.list_directory("/")) == sorted(referenced)
+
+
+async def test_sweep_keeps_failed_prefix_queued(session_factory, storage, monkeypatch):
+    for file_path in ["/entries/a/snapshot.molj", "/entries/b/snapshot.molj", "/loose.png"]:
+        await storage.save(file_path, b"data")
+
+    delete_directory = storage.delete_directory
+
+    async def failing_delete_directory(prefix: str) -> int:
+        if prefix == "/entries/a/":
+            raise Exception("Storage unavailable")
+        return await delete_directory(prefix)
+
+    monkeypatch.setattr(storage, "delete_directory", failing_delete_directory)
+
+    async with session_factory() as session:
+        gc = make_gc(session, storage)
+        gc.schedule("/entries/a/", "/entries/b/", prefix=True)
+        gc.schedule("/loose.png")
+        await session.commit()
+
+        assert await gc.sweep() == 2
+        assert list(await session.scalars(select(StorageDeletion.file_path))) == ["/entries/a/"]
+
+    assert await storage.list_directory("/") == ["/entries/a/snapshot.molj"]
+
+
+async def test_sweep_deletes_local_paths_from_the_local_storage(
+    session_factory, storage, local_storage
+):
+    await local_storage.save("/volseg_entries/emdb/emd-1/data.bcif", b"data")
+    await storage.save("/volseg_entries/emdb/emd-1/data.bcif", b"data")
+
+    async with session_factory() as session:
+        gc = make_gc(session, storage, local_storage)
+        gc.schedule("/volseg_entries/emdb/emd-1", prefix=True, local=True)
+        await session.commit()
+
+        assert await gc.sweep() == 1
+
+    assert await local_storage.list_directory("/volseg_entries/") == []
+    # The bucket object of the same name is left alone
+    assert await storage.exists("/volseg_entries/emdb/emd-1/data.bcif")
@@ -0,0 +1,37 @@
+import io
+
+import pytest
+
+from app.services.files.local_storage import LocalStorage
+from app.services.files.memory_storage import InMemoryStorage
+from app.services.files.tiered_storage import TieredStorage
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_files_left_in_the_cache_are_indexed_on_first_use(tmp_path):
+    cache = LocalStorage(str(tmp_path / "cache"))
+    await cache.save("/blobs/left-over", io.BytesIO(b"cached"))
+
+    storage = TieredStorage(InMemoryStorage(), cache, max_bytes=1024)
+    # Nothing is read from disk until a request needs the index
+    assert not storage._scanned
+
+    # Served from the cache, the backing storage doesn't have it
+    assert await storage.get("/blobs/left-over") == b"cached"
+    assert storage._size == len(b"cached")
+
+
+async def test_left_over_files_count_towards_the_budget(tmp_path):
+    cache = LocalStorage(str(tmp_path / "cache"))
+    await cache.save("/blobs/old", io.BytesIO(b"o" * 600))
+    backing = InMemoryStorage()
+    await backing.save("/blobs/new", io.BytesIO(b"n" * 600))
+
+    storage = TieredStorage(backing, cache, max_bytes=1024)
+    stream = await storage.open_stream("/blobs/new")
+    assert b"".join([chunk async for chunk in stream]) == b"n" * 600
+
+    # The left-over file was the least recently read and made room
+    assert not await cache.exists("/blobs/old")
+    assert await cache.get("/blobs/new") == b"n" * 600
@@ -0,0 +1,36 @@
+import pytest
+from fastapi import BackgroundTasks
+
+from app.services.job_service import JobService
+from app.tasks.celery_app import celery_app
+
+pytestmark = pytest.mark.anyio
+
+calls: list[tuple[str | None, str]] = []
+
+
+@celery_app.task
+def record(job_id: str | None, value: str) -> None:
+    calls.append((job_id, value))
+
+
+@pytest.fixture(autouse=True)
+def eager(monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    calls.clear()
+
+
+async def test_eager_tasks_run_after_the_response():
+    background_tasks = BackgroundTasks()
+    job_service = JobService(session=None, background_tasks=background_tasks)
+
+    await job_service.enqueue(record, None, "value")
+    assert calls == []
+
+    await background_tasks()
+    assert calls == [(None, "value")]
+
+
+async def test_eager_tasks_run_inline_outside_requests():
+    await JobService(session=None).enqueue(record, None, "value")
+    assert calls == [(None, "value")]
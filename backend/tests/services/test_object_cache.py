@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app.services.files.memory_storage import InMemoryStorage
+from app.services.object_cache import ObjectCache
+from app.services.single_flight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+READERS = 20
+LATENCY_SECONDS = 0.05
+SNAPSHOT = b"{}" * 1024
+
+
+class SlowStorage(InMemoryStorage):
+    """Counts reads and holds each one for a while, so concurrent readers overlap."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def open_stream(self, file_path: str):
+        self.calls += 1
+        await asyncio.sleep(LATENCY_SECONDS)
+        return await super().open_stream(file_path)
+
+
+@pytest.fixture
+async def slow_storage() -> SlowStorage:
+    storage = SlowStorage()
+    await storage.save("/snapshot.json", SNAPSHOT)
+    return storage
+
+
+@pytest.fixture
+def object_cache() -> ObjectCache:
+    return ObjectCache(max_bytes=1024 * 1024, max_item_bytes=64 * 1024, ttl=60)
+
+
+async def read(object_cache: ObjectCache, storage, file_path: str = "/snapshot.json") -> bytes:
+    stream = await object_cache.open_stream(storage, file_path, '"etag"')
+    return b"".join([chunk async for chunk in stream])
+
+
+async def test_concurrent_reads_share_one_storage_call(object_cache, slow_storage):
+    results = await asyncio.gather(*(read(object_cache, slow_storage) for _ in range(READERS)))
+
+    assert results == [SNAPSHOT] * READERS
+    assert slow_storage.calls == 1
+
+
+async def test_cancelled_first_reader_does_not_cancel_the_others(object_cache, slow_storage):
+    cancelled = asyncio.ensure_future(read(object_cache, slow_storage))
+    waiting = [asyncio.ensure_future(read(object_cache, slow_storage)) for _ in range(READERS - 1)]
+    await asyncio.sleep(LATENCY_SECONDS / 2)
+    cancelled.cancel()
+
+    assert await asyncio.gather(*waiting) == [SNAPSHOT] * (READERS - 1)
+    assert cancelled.cancelled()
+    assert slow_storage.calls == 1
+
+
+async def test_missing_object_raises_for_every_reader(object_cache, slow_storage):
+    results = await asyncio.gather(
+        *(read(object_cache, slow_storage, "/missing.json") for _ in range(READERS)),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, FileNotFoundError) for result in results)
+    assert slow_storage.calls == 1
+
+
+async def test_call_is_cancelled_once_nobody_waits():
+    single_flight: SingleFlight[str, str] = SingleFlight()
+    started = asyncio.Event()
+    calls = 0
+
+    async def call() -> str:
+        nonlocal calls
+        calls += 1
+        started.set()
+        await asyncio.sleep(LATENCY_SECONDS)
+        return "done"
+
+    waiter = asyncio.ensure_future(single_flight.do("key", call))
+    await started.wait()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    # The abandoned call is not joined, a new caller starts over
+    assert await single_flight.do("key", call) == "done"
+    assert calls == 2
@@ -0,0 +1,35 @@
+from httpx import AsyncClient
+
+from app.core.security import create_access_token
+from app.database.models import User
+from app.database.models.role_model import RoleEnum
+
+
+def as_user(user: User) -> dict[str, str]:
+    """Headers authenticating the request as the user."""
+    token = create_access_token({"sub": str(user.id), "role": RoleEnum.user.value})
+    return {"Cookie": f"access_token={token}"}
+
+
+async def create_view(
+    client: AsyncClient,
+    user: User,
+    entry_id,
+    *,
+    snapshot: bytes | None = None,
+    thumbnail: bytes | None = None,
+) -> dict:
+    """Create a view through the API and return its response."""
+    files = {}
+    if snapshot is not None:
+        files["snapshot_json"] = ("snapshot.molj", snapshot, "application/json")
+    if thumbnail is not None:
+        files["thumbnail_image"] = ("thumbnail.png", thumbnail, "image/png")
+    response = await client.post(
+        f"/api/v1/entries/{entry_id}/views",
+        data={"name": "Created view", "is_thumbnail": "false"},
+        files=files,
+        headers=as_user(user),
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
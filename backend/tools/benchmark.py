@@ -0,0 +1,378 @@
+import asyncio
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import typer
+from rich import print as rprint
+from rich.console import Console
+from rich.panel import Panel
+from rich.progress import Progress
+from rich.table import Table
+from sqlalchemy import select, text
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.api.v1.contracts.requests.entry_requests import (
+    CountStrategy,
+    EntrySearchQueryParams,
+    SearchQueryParams,
+)
+from app.core.settings import get_settings
+from app.database.models import Entry, User, VolsegEntry
+from app.database.session_manager import get_session_manager
+from app.services.entry_service import EntryService
+from app.services.files.blob_store import BlobStore
+from app.services.files.local_storage import LocalStorage
+from app.services.files.memory_storage import InMemoryStorage
+from app.services.files.minio_storage import MinioStorage
+from app.services.files.storage import Storage
+from app.services.files.storage_gc import StorageGarbageCollector
+from app.services.files.tiered_storage import TieredStorage
+from app.services.job_service import JobService
+from app.services.object_cache import ObjectCache
+from app.services.pagination import encode_cursor
+from app.services.response_cache import get_response_cache
+from app.services.share_link_service import ShareLinkService
+from app.services.suggestion_index import get_suggestion_index
+
+# Create Typer app
+app = typer.Typer(help="CELLIM Viewer benchmark CLI")
+console = Console()
+
+MiB = 1024 * 1024
+
+BENCHMARK_ENTRY_PREFIX = "Benchmark entry"
+
+
+def create_minio_storage(**kwargs) -> MinioStorage:
+    settings = get_settings()
+    return MinioStorage(
+        endpoint=settings.MINIO_ENDPOINT,
+        bucket=settings.MINIO_BUCKET,
+        access_key=settings.MINIO_ACCESS_KEY,
+        secret_key=settings.MINIO_SECRET_KEY,
+        secure=settings.MINIO_SECURE,
+        **kwargs,
+    )
+
+
+def create_entry_service(session) -> EntryService:
+    storage = create_minio_storage()
+    blob_store = BlobStore(session, storage)
+    return EntryService(
+        session=session,
+        share_link_service=ShareLinkService(session, get_response_cache()),
+        suggestion_index=get_suggestion_index(),
+        cache=get_response_cache(),
+        blob_store=blob_store,
+        storage_gc=StorageGarbageCollector(session, storage, blob_store),
+        job_service=JobService(session),
+    )
+
+
+@app.command()
+def upload(
+    size: int = typer.Option(512, "--size", "-s", help="Size of the uploaded file in MiB"),
+    part_size: int = typer.Option(16, "--part-size", "-p", help="Multipart part size in MiB"),
+    concurrency: int = typer.Option(4, "--concurrency", "-c", help="Parts uploaded in parallel"),
+):
+    """Compare single-stream and parallel multipart uploads to MinIO."""
+
+    async def _upload():
+        configurations = {
+            "single stream": create_minio_storage(part_size=size * MiB, parallel_uploads=1),
+            f"multipart ({part_size} MiB x {concurrency})": create_minio_storage(
+                part_size=part_size * MiB, parallel_uploads=concurrency
+            ),
+        }
+
+        table = Table("Mode", "Seconds", "MiB/s")
+        with tempfile.TemporaryFile() as file_data:
+            with console.status(f"[bold blue]Writing {size} MiB test file...[/]"):
+                for _ in range(size):
+                    file_data.write(bytes(MiB))
+
+            for name, storage in configurations.items():
+                file_path = f"/benchmark/{uuid4()}"
+                with console.status(f"[bold blue]Uploading ({name})...[/]"):
+                    start = time.perf_counter()
+                    await storage.save(file_path=file_path, file_data=file_data)
+                    elapsed = time.perf_counter() - start
+                await storage.delete(file_path)
+                table.add_row(name, f"{elapsed:.2f}", f"{size / elapsed:.1f}")
+
+        console.print(table)
+
+    asyncio.run(_upload())
+
+
+@app.command()
+def delete(
+    objects: int = typer.Option(10_000, "--objects", "-o", help="Number of objects to delete"),
+    concurrency: int = typer.Option(4, "--concurrency", "-c", help="Delete requests in flight"),
+):
+    """Compare deleting a directory object by object and with batched multi-object deletes."""
+
+    async def seed(storage: MinioStorage, prefix: str) -> None:
+        semaphore = asyncio.Semaphore(64)
+
+        async def save(index: int) -> None:
+            async with semaphore:
+                await storage.save(file_path=f"{prefix}{index}", file_data=io.BytesIO(b"x"))
+
+        await asyncio.gather(*(save(index) for index in range(objects)))
+
+    async def _delete():
+        storage = create_minio_storage(parallel_deletes=concurrency)
+
+        async def one_by_one(prefix: str, on_progress) -> None:
+            # What delete_directory did before it batched the keys
+            file_paths = await storage.list_directory(prefix)
+            for index, file_path in enumerate(file_paths, start=1):
+                await storage.delete(file_path)
+                on_progress(index, len(file_paths))
+
+        modes = {
+            "one by one": one_by_one,
+            f"batched (1000 keys x {concurrency})": storage.delete_directory,
+        }
+
+        table = Table("Mode", "Seconds", "Objects/s")
+        for name, delete_directory in modes.items():
+            prefix = f"/benchmark/{uuid4()}/"
+            with console.status(f"[bold blue]Uploading {objects} objects...[/]"):
+                await seed(storage, prefix)
+
+            with Progress(console=console, transient=True) as progress:
+                task = progress.add_task(f"Deleting ({name})", total=objects)
+                start = time.perf_counter()
+                await delete_directory(
+                    prefix, lambda done, total: progress.update(task, completed=done)
+                )
+                elapsed = time.perf_counter() - start
+
+            if remaining := len(await storage.list_directory(prefix)):
+                rprint(f"[bold red]{remaining} objects left under {prefix}[/]")
+            table.add_row(name, f"{elapsed:.2f}", f"{objects / elapsed:.0f}")
+
+        console.print(table)
+
+    asyncio.run(_delete())
+
+
+async def seed_benchmark_entries(session, count: int, start: int = 0) -> None:
+    """Bulk insert public entries owned by an existing user, newest first."""
+    user: User = await session.scalar(select(User).limit(1))
+    volseg_entry: VolsegEntry = await session.scalar(select(VolsegEntry).limit(1))
+    if user is None or volseg_entry is None:
+        raise typer.BadParameter("Seed the database first (tools/db_cli.py reset)")
+
+    await session.execute(
+        text(
+            """
+            INSERT INTO entries
+                (id, name, description, is_public, user_id, volseg_entry_id, created_at, updated_at)
+            SELECT
+                gen_random_uuid(),
+                :prefix || ' ' || i,
+                'Benchmark description ' || md5(i::text),
+                true,
+                :user_id,
+                :volseg_entry_id,
+                now() - i * interval '1 second',
+                now()
+            FROM generate_series(:start + 1, :start + :count) AS i
+            """
+        ),
+        {
+            "prefix": BENCHMARK_ENTRY_PREFIX,
+            "user_id": user.id,
+            "volseg_entry_id": volseg_entry.id,
+            "count": count,
+            "start": start,
+        },
+    )
+    await session.execute(text("ANALYZE entries"))
+    await session.commit()
+
+
+async def delete_benchmark_entries(session) -> None:
+    await session.execute(
+        text("DELETE FROM entries WHERE name LIKE :pattern"),
+        {"pattern": f"{BENCHMARK_ENTRY_PREFIX} %"},
+    )
+    await session.commit()
+
+
+async def time_call(func, repeat: int) -> float:
+    """Best wall time of `repeat` awaited calls, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+@app.command()
+def pagination(
+    entries: int = typer.Option(1_000_000, "--entries", "-e", help="Number of entries to seed"),
+    page: int = typer.Option(10_000, "--page", "-p", help="Deep page to compare against page 1"),
+    per_page: int = typer.Option(10, "--per-page", help="Entries per page"),
+    repeat: int = typer.Option(5, "--repeat", "-r", help="Runs per measurement"),
+    keep: bool = typer.Option(False, "--keep", help="Keep the seeded entries"),
+):
+    """Compare offset and cursor pagination of public entries."""
+
+    async def _pagination():
+        try:
+            async with get_session_manager().session() as session:
+                with console.status(f"[bold blue]Seeding {entries} entries...[/]"):
+                    await seed_benchmark_entries(session, entries)
+
+                service = create_entry_service(session)
+
+                # Cursor pointing at the last entry before the deep page
+                last_before = await session.execute(
+                    select(Entry.created_at, Entry.id)
+                    .where(Entry.is_public == True)
+                    .order_by(Entry.created_at.desc(), Entry.id.desc())
+                    .offset((page - 1) * per_page - 1)
+                    .limit(1)
+                )
+                cursor = encode_cursor(*last_before.one())
+
+                queries = {
+                    "offset, page 1": SearchQueryParams(page=1, per_page=per_page),
+                    f"offset, page {page}": SearchQueryParams(page=page, per_page=per_page),
+                    f"cursor, page {page}": SearchQueryParams(
+                        page=page, per_page=per_page, cursor=cursor
+                    ),
+                }
+
+                table = Table("Query", "Best of runs (ms)")
+                for name, search_query in queries.items():
+                    with console.status(f"[bold blue]Timing {name}...[/]"):
+                        elapsed = await time_call(
+                            lambda: service.list_public_entries(search_query=search_query),
+                            repeat,
+                        )
+                    table.add_row(name, f"{elapsed:.1f}")
+                console.print(table)
+
+                if not keep:
+                    with console.status("[bold blue]Deleting benchmark entries...[/]"):
+                        await delete_benchmark_entries(session)
+        finally:
+            await get_session_manager().close()
+
+    asyncio.run(_pagination())
+
+
+@app.command()
+def search(
+    sizes: list[int] = typer.Option(
+        [10_000, 100_000, 1_000_000], "--size", "-s", help="Entry counts to measure at"
+    ),
+    term: str = typer.Option("entry 4242", "--term", "-t", help="Search term"),
+    repeat: int = typer.Option(5, "--repeat", "-r", help="Runs per measurement"),
+    keep: bool = typer.Option(False, "--keep", help="Keep the seeded entries"),
+):
+    """Measure full-text search latency as the number of entries grows."""
+
+    async def _search():
+        try:
+            async with get_session_manager().session() as session:
+                service = create_entry_service(session)
+
+                # Count strategy is pinned so only the search itself is compared
+                listing_query = SearchQueryParams(search_term=term, count=CountStrategy.capped)
+                search_query = EntrySearchQueryParams(q=term, count=CountStrategy.capped)
+
+                table = Table("Entries", "Filtered listing (ms)", "Ranked search (ms)")
+                seeded = 0
+                for size in sorted(sizes):
+                    with console.status(f"[bold blue]Seeding up to {size} entries...[/]"):
+                        await seed_benchmark_entries(session, size - seeded, start=seeded)
+                        seeded = size
+
+                    with console.status(f"[bold blue]Timing search over {size} entries...[/]"):
+                        listing = await time_call(
+                            lambda: service.list_public_entries(search_query=listing_query),
+                            repeat,
+                        )
+                        ranked = await time_call(
+                            lambda: service.search_public_entries(search_query=search_query),
+                            repeat,
+                        )
+                    table.add_row(str(size), f"{listing:.1f}", f"{ranked:.1f}")
+                console.print(table)
+
+                if not keep:
+                    with console.status("[bold blue]Deleting benchmark entries...[/]"):
+                        await delete_benchmark_entries(session)
+        finally:
+            await get_session_manager().close()
+
+    asyncio.run(_search())
+
+
+@app.callback()
+def main():
+    """
+    CELLIM Viewer Benchmark CLI
+    """
+    # Display welcome message
+    rprint(
+        Panel.fit(
+            "[bold blue]CELLIM Viewer Benchmarks[/]",
+        )
+    )
+
+
+@app.command()
+def storage(
+    size: int = typer.Option(1, "--size", "-s", help="Size of the read object in MiB"),
+    repeat: int = typer.Option(20, "--repeat", "-r", help="Reads per backend"),
+    minio: bool = typer.Option(False, "--minio", help="Include MinIO and a cache in front of it"),
+):
+    """Time repeated reads from every storage backend."""
+
+    async def _storage():
+        with tempfile.TemporaryDirectory() as local_dir, tempfile.TemporaryDirectory() as cache_dir:
+            backends: dict[str, Storage] = {
+                "in-memory": InMemoryStorage(),
+                "local disk": LocalStorage(local_dir),
+                "tiered (disk over in-memory)": TieredStorage(
+                    InMemoryStorage(), LocalStorage(f"{cache_dir}/memory"), max_bytes=64 * MiB
+                ),
+            }
+            if minio:
+                backends["minio"] = create_minio_storage()
+                backends["tiered (disk over minio)"] = TieredStorage(
+                    create_minio_storage(), LocalStorage(f"{cache_dir}/minio"), max_bytes=64 * MiB
+                )
+
+            table = Table("Backend", "First read ms", "Best read ms")
+            for name, backend in backends.items():
+                prefix = f"/benchmark/{uuid4()}/"
+                file_path = f"{prefix}object"
+                await backend.save(file_path, io.BytesIO(bytes(size * MiB)))
+                with console.status(f"[bold blue]Reading from {name}...[/]"):
+                    first = await time_call(lambda: backend.get(file_path), 1)
+                    best = await time_call(lambda: backend.get(file_path), repeat)
+                await backend.delete_directory(prefix)
+
+                table.add_row(name, f"{first:.2f}", f"{best:.2f}")
+
+        console.print(table)
+
+    asyncio.run(_storage())
+
+
+if __name__ == "__main__":
+    app()